@@ -1,17 +1,73 @@
-from flask import Flask, jsonify
+# Installed first so STARTUP_PROFILE=true can time every import below
+from utils.startup_profile import startup_profile
+startup_profile.install_if_enabled()
+
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from config import config
+from services.metrics import metrics
+from utils.compression import response_compression
+from utils.json_provider import init_json_provider
+from utils.lazy_blueprints import LazyBlueprints, load_blueprint
 import os
 
-# Import all route blueprints
-from routes.users import users_bp
-from routes.sessions import sessions_bp
-from routes.rooms import rooms_bp
-from routes.achievements import achievements_bp
-from routes.discussions import discussions_bp
-from routes.leaderboard import leaderboard_bp
-from routes.statistics import statistics_bp
-from routes.targets import target_bp
+# Route blueprints as (URL prefix, module, attribute), imported when registered
+BLUEPRINTS = [
+    ('/api/users', 'routes.users', 'users_bp'),
+    ('/api/study_sessions', 'routes.sessions', 'sessions_bp'),
+    ('/api/rooms', 'routes.rooms', 'rooms_bp'),
+    ('/api/achievements', 'routes.achievements', 'achievements_bp'),
+    ('/api/discussions', 'routes.discussions', 'discussions_bp'),
+    ('/api/leaderboard', 'routes.leaderboard', 'leaderboard_bp'),
+    ('/api/statistics', 'routes.statistics', 'statistics_bp'),
+    ('/api/targets', 'routes.targets', 'target_bp'),
+    ('/api/batch', 'routes.batch', 'batch_bp'),
+    ('/api/events', 'routes.events', 'events_bp'),
+]
+
+def create_base_app(config_name):
+    """Flask app with the configuration, hooks and error handlers every route relies on"""
+    
+    with startup_profile.phase('flask app'):
+        app = Flask(__name__)
+        app.config.from_object(config[config_name])
+    
+    # Enable CORS
+    with startup_profile.phase('cors'):
+        CORS(app, resources={r"/*": {"origins": "*"}})
+    
+    # Encode responses with orjson when it is installed
+    if app.config.get('JSON_FAST_ENCODER'):
+        init_json_provider(app)
+    
+    # Per-route latency, errors and in-flight requests for /metrics
+    metrics.init_app(app)
+    
+    # gzip/brotli by Accept-Encoding (runs before the metrics hook, so latency includes it)
+    response_compression.init_app(app)
+    
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found(error):
+        return jsonify({'error': 'Endpoint not found'}), 404
+    
+    @app.errorhandler(500)
+    def internal_error(error):
+        return jsonify({'error': 'Internal server error'}), 500
+    
+    return app
+
+def init_api_app(app):
+    """
+    Add what the API blueprints rely on to an app from create_base_app()
+    The services are imported here, not at startup, so with lazy blueprints the PocketBase SDK
+    and every service module (which register their own /metrics gauges) load with the first blueprint
+    """
+    from services.pocketbase_service import pocketbase_service
+    
+    # Return each request's pooled PocketBase client when the request ends
+    pocketbase_service.init_app(app)
+    return app
 
 def create_app(config_name=None):
     """Main Application"""
@@ -20,21 +76,26 @@ def create_app(config_name=None):
     if config_name is None:
         config_name = os.getenv('FLASK_ENV', 'default')
     
-    app = Flask(__name__)
-    app.config.from_object(config[config_name])
+    app = create_base_app(config_name)
     
-    # Enable CORS
-    CORS(app, resources={r"/*": {"origins": "*"}})
-    
-    # Register blueprints
-    app.register_blueprint(users_bp)
-    app.register_blueprint(sessions_bp)
-    app.register_blueprint(rooms_bp)
-    app.register_blueprint(achievements_bp)
-    app.register_blueprint(discussions_bp)
-    app.register_blueprint(leaderboard_bp)
-    app.register_blueprint(statistics_bp)
-    app.register_blueprint(target_bp)
+    # Optionally build the leaderboard index now instead of on the first request
+    if app.config.get('LEADERBOARD_PRELOAD'):
+        try:
+            with startup_profile.phase('leaderboard preload'):
+                from services.leaderboard_index import leaderboard_index
+                leaderboard_index.rebuild()
+        except Exception as e:
+            app.logger.warning(f"Leaderboard preload failed, building on first request: {e}")
+    
+    # Register blueprints, or defer each one to the first request under its prefix, which
+    # serves it from an app of its own (a batch can reach any blueprint, so its app has them all)
+    if app.config.get('LAZY_BLUEPRINTS'):
+        LazyBlueprints(app, BLUEPRINTS, lambda: init_api_app(create_base_app(config_name)),
+                       load_all_prefixes=('/api/batch',))
+    else:
+        init_api_app(app)
+        for spec in BLUEPRINTS:
+            load_blueprint(app, spec)
     
     # Health check endpoint
     @app.route('/health')
@@ -44,6 +105,41 @@ def create_app(config_name=None):
             'message': 'StudyLeague API is running'
         }), 200
     
+    # Response cache hit ratios per route
+    @app.route('/health/cache')
+    def cache_stats():
+        from utils.response_cache import response_cache
+        return jsonify(response_cache.stats()), 200
+    
+    # Compression ratio and CPU time per route
+    @app.route('/health/compression')
+    def compression_stats():
+        return jsonify(response_compression.stats()), 200
+    
+    # Circuit breaker state and read coalescing
+    @app.route('/health/upstream')
+    def upstream_stats():
+        from services.pocketbase_service import pocketbase_service
+        single_flight = pocketbase_service.single_flight
+        return jsonify({
+            'circuit_breaker': pocketbase_service.breaker.stats(),
+            'single_flight': single_flight.stats() if single_flight else None
+        }), 200
+    
+    # Import and init time per module (STARTUP_PROFILE=true)
+    if startup_profile.enabled:
+        @app.route('/health/startup')
+        def startup_stats():
+            return jsonify(startup_profile.report(limit=request.args.get('limit', 30, type=int))), 200
+        
+        startup_profile.log(app.logger)
+    
+    # Prometheus scrape endpoint
+    if metrics.enabled:
+        @app.route('/metrics')
+        def prometheus_metrics():
+            return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+    
     # Root endpoint
     @app.route('/')
     def root():
@@ -51,15 +147,6 @@ def create_app(config_name=None):
             'message': 'You are not allowed to access this resource!'
         }), 403
     
-    # Error handlers
-    @app.errorhandler(404)
-    def not_found(error):
-        return jsonify({'error': 'Endpoint not found'}), 404
-    
-    @app.errorhandler(500)
-    def internal_error(error):
-        return jsonify({'error': 'Internal server error'}), 500
-    
     return app
 
 if __name__ == '__main__':
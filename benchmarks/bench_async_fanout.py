@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial vs. concurrent PocketBase fetches against the local stub
+Run from the repository root: python -m benchmarks.bench_async_fanout
+"""
+
+import argparse
+import statistics
+import time
+
+from benchmarks.pocketbase_stub import PocketBaseStub
+from services.async_pocketbase_service import AsyncPocketBaseService
+from services.pocketbase_service import PocketBaseService
+
+COLLECTIONS = ['users', 'study_targets', 'leaderboard', 'achievements', 'study_sessions']
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def report(label, samples):
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"   {label:<28} mean {statistics.mean(samples):7.2f} ms   p50 {statistics.median(samples):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.02, help='stub latency per upstream call, seconds')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    with PocketBaseStub(latency=args.latency) as stub:
+        sync_service = PocketBaseService(stub.url)
+        async_service = AsyncPocketBaseService(stub.url)
+
+        def serial():
+            return [sync_service.list_records(name, per_page=10) for name in COLLECTIONS]
+
+        def concurrent():
+            return async_service.gather(*[async_service.list_records(name, per_page=10) for name in COLLECTIONS])
+
+        # Results must match before timings mean anything
+        assert serial() == concurrent()
+
+        print(f"🔄 Fetching {len(COLLECTIONS)} collections, {args.latency * 1000:.0f} ms upstream latency, {args.iterations} iterations")
+        serial_samples = timed(serial, args.iterations)
+        concurrent_samples = timed(concurrent, args.iterations)
+        report("serial (PocketBaseService)", serial_samples)
+        report("concurrent (async gather)", concurrent_samples)
+        print(f"✅ Speed-up: {statistics.mean(serial_samples) / statistics.mean(concurrent_samples):.1f}x")
+
+        async_service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Cold-start benchmark: eager vs. lazy blueprint registration
+Every sample is a fresh interpreter timing `import app`, create_app() and the first requests
+Run from the repository root: python -m benchmarks.bench_cold_start
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Runs in the child interpreter; prints its timings (ms) as JSON
+CHILD = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+client = flask_app.test_client()
+client.get('/health')
+health = time.perf_counter()
+client.get('/api/rooms/')
+routed = time.perf_counter()
+print(json.dumps({
+    'import': (imported - started) * 1000,
+    'create_app': (created - imported) * 1000,
+    'first /health': (health - created) * 1000,
+    'first /api/rooms/': (routed - health) * 1000,
+    'ready': (health - started) * 1000,
+}))
+"""
+
+STEPS = ['import', 'create_app', 'first /health', 'first /api/rooms/', 'ready', 'process']
+
+
+def sample(lazy):
+    env = dict(os.environ, LAZY_BLUEPRINTS='true' if lazy else 'false', LEADERBOARD_PRELOAD='false')
+    env.pop('STARTUP_PROFILE', None)
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD], env=env, capture_output=True, text=True, check=True).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process'] = (time.perf_counter() - started) * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"🔄 Starting {args.runs} fresh processes per mode (medians, ms)")
+    results = {}
+    for lazy in (False, True):
+        runs = [sample(lazy) for _ in range(args.runs)]
+        results[lazy] = {step: statistics.median(run[step] for run in runs) for step in STEPS}
+
+    print(f"   {'step':<20} {'eager':>9} {'lazy':>9} {'lazy/eager':>11}")
+    for step in STEPS:
+        eager, lazy = results[False][step], results[True][step]
+        print(f"   {step:<20} {eager:9.1f} {lazy:9.1f} {lazy / eager:10.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark for `fields` projection: upstream time and response size of whole vs. projected listings
+Run from the repository root: python -m benchmarks.bench_fields
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.pocketbase_stub import PocketBaseStub
+from controllers import DiscussionController, StudySessionController
+from services.field_selection import FieldSelection
+from services.pocketbase_service import PocketBaseService
+
+# (label, controller class, expand, fields a list screen actually reads)
+CASES = [
+    ('sessions', StudySessionController, 'room', 'id,startedAt,active_duration,expand.room.roomName'),
+    ('discussions', DiscussionController, 'author', 'id,title,created,expand.author.username'),
+]
+
+
+def bench(fn, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=200)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    with PocketBaseStub(records_per_collection=args.records) as stub:
+        service = PocketBaseService(stub.url)
+        print(f"🔄 Listing {args.records} records per page (best of {args.rounds})")
+        for label, controller_class, expand, fields in CASES:
+            controller = controller_class(service)
+            # Warm the user-profile cache so both runs measure the listing itself
+            controller.get_all(per_page=args.records, expand=expand)
+            selection = FieldSelection.parse(fields)
+            whole_time, whole = bench(lambda: controller.get_all(per_page=args.records, expand=expand), args.rounds)
+            projected_time, projected = bench(
+                lambda: controller.get_all(per_page=args.records, expand=expand, fields=selection), args.rounds
+            )
+            whole_size = len(json.dumps(whole, default=str))
+            projected_size = len(json.dumps(projected, default=str))
+            print(f"   {label:<12} whole {whole_time * 1000:7.2f} ms {whole_size / 1024:7.1f} KiB"
+                  f"   fields {projected_time * 1000:7.2f} ms {projected_size / 1024:7.1f} KiB")
+            print(f"✅ {label}: {whole_size / projected_size:.1f}x smaller, {whole_time / projected_time:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
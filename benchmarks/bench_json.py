@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for JSON responses: Flask's default provider vs. FastJSONProvider
+Encodes realistic list payloads (sessions and discussions with expands) and reports time and allocations
+Run from the repository root: python -m benchmarks.bench_json
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from pocketbase.models.record import Record
+
+from benchmarks.bench_serialize_record import make_session_records
+from benchmarks.pocketbase_stub import make_record
+from services.pocketbase_service import serialize_record
+from utils.json_provider import FastJSONProvider
+
+
+def make_discussion_records(count):
+    """Discussions expanded with their author"""
+    records = []
+    for index in range(count):
+        discussion = make_record('discussions', index)
+        discussion['expand'] = {'author': make_record('users', index % 200)}
+        records.append(Record(discussion))
+    return records
+
+
+def bench(fn, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_allocation(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    fast = FastJSONProvider(app)
+    providers = [('json', DefaultJSONProvider(app)), (fast.encoder, fast)]
+    payloads = [
+        ('sessions', {'sessions': [serialize_record(r) for r in make_session_records(args.records)], 'count': args.records}),
+        ('discussions', {'discussions': [serialize_record(r) for r in make_discussion_records(args.records)], 'count': args.records}),
+    ]
+
+    print(f"🔄 Encoding {args.records} records per response (best of {args.rounds})")
+    with app.app_context():
+        for label, payload in payloads:
+            bodies = {name: provider.response(payload).get_data() for name, provider in providers}
+            assert json.loads(bodies['json']) == json.loads(bodies[fast.encoder])
+            results = {}
+            for name, provider in providers:
+                seconds = bench(lambda: provider.response(payload), args.rounds)
+                peak = peak_allocation(lambda: provider.response(payload))
+                results[name] = seconds
+                print(f"   {label:<12} {name:<7} {seconds * 1000:8.2f} ms   peak {peak / 1024:8.0f} KiB"
+                      f"   body {len(bodies[name]) / 1024:6.0f} KiB")
+            print(f"✅ {label}: {results['json'] / results[fast.encoder]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Route-level latency benchmark: throughput and p50/p95/p99 for every blueprint
+Serves create_app() over HTTP with PocketBase replaced by the local stub
+Run from the repository root: python -m benchmarks.bench_routes --output bench_routes.json
+Compare two runs:             python -m benchmarks.bench_routes --compare old.json --output new.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+import httpx
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from benchmarks.pocketbase_stub import PocketBaseStub, make_token, record_id
+
+USER_ID = record_id('users', 0)
+# Replaced with the id of a session started by the benchmark user
+STARTED_SESSION = '<started session>'
+
+# (blueprint, method, path, json body)
+ROUTES = [
+    ('users', 'GET', '/api/users/', None),
+    ('sessions', 'GET', f'/api/study_sessions/?user_id={USER_ID}', None),
+    ('sessions', 'GET', f"/api/study_sessions/{record_id('study_sessions', 1)}", None),
+    ('sessions', 'POST', '/api/study_sessions/heartbeat', {'session_id': STARTED_SESSION}),
+    ('rooms', 'GET', '/api/rooms/', None),
+    ('rooms', 'GET', '/api/rooms/?public=true', None),
+    ('rooms', 'GET', f"/api/rooms/{record_id('study_rooms', 1)}", None),
+    ('achievements', 'GET', '/api/achievements/', None),
+    ('achievements', 'GET', f"/api/achievements/{record_id('achievements', 1)}", None),
+    ('discussions', 'GET', '/api/discussions/', None),
+    ('discussions', 'GET', f"/api/discussions/{record_id('discussions', 1)}", None),
+    ('leaderboard', 'GET', '/api/leaderboard/?limit=10', None),
+    ('leaderboard', 'GET', '/api/leaderboard/me', None),
+    ('leaderboard', 'GET', f'/api/leaderboard/around/{USER_ID}', None),
+    ('statistics', 'GET', '/api/statistics/', None),
+    ('targets', 'GET', '/api/targets/', None),
+]
+
+
+class KeepAliveHandler(WSGIRequestHandler):
+    """HTTP/1.1 so each benchmark worker reuses one connection"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_route(base_url, headers, method, path, body, concurrency, requests_per_worker):
+    """Hammer one route from `concurrency` workers, each on its own keep-alive connection"""
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    start = threading.Barrier(concurrency + 1)
+
+    def worker():
+        samples, seen = [], {}
+        with httpx.Client(base_url=base_url, headers=headers, timeout=30) as client:
+            client.request(method, path, json=body)  # warm the connection
+            start.wait()
+            for _ in range(requests_per_worker):
+                started = time.perf_counter()
+                response = client.request(method, path, json=body)
+                samples.append((time.perf_counter() - started) * 1000)
+                seen[response.status_code] = seen.get(response.status_code, 0) + 1
+        with lock:
+            latencies.extend(samples)
+            for status, count in seen.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    errors = sum(count for status, count in statuses.items() if status >= 400)
+    return {
+        'requests': len(ordered),
+        'throughput_rps': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50), 3),
+        'p95_ms': round(percentile(ordered, 0.95), 3),
+        'p99_ms': round(percentile(ordered, 0.99), 3),
+        'max_ms': round(ordered[-1], 3) if ordered else 0.0,
+        'errors': errors,
+        'status_codes': {str(status): count for status, count in sorted(statuses.items())}
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """Print throughput and p95 change per route/concurrency against an earlier run"""
+    before = {(r['route'], r['concurrency']): r for r in previous['results']}
+    print(f"\n📊 Compared with {previous.get('commit') or previous.get('timestamp')}")
+    for result in current['results']:
+        old = before.get((result['route'], result['concurrency']))
+        if not old or not old['throughput_rps'] or not old['p95_ms']:
+            continue
+        rps = (result['throughput_rps'] / old['throughput_rps'] - 1) * 100
+        p95 = (result['p95_ms'] / old['p95_ms'] - 1) * 100
+        print(f"   {result['route']:<58} c={result['concurrency']:<3} rps {rps:+6.1f}%   p95 {p95:+6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latency', type=float, default=0.005, help='stub latency per upstream call, seconds')
+    parser.add_argument('--records', type=int, default=200, help='records per stub collection')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated worker counts')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route and concurrency level')
+    parser.add_argument('--route', action='append', help='only run routes whose path contains this (repeatable)')
+    parser.add_argument('--output', default='bench_routes.json', help='where to write the JSON results')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',')]
+    routes = [r for r in ROUTES if not args.route or any(part in r[2] for part in args.route)]
+
+    with PocketBaseStub(latency=args.latency, records_per_collection=args.records) as stub:
+        # Services read POCKETBASE_URL when they are imported
+        os.environ['POCKETBASE_URL'] = stub.url
+        from app import create_app
+
+        server = make_server('127.0.0.1', 0, create_app(), threaded=True, request_handler=KeepAliveHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_port}'
+        headers = {'Authorization': 'Bearer ' + make_token(USER_ID)}
+
+        # Start the session the heartbeat route beats, so it measures the success path
+        started = httpx.post(f'{base_url}/api/study_sessions/start', headers=headers, json={}, timeout=30)
+        session_body = {'session_id': started.json()['id']}
+        routes = [(bp, method, path, session_body if body == {'session_id': STARTED_SESSION} else body)
+                  for bp, method, path, body in routes]
+
+        print(f"🔄 {len(routes)} routes x concurrency {levels}, {args.requests} requests each, "
+              f"{args.latency * 1000:.1f} ms upstream latency")
+        results = []
+        for blueprint, method, path, body in routes:
+            for concurrency in levels:
+                per_worker = max(1, args.requests // concurrency)
+                result = run_route(base_url, headers, method, path, body, concurrency, per_worker)
+                result.update(route=f'{method} {path}', blueprint=blueprint, concurrency=concurrency)
+                results.append(result)
+                flag = '⚠️ ' if result['errors'] else '  '
+                print(f" {flag}{result['route']:<58} c={concurrency:<3} {result['throughput_rps']:8.1f} rps   "
+                      f"p50 {result['p50_ms']:7.2f}   p95 {result['p95_ms']:7.2f}   p99 {result['p99_ms']:7.2f} ms")
+
+        server.shutdown()
+
+    report = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'stub_latency_s': args.latency,
+        'records_per_collection': args.records,
+        'requests_per_level': args.requests,
+        'concurrency_levels': levels,
+        'results': results
+    }
+    with open(args.output, 'w') as handle:
+        json.dump(report, handle, indent=2)
+    print(f"✅ Wrote {len(results)} measurements to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            compare(json.load(handle), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for serialize_record over list responses with nested expands
+Run from the repository root: python -m benchmarks.bench_serialize_record
+"""
+
+import argparse
+import time
+
+from pocketbase.models.record import Record
+
+from benchmarks.pocketbase_stub import make_record
+from services.pocketbase_service import serialize_record
+
+
+def legacy_serialize_record(record):
+    """The serializer before the fast path, kept verbatim as the baseline"""
+    if not record:
+        return {}
+
+    result = record.__dict__.copy() if hasattr(record, '__dict__') else {}
+
+    for key, value in result.items():
+        if hasattr(value, '__dict__') and hasattr(value, 'id'):
+            result[key] = legacy_serialize_record(value)
+        elif isinstance(value, dict):
+            serialized_dict = {}
+            for sub_key, sub_value in value.items():
+                if hasattr(sub_value, '__dict__') and hasattr(sub_value, 'id'):
+                    serialized_dict[sub_key] = legacy_serialize_record(sub_value)
+                else:
+                    serialized_dict[sub_key] = sub_value
+            result[key] = serialized_dict
+        elif isinstance(value, list):
+            result[key] = [legacy_serialize_record(item) if hasattr(item, '__dict__') and hasattr(item, 'id') else item for item in value]
+
+    return result
+
+
+def make_session_records(count):
+    """Study sessions expanded with user and room, the room expanded with its host"""
+    records = []
+    for index in range(count):
+        room = make_record('study_rooms', index % 20)
+        room['expand'] = {'host': make_record('users', index % 7)}
+        session = make_record('study_sessions', index)
+        session['tags'] = ['focus', 'math']
+        session['meta'] = {'device': 'android', 'version': 3}
+        session['expand'] = {'user': make_record('users', index % 200), 'room': room}
+        records.append(Record(session))
+    return records
+
+
+def bench(fn, records, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for record in records:
+            fn(record)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_session_records(args.records)
+    assert [serialize_record(r) for r in records] == [legacy_serialize_record(r) for r in records]
+
+    print(f"🔄 Serializing {args.records} study sessions with expand=user,room.host (best of {args.rounds})")
+    legacy = bench(legacy_serialize_record, records, args.rounds)
+    fast = bench(serialize_record, records, args.rounds)
+    for label, seconds in (('legacy', legacy), ('fast path', fast)):
+        print(f"   {label:<10} {seconds * 1000:8.2f} ms   {seconds / args.records * 1e6:6.2f} us/record")
+    print(f"✅ Speed-up: {legacy / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for request payload validation: marshmallow Schema.load vs. the compiled fast path
+Run from the repository root: python -m benchmarks.bench_validation
+"""
+
+import argparse
+import time
+
+from pocketbase.models.record import Record
+
+from schemas import HeartbeatSchema, StartSessionSchema, StopSessionSchema, StudySessionSchema, UserSchema
+from schemas.compiled import compile_schema
+from benchmarks.pocketbase_stub import make_record
+from services.pocketbase_service import serialize_record
+
+# (label, schema class, payload, partial)
+PAYLOADS = [
+    ('heartbeat', HeartbeatSchema, {'session_id': 'abc123', 'timestamp': 1718000000000, 'is_active': True}, False),
+    ('start', StartSessionSchema, {'timestamp': '2024-06-10T08:00:00Z'}, False),
+    ('stop', StopSessionSchema, {'session_id': 'abc123', 'timestamp': 1718000000000}, False),
+    ('session create', StudySessionSchema,
+     {'id': 'abc123', 'user': 'u1', 'room': None, 'active_duration': 25, 'active': True, 'integrity_score': 97.5}, False),
+    ('session update', StudySessionSchema, {'active_duration': 30, 'active': False}, True),
+]
+
+
+def bench(fn, rounds, iterations):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, time.perf_counter() - started)
+    return best / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"🔄 Validating each payload {args.iterations} times (best of {args.rounds})")
+    for label, schema_class, payload, partial in PAYLOADS:
+        schema = schema_class()
+        compiled = compile_schema(schema)
+        assert compiled.load(payload, partial=partial) == schema.load(payload, partial=partial)
+        marshmallow_cost = bench(lambda: schema.load(payload, partial=partial), args.rounds, args.iterations)
+        compiled_cost = bench(lambda: compiled.load(payload, partial=partial), args.rounds, args.iterations)
+        print(f"   {label:<15} marshmallow {marshmallow_cost * 1e6:7.2f} us   compiled {compiled_cost * 1e6:6.2f} us"
+              f"   {marshmallow_cost / compiled_cost:5.1f}x")
+
+    user = serialize_record(Record(make_record('users', 1)))
+    shared = UserSchema()
+    per_call = bench(lambda: UserSchema().dump(user), args.rounds, args.iterations)
+    reused = bench(lambda: shared.dump(user), args.rounds, args.iterations)
+    print(f"   {'profile dump':<15} new schema  {per_call * 1e6:7.2f} us   shared   {reused * 1e6:6.2f} us"
+          f"   {per_call / reused:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the PocketBase HTTP API, used by the benchmarks
+Serves the record CRUD and auth endpoints from memory with a configurable latency,
+including list filters (comparisons joined by && / ||) and multi-field sorts
+"""
+
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+import base64
+import json
+import re
+import threading
+import time
+import uuid
+
+# Relation fields the API expands, and the collection they point at
+RELATIONS = {
+    'user': 'users',
+    'author': 'users',
+    'host': 'users',
+    'room': 'study_rooms',
+    'achievement': 'achievements',
+    'discussion': 'discussions',
+}
+
+
+def make_token(user_id, ttl=3600):
+    """Unsigned JWT-shaped token, enough for local exp decoding"""
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+    return f"{encode({'alg': 'HS256', 'typ': 'JWT'})}.{encode({'id': user_id, 'exp': int(time.time()) + ttl})}.stub"
+
+
+def token_user_id(token):
+    """The `id` claim of a make_token() token, or None"""
+    try:
+        payload = token.split('.')[1]
+        return json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))['id']
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def record_id(collection, index):
+    """15-character id, like PocketBase's"""
+    return f"{collection[:6]}{index:0{15 - len(collection[:6])}d}"
+
+
+def make_record(collection, index):
+    """Synthetic record shaped like the collections the API reads"""
+    record = {
+        'id': record_id(collection, index),
+        'collectionId': f"pbc_{collection}",
+        'collectionName': collection,
+        'created': f"2025-10-{(index % 28) + 1:02d} 08:00:00.000Z",
+        'updated': f"2025-10-{(index % 28) + 1:02d} 09:30:00.000Z",
+    }
+    user_id = record_id('users', index % 200)
+    if collection == 'users':
+        record.update({'email': f"user{index}@example.com", 'username': f"student{index}",
+                       'first_name': 'Study', 'last_name': f"User{index}", 'role': 'user',
+                       'avatar': '', 'verified': True, 'emailVisibility': False})
+    elif collection == 'study_sessions':
+        record.update({'user': user_id, 'room': record_id('study_rooms', index % 20), 'active_duration': index % 240,
+                       'active': index % 10 == 0, 'startedAt': record['created'], 'endedAt': '',
+                       'integrity_score': 87.5})
+    elif collection == 'study_rooms':
+        record.update({'roomName': f"Room {index}", 'host': user_id, 'participants': index % 12,
+                       'maxParticipants': 20, 'isPublic': True, 'thumbnail': '', 'webrtcSessionId': ''})
+    elif collection == 'discussions':
+        record.update({'author': user_id, 'title': f"Discussion {index}",
+                       'content': "How do you stay focused during long study sessions? " * 4})
+    elif collection == 'discussion_replies':
+        record.update({'author': user_id, 'discussion': record_id('discussions', index % 50), 'body': "Pomodoro works for me."})
+    elif collection == 'achievements':
+        record.update({'title': f"Achievement {index}", 'description': "Study milestone",
+                       'icon': 'trophy', 'requiredHours': float(index * 5)})
+    elif collection == 'user_achievements':
+        record.update({'user': user_id, 'achievement': record_id('achievements', index % 20), 'unlockedAt': record['created']})
+    elif collection == 'leaderboard':
+        record.update({'user': user_id, 'total_day': 600 - index, 'total_week': 3000 - index})
+    elif collection == 'study_targets':
+        record.update({'user': user_id, 'daily_target': 60, 'weekly_target': 300, 'monthly_target': 1200})
+    else:
+        record.update({'user': user_id})
+    return record
+
+
+FILTER_TOKEN = re.compile(r"\s*(?:('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")|(&&|\|\||!=|>=|<=|!~|[=<>~()])|([\w.]+))")
+
+
+def _parse_filter(expression):
+    """
+    Compile the subset of PocketBase filter syntax the API uses into a predicate:
+    `field op value` comparisons joined by && / || with parentheses
+    """
+    tokens = []
+    position = 0
+    expression = expression.strip()
+    while position < len(expression):
+        match = FILTER_TOKEN.match(expression, position)
+        if not match:
+            raise ValueError(f"Invalid filter near {expression[position:]!r}")
+        string, operator, word = match.groups()
+        if string is not None:
+            tokens.append(('value', re.sub(r'\\(.)', r'\1', string[1:-1])))
+        elif operator is not None:
+            tokens.append(('op', operator))
+        elif word in ('true', 'false'):
+            tokens.append(('value', word == 'true'))
+        elif word == 'null':
+            tokens.append(('value', ''))
+        elif re.fullmatch(r'-?\d+(\.\d+)?', word):
+            tokens.append(('value', float(word)))
+        else:
+            tokens.append(('field', word))
+        position = match.end()
+
+    def peek():
+        return tokens[0] if tokens else (None, None)
+
+    def operand():
+        kind, value = tokens.pop(0)
+        if kind == 'field':
+            return lambda record: record.get(value, '')
+        return lambda record: value
+
+    def comparison():
+        if peek() == ('op', '('):
+            tokens.pop(0)
+            inner = disjunction()
+            tokens.pop(0)
+            return inner
+        left = operand()
+        operator = tokens.pop(0)[1]
+        right = operand()
+
+        def compare(record):
+            a, b = left(record), right(record)
+            if isinstance(a, bool) or isinstance(b, bool):
+                a, b = bool(a), bool(b)
+            elif isinstance(a, (int, float)) or isinstance(b, (int, float)):
+                try:
+                    a, b = float(a or 0), float(b or 0)
+                except (TypeError, ValueError):
+                    a, b = str(a), str(b)
+            else:
+                a, b = str(a), str(b)
+            if operator == '=':
+                return a == b
+            if operator == '!=':
+                return a != b
+            if operator == '<':
+                return a < b
+            if operator == '<=':
+                return a <= b
+            if operator == '>':
+                return a > b
+            if operator == '>=':
+                return a >= b
+            if operator == '~':
+                return str(b).lower() in str(a).lower()
+            return str(b).lower() not in str(a).lower()
+        return compare
+
+    def conjunction():
+        parts = [comparison()]
+        while peek() == ('op', '&&'):
+            tokens.pop(0)
+            parts.append(comparison())
+        return lambda record: all(part(record) for part in parts)
+
+    def disjunction():
+        parts = [conjunction()]
+        while peek() == ('op', '||'):
+            tokens.pop(0)
+            parts.append(conjunction())
+        return lambda record: any(part(record) for part in parts)
+
+    if not tokens:
+        return lambda record: True
+    return disjunction()
+
+
+def _pick_fields(value, fields):
+    """Apply a `fields` selection (dot paths, `*` wildcards) the way PocketBase does"""
+    if not fields:
+        return value
+    tree = {}
+    for path in fields.split(','):
+        node = tree
+        parts = path.strip().split('.')
+        for part in parts[:-1]:
+            node = node.setdefault(part, {}) if node.get(part, {}) is not None else {}
+        node[parts[-1]] = None
+
+    def pick(value, tree):
+        if tree is None:
+            return value
+        if isinstance(value, list):
+            return [pick(item, tree) for item in value]
+        if not isinstance(value, dict):
+            return value
+        return {key: pick(item, tree.get(key, tree.get('*'))) for key, item in value.items() if key in tree or '*' in tree}
+
+    return pick(value, tree)
+
+
+def _sort_records(records, sort):
+    """Apply a PocketBase sort string such as `-created,-id`"""
+    for field in reversed([field.strip() for field in sort.split(',') if field.strip()]):
+        descending = field.startswith('-')
+        name = field.lstrip('+-')
+        records.sort(key=lambda record: (record.get(name) is None, record.get(name, '')), reverse=descending)
+    return records
+
+
+class PocketBaseStub:
+    """In-memory PocketBase stand-in running on a background thread"""
+
+    def __init__(self, latency=0.0, records_per_collection=200, host='127.0.0.1', port=0):
+        self.latency = latency
+        self.records_per_collection = records_per_collection
+        self.requests = 0
+        self._collections = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @contextmanager
+    def serving(self, service, pool_size=4):
+        """Point a PocketBaseService (e.g. the global one the routes use) at the stub for the block"""
+        from services.pocketbase_pool import PocketBaseClientPool
+        saved = service.base_url, service.pool, service._default_client
+        service.base_url, service.pool = self.url, PocketBaseClientPool(self.url, size=pool_size)
+        service._default_client = None
+        try:
+            yield service
+        finally:
+            service.base_url, service.pool, service._default_client = saved
+
+    def collection(self, name):
+        """Records of a collection, seeded on first access"""
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = {
+                    record['id']: record
+                    for record in (make_record(name, i) for i in range(self.records_per_collection))
+                }
+            return self._collections[name]
+
+    def expand(self, record, expand):
+        """Attach expanded relations the way PocketBase does"""
+        if not expand:
+            return record
+        record = dict(record)
+        record['expand'] = {}
+        for field in expand.split(','):
+            field = field.strip()
+            target = RELATIONS.get(field)
+            if not target or not record.get(field):
+                continue
+            related = self.collection(target)
+            record['expand'][field] = related.get(record[field]) or make_record(target, 0)
+        return record
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload=None):
+                body = json.dumps(payload).encode() if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _body(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                return json.loads(self.rfile.read(length) or b'{}') if length else {}
+
+            def _dispatch(self, method):
+                stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                url = urlparse(self.path)
+                query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+                parts = [unquote(part) for part in url.path.strip('/').split('/')]
+
+                # /api/collections/<name>/auth-refresh | auth-with-password
+                if len(parts) == 4 and parts[3] in ('auth-refresh', 'auth-with-password') and method == 'POST':
+                    self._body()
+                    # A refresh answers as the token's user; anything else as the first user
+                    token = (self.headers.get('Authorization') or '').replace('Bearer ', '')
+                    users = stub.collection('users')
+                    user = users.get(token_user_id(token)) or next(iter(users.values()))
+                    return self._reply(200, {'token': make_token(user['id']), 'record': user})
+
+                if len(parts) < 4 or parts[:2] != ['api', 'collections'] or parts[3] != 'records':
+                    return self._reply(404, {'code': 404, 'message': 'Not found.', 'data': {}})
+
+                records = stub.collection(parts[2])
+                record_id = parts[4] if len(parts) > 4 else None
+
+                if method == 'GET' and record_id is None:
+                    page = max(1, int(query.get('page', 1)))
+                    per_page = max(1, int(query.get('perPage', 30)))
+                    try:
+                        predicate = _parse_filter(query.get('filter', ''))
+                    except (ValueError, IndexError):
+                        return self._reply(400, {'code': 400, 'message': 'Invalid filter.', 'data': {}})
+                    items = _sort_records([item for item in list(records.values()) if predicate(item)], query.get('sort', ''))
+                    start = (page - 1) * per_page
+                    skip_total = query.get('skipTotal') in ('1', 'true')
+                    return self._reply(200, {
+                        'page': page,
+                        'perPage': per_page,
+                        'totalItems': -1 if skip_total else len(items),
+                        'totalPages': -1 if skip_total else (len(items) + per_page - 1) // per_page,
+                        'items': [
+                            _pick_fields(stub.expand(item, query.get('expand')), query.get('fields'))
+                            for item in items[start:start + per_page]
+                        ]
+                    })
+                if method == 'POST' and record_id is None:
+                    record = dict(make_record(parts[2], len(records)), **self._body())
+                    record['id'] = uuid.uuid4().hex[:15]
+                    records[record['id']] = record
+                    return self._reply(200, record)
+                if record_id not in records:
+                    return self._reply(404, {'code': 404, 'message': "The requested resource wasn't found.", 'data': {}})
+                if method == 'GET':
+                    return self._reply(200, _pick_fields(stub.expand(records[record_id], query.get('expand')), query.get('fields')))
+                if method == 'PATCH':
+                    record = records[record_id]
+                    for key, value in self._body().items():
+                        # PocketBase number modifiers: {"field+": n} adds, {"field-": n} subtracts
+                        if key.endswith(('+', '-')):
+                            sign = 1 if key[-1] == '+' else -1
+                            record[key[:-1]] = (record.get(key[:-1]) or 0) + sign * value
+                        else:
+                            record[key] = value
+                    return self._reply(200, records[record_id])
+                if method == 'DELETE':
+                    del records[record_id]
+                    return self._reply(204)
+                return self._reply(405, {'code': 405, 'message': 'Method not allowed.', 'data': {}})
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def do_PATCH(self):
+                self._dispatch('PATCH')
+
+            def do_DELETE(self):
+                self._dispatch('DELETE')
+
+        return Handler
+
+
+if __name__ == "__main__":
+    with PocketBaseStub(latency=0.01) as stub:
+        print(f"🔄 PocketBase stub listening on {stub.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
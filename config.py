@@ -8,6 +8,93 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     POCKETBASE_URL = os.getenv('PROD_POCKETBASE_URL', 'http://localhost:8090')
 
+    # Verified-token cache (see services/token_cache.py)
+    TOKEN_CACHE_MAX_SIZE = int(os.getenv('TOKEN_CACHE_MAX_SIZE', '1024'))
+    TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', '300'))
+
+    # PocketBase client pool (see services/pocketbase_pool.py)
+    POCKETBASE_POOL_SIZE = int(os.getenv('POCKETBASE_POOL_SIZE', '10'))
+    POCKETBASE_POOL_TIMEOUT = float(os.getenv('POCKETBASE_POOL_TIMEOUT', '5'))
+    POCKETBASE_POOL_STATS = os.getenv('POCKETBASE_POOL_STATS', 'true').lower() == 'true'
+    POCKETBASE_REQUEST_TIMEOUT = float(os.getenv('POCKETBASE_REQUEST_TIMEOUT', '10'))
+
+    # Single-flight reads and circuit breaker (see services/single_flight.py, services/circuit_breaker.py)
+    # Reads of the shared collections are coalesced across users: their API rules must not depend on the caller
+    # (study_rooms and discussions are left out by default, as rules such as isPublic may; expanded reads,
+    # such as the leaderboard's users, are never shared across users)
+    SINGLE_FLIGHT_ENABLED = os.getenv('SINGLE_FLIGHT_ENABLED', 'true').lower() == 'true'
+    SINGLE_FLIGHT_SHARED_COLLECTIONS = [
+        name.strip() for name in os.getenv(
+            'SINGLE_FLIGHT_SHARED_COLLECTIONS', 'achievements'
+        ).split(',') if name.strip()
+    ]
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', '5'))
+    CIRCUIT_BREAKER_RESET_TIMEOUT = float(os.getenv('CIRCUIT_BREAKER_RESET_TIMEOUT', '30'))
+
+    # Write-behind heartbeat aggregation (see services/heartbeat_aggregator.py)
+    HEARTBEAT_FLUSH_INTERVAL = float(os.getenv('HEARTBEAT_FLUSH_INTERVAL', '10'))
+    HEARTBEAT_IDLE_TIMEOUT = float(os.getenv('HEARTBEAT_IDLE_TIMEOUT', '300'))
+
+    # Records fetched per PocketBase request while streaming a session history export
+    EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '500'))
+
+    # In-memory room presence (see services/room_presence.py)
+    ROOM_PRESENCE_TTL = float(os.getenv('ROOM_PRESENCE_TTL', '60'))
+    ROOM_PRESENCE_FLUSH_INTERVAL = float(os.getenv('ROOM_PRESENCE_FLUSH_INTERVAL', '15'))
+    ROOM_PRESENCE_IDLE_TIMEOUT = float(os.getenv('ROOM_PRESENCE_IDLE_TIMEOUT', '300'))
+
+    # Server-Sent Events (see services/event_stream.py)
+    SSE_POLL_INTERVAL = float(os.getenv('SSE_POLL_INTERVAL', '2'))
+    SSE_KEEPALIVE = float(os.getenv('SSE_KEEPALIVE', '15'))
+    SSE_MAX_CONNECTIONS = int(os.getenv('SSE_MAX_CONNECTIONS', '500'))
+    SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '100'))
+    SSE_LEADERBOARD_SIZE = int(os.getenv('SSE_LEADERBOARD_SIZE', '50'))
+
+    # Statistics rollups (see services/statistics_rollups.py): seconds before a user's totals are
+    # re-read from PocketBase (picks up sessions ended on other workers), and users kept in memory
+    STATISTICS_ROLLUP_TTL = float(os.getenv('STATISTICS_ROLLUP_TTL', '60'))
+    STATISTICS_ROLLUP_MAX_USERS = int(os.getenv('STATISTICS_ROLLUP_MAX_USERS', '10000'))
+
+    # In-process leaderboard index (see services/leaderboard_index.py)
+    LEADERBOARD_MAX_AGE = float(os.getenv('LEADERBOARD_MAX_AGE', '900'))
+    LEADERBOARD_PRELOAD = os.getenv('LEADERBOARD_PRELOAD', 'false').lower() == 'true'
+
+    # ETag response cache for read-heavy GET routes (see utils/response_cache.py)
+    # Writes only invalidate the local process, so the TTL bounds staleness across workers
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+    RESPONSE_CACHE_TTL = float(os.getenv('RESPONSE_CACHE_TTL', '60'))
+    RESPONSE_CACHE_MAX_BODY_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BODY_BYTES', str(1024 * 1024)))
+
+    # Register each route blueprint on the first request under its prefix (faster serverless cold starts)
+    # On by default on Vercel, which sets VERCEL=1
+    LAZY_BLUEPRINTS = os.getenv('LAZY_BLUEPRINTS', 'true' if os.getenv('VERCEL') else 'false').lower() == 'true'
+
+    # Serialize JSON responses with orjson when it is installed (standard library encoder otherwise)
+    JSON_FAST_ENCODER = os.getenv('JSON_FAST_ENCODER', 'true').lower() == 'true'
+
+    # gzip/brotli response compression negotiated by Accept-Encoding (brotli needs the brotli package)
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+
+    # Request and PocketBase call metrics served at /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+    # Shared user profiles used to resolve author/host/user relations
+    USER_PROFILE_CACHE_MAX_SIZE = int(os.getenv('USER_PROFILE_CACHE_MAX_SIZE', '5000'))
+    USER_PROFILE_CACHE_TTL = float(os.getenv('USER_PROFILE_CACHE_TTL', '300'))
+
+    # active_duration units in one hour (heartbeats are counted per minute)
+    ACTIVE_DURATION_UNITS_PER_HOUR = float(os.getenv('ACTIVE_DURATION_UNITS_PER_HOUR', '60'))
+    # Per-user study totals kept for achievement unlocking
+    ACHIEVEMENT_USER_TTL = float(os.getenv('ACHIEVEMENT_USER_TTL', '600'))
+    ACHIEVEMENT_MAX_USERS = int(os.getenv('ACHIEVEMENT_MAX_USERS', '10000'))
+
+    # /api/batch limits
+    BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '10'))
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '8'))
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
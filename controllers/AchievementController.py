@@ -1,5 +1,6 @@
 from typing import Any, Dict, List, Optional
 from .BaseController import BaseController
+from services.field_selection import FieldSelection
 from services.pocketbase_service import PocketBaseService
 
 class AchievementController(BaseController):
@@ -8,13 +9,14 @@ class AchievementController(BaseController):
     def __init__(self, pb_service: PocketBaseService):
         super().__init__(pb_service, "achievements")
     
-    def get_all_achievements(self) -> List[Dict[str, Any]]:
+    def get_all_achievements(self, fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
         """Get all available achievements"""
-        return self.get_all("", "title")
+        return self.get_all("", "title", fields=fields)
     
-    def get_user_achievements(self, user_id: str) -> List[Dict[str, Any]]:
+    def get_user_achievements(self, user_id: str, expand: Optional[str] = "achievement",
+                              fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
         """Get achievements for a user"""
-        return self.get_all(filter_query=f"user = '{user_id}'", sort="-unlockedAt", expand="achievement")
+        return self.get_all(filter_query=f"user = '{user_id}'", sort="-unlockedAt", expand=expand, fields=fields)
     
     def unlock_achievement(self, user_id: str, achievement_id: str) -> Optional[Dict[str, Any]]:
         """Unlock an achievement for a user"""
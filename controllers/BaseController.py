@@ -1,29 +1,112 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+from services.field_selection import FieldSelection
 from services.pocketbase_service import PocketBaseService
+from services.user_profile_cache import UserProfileCache, user_profile_cache
 
 class BaseController(ABC):
     """Base controller class"""
     
-    def __init__(self, pb_service: PocketBaseService, collection_name: str):
+    # Relation fields pointing at users; expanding them is served from the user-profile cache
+    user_relations: Sequence[str] = ()
+    
+    def __init__(self, pb_service: PocketBaseService, collection_name: str,
+                 profiles: Optional[UserProfileCache] = None):
         self.pb_service = pb_service
         self.collection_name = collection_name
+        self.profiles = profiles or user_profile_cache
+    
+    def _split_expand(self, expand: Optional[str]) -> Tuple[Optional[str], List[str]]:
+        """Separate user relations (resolved locally) from the expands PocketBase still performs"""
+        if not expand or not self.user_relations:
+            return expand, []
+        fields = [field.strip() for field in expand.split(',') if field.strip()]
+        local = [field for field in fields if field in self.user_relations]
+        remote = [field for field in fields if field not in self.user_relations]
+        return ','.join(remote) or None, local
+    
+    def _upstream_fields(self, fields: Optional[FieldSelection], user_fields: List[str]) -> Optional[str]:
+        """PocketBase field selection; relations expanded locally need their ids fetched"""
+        return fields.upstream(*user_fields) if fields is not None else None
     
     def create(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Create a new record"""
         return self.pb_service.create_record(self.collection_name, data)
     
-    def get_by_id(self, record_id: str, expand: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    def get_by_id(self, record_id: str, expand: Optional[str] = None,
+                  fields: Optional[FieldSelection] = None) -> Optional[Dict[str, Any]]:
         """Get record by ID"""
-        return self.pb_service.get_record(self.collection_name, record_id, expand)
+        expand, user_fields = self._split_expand(expand)
+        record = self.pb_service.get_record(self.collection_name, record_id, expand,
+                                            self._upstream_fields(fields, user_fields))
+        if record and user_fields:
+            self.profiles.expand(self.pb_service, [record], user_fields)
+        if record and fields is not None:
+            record = fields.project(record)
+        return record
     
     def get_all(self, filter_query: str = "", sort: str = "", 
-               page: int = 1, per_page: int = 30, expand: Optional[str] = None) -> List[Dict[str, Any]]:
+               page: int = 1, per_page: int = 30, expand: Optional[str] = None,
+               fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
         """Get all records with optional filtering"""
-        result = self.pb_service.list_records(self.collection_name, page, per_page, filter_query, sort, expand)
+        expand, user_fields = self._split_expand(expand)
+        result = self.pb_service.list_records(self.collection_name, page, per_page, filter_query, sort, expand,
+                                              self._upstream_fields(fields, user_fields))
         
         # Extract just the items from the paginated result
-        return result.get('items', []) if isinstance(result, dict) else result
+        items = result.get('items', []) if isinstance(result, dict) else result
+        if user_fields:
+            self.profiles.expand(self.pb_service, items, user_fields)
+        if fields is not None:
+            items = [fields.project(item) for item in items]
+        return items
+    
+    def iter_all(self, filter_query: str = "", sort: str = "", per_page: int = 200,
+                 expand: Optional[str] = None, fields: Optional[FieldSelection] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over every matching record, fetching pages lazily (unlike get_all, which returns one page)"""
+        expand, user_fields = self._split_expand(expand)
+        records = self.pb_service.iter_records(self.collection_name, per_page, filter_query, sort, expand,
+                                               self._upstream_fields(fields, user_fields))
+        if user_fields:
+            records = self.profiles.expand_iter(self.pb_service, records, user_fields, per_page)
+        if fields is not None:
+            records = fields.project_all(records)
+        return records
+    
+    def get_page_after(self, sort_field: str, limit: int = 30, after: Optional[Tuple[str, str]] = None,
+                       filter_query: str = "", expand: Optional[str] = None,
+                       fields: Optional[FieldSelection] = None) -> Dict[str, Any]:
+        """Keyset page, newest first, continuing after the (sort value, id) of the previous page's last record"""
+        expand, user_fields = self._split_expand(expand)
+        page = self.pb_service.list_records_after(self.collection_name, sort_field, limit, after, filter_query, expand,
+                                                  self._upstream_fields(fields, user_fields))
+        if user_fields:
+            self.profiles.expand(self.pb_service, page['items'], user_fields)
+        if fields is not None:
+            page = dict(page, items=[fields.project(item) for item in page['items']])
+        return page
+    
+    def iter_after(self, sort_field: str, filter_query: str = "", per_page: int = 200,
+                   expand: Optional[str] = None, fields: Optional[FieldSelection] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over every matching record, newest first, one keyset page at a time
+        Unlike iter_all's offset pages, every page is an indexed range query, so walking
+        hundreds of thousands of records does not slow down as it goes deeper. The pooled
+        client goes back to the pool between pages, however slowly the caller consumes them
+        """
+        after = None
+        while True:
+            page = self.get_page_after(sort_field, per_page, after, filter_query, expand, fields)
+            self.pb_service.suspend_client()
+            yield from page['items']
+            after = page['last']
+            if after is None:
+                return
+    
+    def count(self, filter_query: str = "") -> int:
+        """Number of matching records (a separate count query, so only run when asked for)"""
+        result = self.pb_service.list_records(self.collection_name, 1, 1, filter_query)
+        return result.get('total_items', 0)
     
     def update(self, record_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update a record"""
@@ -1,28 +1,91 @@
-from typing import Any, Dict, List
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 from .BaseController import BaseController
+from services.field_selection import FieldSelection
 from services.pocketbase_service import PocketBaseService
 
 class DiscussionController(BaseController):
     """Discussion controller"""
     
+    user_relations = ('author',)
+    
     def __init__(self, pb_service: PocketBaseService):
         super().__init__(pb_service, "discussions")
     
-    def get_all_discussions(self) -> List[Dict[str, Any]]:
+    def get_all_discussions(self, expand: Optional[str] = "author",
+                            fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
         """Get all discussions"""
-        return self.get_all("", "-created", expand="author")
+        return self.get_all("", "-created", expand=expand, fields=fields)
+    
+    def iter_all_discussions(self, expand: Optional[str] = "author",
+                             fields: Optional[FieldSelection] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over every discussion, across all pages"""
+        return self.iter_all("", "-created", expand=expand, fields=fields)
     
-    def get_user_discussions(self, user_id: str) -> List[Dict[str, Any]]:
+    def get_user_discussions(self, user_id: str, expand: Optional[str] = None,
+                             fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
         """Get discussions by a user"""
-        return self.get_all(f"author = '{user_id}'", "-created")
+        return self.get_all(f"author = '{user_id}'", "-created", expand=expand, fields=fields)
+    
+    def record_reply_activity(self, discussion_id: str, reply_count: int) -> Dict[str, Any]:
+        """Store the denormalized reply count and bump the discussion's last activity time"""
+        return self.update(discussion_id, {
+            'replyCount': reply_count,
+            'lastActivityAt': datetime.now(timezone.utc).isoformat()
+        })
 
 class DiscussionReplyController(BaseController):
     """Discussion reply controller"""
     
+    user_relations = ('author',)
+    
     def __init__(self, pb_service: PocketBaseService):
         super().__init__(pb_service, "discussion_replies")
     
-    def get_discussion_replies(self, discussion_id: str) -> List[Dict[str, Any]]:
-        """Get replies for a discussion"""
-        return self.get_all(f"discussion = '{discussion_id}'", "created", expand="author")
+    def get_discussion_replies(self, discussion_id: str, page: int = 1, per_page: int = 30,
+                               expand: Optional[str] = "author",
+                               fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
+        """Get a page of replies for a discussion, oldest first"""
+        return self.get_all(f"discussion = '{discussion_id}'", "created", page, per_page, expand=expand, fields=fields)
+    
+    def count_replies(self, discussion_id: str) -> int:
+        """Number of replies to a discussion"""
+        return self.count(f"discussion = '{discussion_id}'")
+    
+    def embed_replies(self, discussions: Iterable[Dict[str, Any]], count: int,
+                      batch_size: int = 50) -> Iterator[Dict[str, Any]]:
+        """
+        Attach the first `count` replies to each discussion as `replies`
+        Replies for each batch of discussions come from one query of at most `count` rows per
+        discussion instead of one query per discussion, and batches are processed lazily so
+        streamed listings stay streamed. When that page comes back full, busy discussions may
+        have crowded out quieter ones: those are queried again together, and since a full page
+        always fills at least one discussion, this ends (usually after one more query)
+        """
+        discussions = iter(discussions)
+        while True:
+            batch = list(islice(discussions, batch_size))
+            if not batch:
+                return
+            replies: Dict[str, List[Dict[str, Any]]] = {discussion['id']: [] for discussion in batch}
+            short = list(replies)
+            while short:
+                filter_query = ' || '.join(f"discussion = '{discussion_id}'" for discussion_id in short)
+                limit = count * len(short)
+                page = self.get_all(filter_query, "created", 1, limit, expand="author")
+                wanted = set(short)
+                for discussion_id in short:
+                    replies[discussion_id] = []
+                for reply in page:
+                    discussion_id = reply.get('discussion')
+                    if discussion_id in wanted and len(replies[discussion_id]) < count:
+                        replies[discussion_id].append(reply)
+                # A short page holds every reply of these discussions
+                if len(page) < limit:
+                    break
+                short = [discussion_id for discussion_id in short if len(replies[discussion_id]) < count]
+            for discussion in batch:
+                discussion['replies'] = replies[discussion['id']]
+                yield discussion
 
@@ -1,13 +1,32 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from .BaseController import BaseController
 from services.pocketbase_service import PocketBaseService
+from services.leaderboard_index import LeaderboardIndex
 
 class LeaderboardController(BaseController):
     """Leaderboard controller"""
     
-    def __init__(self, pb_service: PocketBaseService):
+    def __init__(self, pb_service: PocketBaseService, index: Optional[LeaderboardIndex] = None):
         super().__init__(pb_service, "leaderboard")
+        self.index = index
     
     def get_leaderboard(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get leaderboard top users"""
-        return self.get_all(filter_query="", sort="-total_day", per_page=limit, expand="user")
\ No newline at end of file
+        if self.index is not None:
+            self.index.ensure_fresh()
+            return self.index.top(limit)
+        return self.get_all(filter_query="", sort="-total_day", per_page=limit, expand="user")
+    
+    def get_user_rank(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a user's leaderboard entry with its 1-based rank"""
+        if self.index is None:
+            return None
+        self.index.ensure_fresh()
+        return self.index.rank_of(user_id)
+    
+    def get_neighbours(self, user_id: str, radius: int = 5) -> List[Dict[str, Any]]:
+        """Get the entries ranked just above and below a user"""
+        if self.index is None:
+            return []
+        self.index.ensure_fresh()
+        return self.index.around(user_id, radius)
\ No newline at end of file
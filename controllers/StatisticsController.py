@@ -1,14 +1,16 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from .BaseController import BaseController
 from services.pocketbase_service import PocketBaseService
+from services.statistics_rollups import StudyStatisticsRollups
 
 
 
 class StatisticsController(BaseController):
 	"""Statistics controller"""
 
-	def __init__(self, pb_service: PocketBaseService):
+	def __init__(self, pb_service: PocketBaseService, rollups: Optional[StudyStatisticsRollups] = None):
 		super().__init__(pb_service, "statistics")
+		self.rollups = rollups
 	
 	def get_user_total_study_time(self, user_id: str) -> List[Dict[str, Any]]:
 		"""Get user rank based on total study time"""
@@ -19,4 +21,16 @@ class StatisticsController(BaseController):
 		"""Get today's statistics"""
 		# Example implementation, adjust the query as needed
 		result = self.get_all(f"", "")
-		return result
\ No newline at end of file
+		return result
+	
+	def get_user_statistics(self, user_id: str) -> Dict[str, Any]:
+		"""Get a user's study time today, this week and this month from the pre-aggregated rollups"""
+		if self.rollups is None:
+			raise Exception("Statistics rollups are not configured")
+		return self.rollups.summary(user_id)
+	
+	def rebuild_statistics(self, user_id: Optional[str] = None) -> int:
+		"""Recompute rollups from study sessions; returns the number of users rebuilt"""
+		if self.rollups is None:
+			raise Exception("Statistics rollups are not configured")
+		return self.rollups.rebuild(user_id)
\ No newline at end of file
@@ -1,18 +1,28 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional
 from .BaseController import BaseController
+from services.field_selection import FieldSelection
 from services.pocketbase_service import PocketBaseService
 
 class StudyRoomController(BaseController):
     """Study room controller"""
     
+    user_relations = ('host',)
+    
     def __init__(self, pb_service: PocketBaseService):
         super().__init__(pb_service, "study_rooms")
     
-    def get_public_rooms(self) -> List[Dict[str, Any]]:
+    def get_public_rooms(self, expand: Optional[str] = "host",
+                         fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
         """Get all public study rooms"""
-        return self.get_all("isPublic = true", "-created", expand="host")
+        return self.get_all("isPublic = true", "-created", expand=expand, fields=fields)
+    
+    def iter_public_rooms(self, expand: Optional[str] = "host",
+                          fields: Optional[FieldSelection] = None) -> Iterator[Dict[str, Any]]:
+        """Iterate over every public study room, across all pages"""
+        return self.iter_all("isPublic = true", "-created", expand=expand, fields=fields)
     
-    def get_user_rooms(self, user_id: str) -> List[Dict[str, Any]]:
+    def get_user_rooms(self, user_id: str, expand: Optional[str] = None,
+                       fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
         """Get rooms hosted by a user"""
-        return self.get_all(f"host = '{user_id}'", "-created")
+        return self.get_all(f"host = '{user_id}'", "-created", expand=expand, fields=fields)
 
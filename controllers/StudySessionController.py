@@ -1,20 +1,45 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 from .BaseController import BaseController
+from services.field_selection import FieldSelection
 from services.pocketbase_service import PocketBaseService
 
 class StudySessionController(BaseController):
 	"""Study session controller"""
 	
+	user_relations = ('user',)
+	
 	def __init__(self, pb_service: PocketBaseService):
 		super().__init__(pb_service, "study_sessions")
 	
-	def get_user_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+	def get_user_sessions(self, user_id: str, expand: Optional[str] = "room",
+						  fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
 		"""Get all sessions for a user"""
-		return self.get_all(f"user = '{user_id}'", "-startedAt", expand="room")
+		return self.get_all(f"user = '{user_id}'", "-startedAt", expand=expand, fields=fields)
+	
+	def iter_user_sessions(self, user_id: str, expand: Optional[str] = "room",
+						   fields: Optional[FieldSelection] = None) -> Iterator[Dict[str, Any]]:
+		"""Iterate over every session of a user, across all pages"""
+		return self.iter_all(f"user = '{user_id}'", "-startedAt", expand=expand, fields=fields)
+	
+	def iter_user_sessions_between(self, user_id: str, started_from: Optional[str] = None,
+								   started_before: Optional[str] = None, per_page: int = 500,
+								   expand: Optional[str] = "room",
+								   fields: Optional[FieldSelection] = None) -> Iterator[Dict[str, Any]]:
+		"""
+		Iterate over a user's sessions, newest first, optionally bounded by start time
+		(PocketBase datetimes, `started_from` inclusive, `started_before` exclusive)
+		"""
+		conditions = [f"user = '{user_id}'"]
+		if started_from:
+			conditions.append(f"startedAt >= '{started_from}'")
+		if started_before:
+			conditions.append(f"startedAt < '{started_before}'")
+		return self.iter_after('startedAt', ' && '.join(conditions), per_page, expand, fields)
 	
-	def get_active_sessions(self, user_id: str) -> List[Dict[str, Any]]:
+	def get_active_sessions(self, user_id: str, expand: Optional[str] = None,
+							fields: Optional[FieldSelection] = None) -> List[Dict[str, Any]]:
 		"""Get active sessions for a user"""
-		return self.get_all(f"user = '{user_id}' && active = true", "-startedAt")
+		return self.get_all(f"user = '{user_id}' && active = true", "-startedAt", expand=expand, fields=fields)
 
 	
 	def start_study_session(self, user_id: str, room_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
@@ -29,6 +54,10 @@ class StudySessionController(BaseController):
 		}
 		return self.create(data)
 	
-	def end_session(self, session_id: str) -> Optional[Dict[str, Any]]:
-		"""End a study session"""
-		return self.update(session_id, {"active": False, "endedAt": None})
+	def end_session(self, session_id: str, add_duration: Optional[int] = None) -> Optional[Dict[str, Any]]:
+		"""End a study session, optionally adding unflushed active seconds in the same update"""
+		data: Dict[str, Any] = {"active": False, "endedAt": None}
+		if add_duration:
+			# An increment, so seconds flushed meanwhile by other workers are kept
+			data["active_duration+"] = add_duration
+		return self.update(session_id, data)
@@ -1,30 +1,52 @@
 from .BaseController import BaseController
 from services.pocketbase_service import PocketBaseService
+from schemas import UserSchema
 from typing import Any, Dict, Optional
 
+# Shared across requests; dump() keeps no per-call state
+user_schema = UserSchema()
+
 class UserController(BaseController):
 	"""User controller"""
 	
 	def __init__(self, pb_service: PocketBaseService):
 		super().__init__(pb_service, "users")
 	
+	def update(self, record_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+		"""Update a user and drop their cached profile"""
+		user = super().update(record_id, data)
+		self.profiles.invalidate(record_id)
+		return user
+	
+	def delete(self, record_id: str) -> bool:
+		"""Delete a user and drop their cached profile"""
+		success = super().delete(record_id)
+		self.profiles.invalidate(record_id)
+		return success
+	
 	def authenticate_user(self, email: str, password: str) -> Optional[Dict[str, Any]]:
 		"""Authenticate user"""
 		return self.pb_service.authenticate(email, password)
 	
-	def get_user_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
-		"""Get user profile with avatar and apply schema"""
-
-		from schemas import UserSchema
+	def get_user_profile(self, user_id: str, viewer_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+		"""
+		Get user profile with avatar and apply schema
+		Other users' profiles come from the shared profile cache; your own is always read
+		fresh (it carries your email) and refreshes the cached copy
+		"""
 
-		data = self.get_by_id(user_id, "avatar")
+		if viewer_id is not None and viewer_id != user_id:
+			data = self.profiles.get(self.pb_service, user_id)
+		else:
+			data = self.get_by_id(user_id, "avatar")
+			if data:
+				self.profiles.put(data)
 		if not data:
 			return None
 
-		# Create schema instance and dump the data
+		# Dump the data through the shared schema
 		try:
-			schema = UserSchema()
-			result = schema.dump(data)
+			result = user_schema.dump(data)
    
 			# Ensure we return a Dict[str, Any]
 			return result if isinstance(result, dict) else data
@@ -1,22 +1,27 @@
 # Re-export controller classes for package-level imports
-from .AchievementController import AchievementController
-from .LeaderboardController import LeaderboardController
-from .StudySessionController import StudySessionController
-from .StudyRoomController import StudyRoomController
-from .UserController import UserController
-from .DiscussionController import DiscussionController, DiscussionReplyController
-from .StatisticsController import StatisticsController
-from .BaseController import BaseController
+# Each controller module is imported on first access, so importing one does not load them all
+from importlib import import_module
 
-__all__ = [
-	"BaseController",
-	"AchievementController",
-	"LeaderboardController",
-	"StudySessionController",
-	"StudyRoomController",
-	"UserController",
-	"DiscussionController",
-	"DiscussionReplyController",
-	"StatisticsController"
- 
-]
\ No newline at end of file
+_MODULES = {
+	"BaseController": ".BaseController",
+	"AchievementController": ".AchievementController",
+	"LeaderboardController": ".LeaderboardController",
+	"StudySessionController": ".StudySessionController",
+	"StudyRoomController": ".StudyRoomController",
+	"UserController": ".UserController",
+	"DiscussionController": ".DiscussionController",
+	"DiscussionReplyController": ".DiscussionController",
+	"StatisticsController": ".StatisticsController"
+}
+
+__all__ = list(_MODULES)
+
+def __getattr__(name):
+	if name not in _MODULES:
+		raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+	value = getattr(import_module(_MODULES[name], __name__), name)
+	globals()[name] = value
+	return value
+
+def __dir__():
+	return sorted(set(globals()) | set(__all__))
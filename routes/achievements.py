@@ -1,9 +1,13 @@
 from flask import Blueprint, request, jsonify
 from controllers import AchievementController
 from services.pocketbase_service import pocketbase_service
+from services.achievement_evaluator import achievement_evaluator
 from schemas import AchievementSchema
 from marshmallow import ValidationError
 from utils.auth import require_auth
+from utils.errors import error_response
+from utils.projection import requested_expand, requested_fields
+from utils.response_cache import response_cache
 from typing import Dict, Any, cast
 
 # Use the global service instance
@@ -11,42 +15,44 @@ achievement_controller = AchievementController(pocketbase_service)
 achievement_schema = AchievementSchema()
 
 achievements_bp = Blueprint('achievements', __name__, url_prefix='/api/achievements')
+response_cache.invalidate_on_write(achievements_bp)
 
 @achievements_bp.route('/', methods=['GET'])
 @require_auth
+@response_cache.cached(shared=True)
 def get_achievements():
     """Get all achievements"""
     try:
-        achievements = achievement_controller.get_all_achievements()
+        achievements = achievement_controller.get_all_achievements(requested_fields())
         return jsonify(achievements), 200
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @achievements_bp.route('/<achievement_id>', methods=['GET'])
 @require_auth
 def get_achievement(achievement_id):
     """Get achievement by ID"""
     try:
-        achievement = achievement_controller.get_by_id(achievement_id)
+        achievement = achievement_controller.get_by_id(achievement_id, requested_expand(), requested_fields())
         if achievement:
             return jsonify(achievement), 200
         else:
             return jsonify({'error': 'Achievement not found'}), 404
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @achievements_bp.route('/user/<user_id>', methods=['GET'])
 @require_auth
 def get_user_achievements(user_id):
     """Get achievements for a specific user"""
     try:
-        achievements = achievement_controller.get_user_achievements(user_id)
+        achievements = achievement_controller.get_user_achievements(user_id, requested_expand("achievement"), requested_fields())
         return jsonify(achievements), 200
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
     
 @achievements_bp.route('/unlock', methods=['POST'])
 @require_auth
@@ -68,7 +74,7 @@ def unlock_achievement():
     except ValidationError as e:
         return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @achievements_bp.route('/', methods=['POST'])
 @require_auth
@@ -84,6 +90,7 @@ def create_achievement():
         
         achievement = achievement_controller.create(validated_data)
         if achievement:
+            achievement_evaluator.invalidate_catalog()
             return jsonify(achievement), 201
         else:
             return jsonify({'error': 'Failed to create achievement'}), 500
@@ -91,7 +98,7 @@ def create_achievement():
     except ValidationError as e:
         return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @achievements_bp.route('/<achievement_id>', methods=['PUT'])
 @require_auth
@@ -107,6 +114,7 @@ def update_achievement(achievement_id):
         
         achievement = achievement_controller.update(achievement_id, validated_data)
         if achievement:
+            achievement_evaluator.invalidate_catalog()
             return jsonify(achievement), 200
         else:
             return jsonify({'error': 'Failed to update achievement'}), 500
@@ -114,7 +122,7 @@ def update_achievement(achievement_id):
     except ValidationError as e:
         return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
 
 @achievements_bp.route('/<achievement_id>', methods=['DELETE'])
 @require_auth
@@ -123,9 +131,10 @@ def delete_achievement(achievement_id):
     try:
         success = achievement_controller.delete(achievement_id)
         if success:
+            achievement_evaluator.invalidate_catalog()
             return jsonify({'message': 'Achievement deleted successfully'}), 200
         else:
             return jsonify({'error': 'Failed to delete achievement'}), 500
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
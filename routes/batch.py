@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+from flask import Blueprint, Flask, request, jsonify, current_app
+from werkzeug.test import EnvironBuilder
+from services.pocketbase_service import pocketbase_service
+from utils.auth import require_auth
+from utils.errors import error_response
+from config import Config
+
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/batch')
+
+ALLOWED_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE')
+# Prefixes a sub-request may not target: nested batches, event streams that never end,
+# and exports too large to buffer into a batch response
+DISALLOWED_PREFIXES = ('/api/batch', '/api/events', '/api/study_sessions/export')
+
+def execute_sub_request(app: Flask, sub_request: Dict[str, Any], authorization: str) -> Dict[str, Any]:
+	"""Dispatch one sub-request through the app in its own request context"""
+	# Sub-responses are decoded into the batch body, so they must not be compressed
+	headers = {name: value for name, value in (sub_request.get('headers') or {}).items() if name.lower() != 'accept-encoding'}
+	headers['Authorization'] = authorization
+	builder = EnvironBuilder(
+		path=sub_request['path'],
+		method=sub_request.get('method', 'GET').upper(),
+		headers=headers,
+		json=sub_request.get('body')
+	)
+	try:
+		with app.request_context(builder.get_environ()):
+			response = app.full_dispatch_request()
+			# Read the body inside the context so streamed responses can still reach PocketBase
+			body = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+			status = response.status_code
+	finally:
+		builder.close()
+
+	return {
+		'id': sub_request.get('id'),
+		'status': status,
+		'body': body
+	}
+
+@batch_bp.route('/', methods=['POST'], strict_slashes=False)
+@require_auth
+def run_batch():
+	"""Run several API requests concurrently and return all results in one response"""
+	try:
+		data = request.get_json(silent=True)
+		if not data or not isinstance(data.get('requests'), list):
+			return jsonify({'error': 'A list of requests is required'}), 400
+
+		sub_requests = data['requests']
+		if not sub_requests:
+			return jsonify({'error': 'No requests provided'}), 400
+		if len(sub_requests) > Config.BATCH_MAX_REQUESTS:
+			return jsonify({'error': f'A batch may contain at most {Config.BATCH_MAX_REQUESTS} requests'}), 400
+
+		for sub_request in sub_requests:
+			path = sub_request.get('path') if isinstance(sub_request, dict) else None
+			if not isinstance(path, str) or not path.startswith('/api/') or path.startswith(DISALLOWED_PREFIXES):
+				return jsonify({'error': 'Each request needs a path under /api/ (batches and event streams cannot be nested)'}), 400
+			if str(sub_request.get('method', 'GET')).upper() not in ALLOWED_METHODS:
+				return jsonify({'error': f"Unsupported method: {sub_request.get('method')}"}), 400
+
+		# The token was verified once above; sub-requests re-use it from the token cache.
+		# Hand our pooled client back so the sub-requests can check clients out.
+		pocketbase_service.release_client()
+
+		app = current_app._get_current_object()
+		authorization = request.headers['Authorization']
+		workers = min(len(sub_requests), Config.BATCH_MAX_CONCURRENCY)
+		with ThreadPoolExecutor(max_workers=workers) as executor:
+			responses = list(executor.map(
+				lambda sub_request: execute_sub_request(app, sub_request, authorization),
+				sub_requests
+			))
+
+		return jsonify({'responses': responses}), 200
+
+	except Exception as e:
+		return error_response(e)
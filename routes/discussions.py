@@ -1,52 +1,93 @@
+import logging
+import re
+
 from flask import Blueprint, request, jsonify
 from controllers import DiscussionController, DiscussionReplyController
 from schemas import DiscussionSchema, DiscussionReplySchema
 from services.pocketbase_service import pocketbase_service
 from marshmallow import ValidationError
 from utils.auth import require_auth
+from utils.errors import error_response
+from utils.streaming import stream_json_array
+from utils.pagination import keyset_page, wants_keyset_page
+from utils.projection import requested_expand, requested_fields
+from utils.response_cache import response_cache
 
 # Schemas
 discussion_schema = DiscussionSchema()
 discussion_reply_schema = DiscussionReplySchema()
 
+logger = logging.getLogger(__name__)
+
 # Controllers
 discussion_controller = DiscussionController(pocketbase_service)
 discussion_reply_controller = DiscussionReplyController(pocketbase_service)
 
+# Upper bound for ?replies=N on discussion listings
+MAX_EMBEDDED_REPLIES = 10
+
+# Ids end up inside a PocketBase filter
+RECORD_ID_PATTERN = re.compile(r'^[A-Za-z0-9_]{1,64}$')
 
 discussions_bp = Blueprint('discussions', __name__, url_prefix='/api/discussions')
+response_cache.invalidate_on_write(discussions_bp)
 
 @discussions_bp.route('/', methods=['GET'])
 @require_auth
+@response_cache.cached
 def get_discussions():
 	"""Get all discussions"""
 	try:
 		author_id = request.args.get('author_id')
+		if author_id and not RECORD_ID_PATTERN.match(author_id):
+			return jsonify({'error': 'Invalid author_id'}), 400
 		page = request.args.get('page', 1, type=int)
 		per_page = request.args.get('per_page', 30, type=int)
 		
+		# ?replies=N embeds each discussion's first N replies
+		embed_count = min(request.args.get('replies', 0, type=int), MAX_EMBEDDED_REPLIES)
+		# Embedded replies are matched to discussions by id, so a field selection always keeps it
+		fields = requested_fields()
+		if fields is not None and embed_count > 0:
+			fields = fields.including('id')
+		
+		if wants_keyset_page():
+			# Cursor pagination, newest first: ?limit=&cursor=&count=true
+			filter_query = f"author = '{author_id}'" if author_id else ""
+			payload, status = keyset_page(discussion_controller, 'created', filter_query,
+										  expand=requested_expand("author"), fields=fields)
+			if status == 200 and embed_count > 0:
+				payload['items'] = list(discussion_reply_controller.embed_replies(payload['items'], embed_count))
+			return jsonify(payload), status
+		
 		if author_id:
-			discussions = discussion_controller.get_user_discussions(author_id)
+			discussions = discussion_controller.get_user_discussions(author_id, requested_expand(), fields)
 		else:
-			discussions = discussion_controller.get_all_discussions()
+			# Every discussion, streamed page by page
+			discussions = discussion_controller.iter_all_discussions(requested_expand("author"), fields)
+			if embed_count > 0:
+				discussions = discussion_reply_controller.embed_replies(discussions, embed_count)
+			return stream_json_array(discussions)
 		
+		if embed_count > 0:
+			discussions = list(discussion_reply_controller.embed_replies(discussions, embed_count))
 		return jsonify(discussions), 200
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @discussions_bp.route('/<discussion_id>', methods=['GET'])
 def get_discussion(discussion_id):
 	"""Get discussion by ID"""
 	try:
-		discussion = discussion_controller.get_by_id(discussion_id, expand="author")
+		discussion = discussion_controller.get_by_id(discussion_id, expand=requested_expand("author"), fields=requested_fields())
 		if discussion:
 			return jsonify(discussion), 200
 		else:
 			return jsonify({'error': 'Discussion not found'}), 404
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @discussions_bp.route('/', methods=['POST'])
 def create_discussion():
@@ -71,7 +112,7 @@ def create_discussion():
 	except ValidationError as e:
 		return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @discussions_bp.route('/<discussion_id>', methods=['PUT'])
 def update_discussion(discussion_id):
@@ -96,7 +137,7 @@ def update_discussion(discussion_id):
 	except ValidationError as e:
 		return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @discussions_bp.route('/<discussion_id>', methods=['DELETE'])
 def delete_discussion(discussion_id):
@@ -109,22 +150,46 @@ def delete_discussion(discussion_id):
 			return jsonify({'error': 'Failed to delete discussion'}), 500
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 # Discussion Replies Routes
+def refresh_reply_activity(discussion_id):
+	"""
+	Recount a discussion's replies and bump its last activity time
+	A recount rather than +1/-1 keeps the count exact under concurrent writes and for
+	discussions whose replies predate the counter
+	The reply write has already succeeded by now, so a failure here is only logged: failing
+	the request would make clients retry and post the reply twice. The next reply or
+	delete recounts anyway
+	"""
+	try:
+		discussion_controller.record_reply_activity(
+			discussion_id, discussion_reply_controller.count_replies(discussion_id)
+		)
+	except Exception as e:
+		logger.warning("Failed to refresh reply count for discussion %s: %s", discussion_id, e)
+
 @discussions_bp.route('/<discussion_id>/replies', methods=['GET'])
 def get_discussion_replies(discussion_id):
-	"""Get replies for a discussion"""
+	"""Get replies for a discussion, oldest first (?page=&per_page=)"""
+	if not RECORD_ID_PATTERN.match(discussion_id):
+		return jsonify({'error': 'Invalid discussion_id'}), 400
 	try:
-		replies = discussion_controller.get_replies(discussion_id)
+		page = request.args.get('page', 1, type=int)
+		per_page = request.args.get('per_page', 30, type=int)
+		replies = discussion_reply_controller.get_discussion_replies(
+			discussion_id, page, per_page, requested_expand("author"), requested_fields()
+		)
 		return jsonify(replies), 200
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @discussions_bp.route('/<discussion_id>/replies', methods=['POST'])
 def create_reply(discussion_id):
 	"""Create a reply to a discussion"""
+	if not RECORD_ID_PATTERN.match(discussion_id):
+		return jsonify({'error': 'Invalid discussion_id'}), 400
 	try:
 		data = request.get_json()
 		if not data:
@@ -141,6 +206,7 @@ def create_reply(discussion_id):
 
 		reply = discussion_reply_controller.create(validated_data)
 		if reply:
+			refresh_reply_activity(discussion_id)
 			return jsonify(reply), 201
 		else:
 			return jsonify({'error': 'Failed to create reply'}), 500
@@ -148,7 +214,7 @@ def create_reply(discussion_id):
 	except ValidationError as e:
 		return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @discussions_bp.route('/replies/<reply_id>', methods=['PUT'])
 def update_reply(reply_id):
@@ -173,17 +239,20 @@ def update_reply(reply_id):
 	except ValidationError as e:
 		return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @discussions_bp.route('/replies/<reply_id>', methods=['DELETE'])
 def delete_reply(reply_id):
 	"""Delete a reply"""
 	try:
-		success = reply_controller.delete(reply_id)
+		reply = discussion_reply_controller.get_by_id(reply_id)
+		success = discussion_reply_controller.delete(reply_id)
 		if success:
+			if reply and reply.get('discussion'):
+				refresh_reply_activity(reply['discussion'])
 			return jsonify({'message': 'Reply deleted successfully'}), 200
 		else:
 			return jsonify({'error': 'Failed to delete reply'}), 500
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
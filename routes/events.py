@@ -0,0 +1,47 @@
+from flask import Blueprint, Response, request, jsonify
+from services.event_stream import TOPICS, event_broker, change_producer
+from utils.auth import require_auth
+from utils.errors import error_response
+from config import Config
+
+events_bp = Blueprint('events', __name__, url_prefix='/api/events')
+
+@events_bp.route('/', methods=['GET'], strict_slashes=False)
+@require_auth
+def stream_events():
+	"""Server-Sent Events: leaderboard rank changes and room occupancy (?topics=leaderboard,rooms)"""
+	try:
+		topics = [topic for topic in request.args.get('topics', ','.join(TOPICS)).split(',') if topic]
+		unknown = [topic for topic in topics if topic not in TOPICS]
+		if unknown or not topics:
+			return jsonify({'error': f"topics must be a subset of {','.join(TOPICS)}"}), 400
+		
+		subscription = event_broker.subscribe(topics)
+		if subscription is None:
+			return jsonify({'error': 'Too many event stream connections, please retry'}), 503
+		
+		# The request context (and its pooled PocketBase client) is released once the
+		# response starts; the stream only reads in-memory state
+		try:
+			change_producer.start()
+			initial = change_producer.snapshot(topics)
+		except Exception:
+			event_broker.unsubscribe(subscription)
+			raise
+		
+		response = Response(
+			event_broker.listen(subscription, initial, keepalive=Config.SSE_KEEPALIVE),
+			mimetype='text/event-stream'
+		)
+		response.headers['Cache-Control'] = 'no-cache'
+		response.headers['X-Accel-Buffering'] = 'no'
+		return response
+	
+	except Exception as e:
+		return error_response(e)
+
+@events_bp.route('/status', methods=['GET'])
+@require_auth
+def get_events_status():
+	"""Open connections, event counters and fan-out latency"""
+	return jsonify(event_broker.stats()), 200
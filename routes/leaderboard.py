@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
 from controllers import LeaderboardController
 from services.pocketbase_service import pocketbase_service
-from utils.auth import require_auth, get_auth_token_from_header
+from services.leaderboard_index import leaderboard_index
+from utils.auth import require_auth
+from utils.errors import error_response
 
-# Use the global service instance
-leaderboard_controller = LeaderboardController(pocketbase_service)
+# Use the global service instance; rankings are served from the in-memory index
+leaderboard_controller = LeaderboardController(pocketbase_service, leaderboard_index)
 
 leaderboard_bp = Blueprint('leaderboard', __name__, url_prefix='/api/leaderboard')
 
@@ -19,4 +21,55 @@ def get_leaderboard():
         return jsonify(leaderboard), 200
     
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return error_response(e)
+
+@leaderboard_bp.route('/me', methods=['GET'])
+@require_auth
+def get_my_rank(user_id):
+    """Get the authenticated user's rank on the leaderboard"""
+    try:
+        entry = leaderboard_controller.get_user_rank(user_id)
+        if entry:
+            return jsonify(entry), 200
+        else:
+            return jsonify({'error': 'User not on leaderboard'}), 404
+    
+    except Exception as e:
+        return error_response(e)
+
+# Note: require_auth injects `user_id` into a first parameter of that name, hence `target_user_id`
+@leaderboard_bp.route('/rank/<target_user_id>', methods=['GET'])
+@require_auth
+def get_user_rank(target_user_id):
+    """Get a user's rank on the leaderboard"""
+    try:
+        entry = leaderboard_controller.get_user_rank(target_user_id)
+        if entry:
+            return jsonify(entry), 200
+        else:
+            return jsonify({'error': 'User not on leaderboard'}), 404
+    
+    except Exception as e:
+        return error_response(e)
+
+@leaderboard_bp.route('/around/<target_user_id>', methods=['GET'])
+@require_auth
+def get_leaderboard_around(target_user_id):
+    """Get the entries ranked around a user"""
+    try:
+        radius = request.args.get('radius', 5, type=int)
+        
+        entries = leaderboard_controller.get_neighbours(target_user_id, max(0, min(radius, 50)))
+        if entries:
+            return jsonify(entries), 200
+        else:
+            return jsonify({'error': 'User not on leaderboard'}), 404
+    
+    except Exception as e:
+        return error_response(e)
+
+@leaderboard_bp.route('/status', methods=['GET'])
+@require_auth
+def get_leaderboard_status():
+    """Get size and staleness of the in-memory leaderboard index"""
+    return jsonify(leaderboard_index.stats()), 200
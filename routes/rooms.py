@@ -1,19 +1,27 @@
 from flask import Blueprint, request, jsonify
 from controllers import StudyRoomController
 from services.pocketbase_service import pocketbase_service
+from services.room_presence import room_presence
 from schemas import StudyRoomSchema
 from marshmallow import ValidationError
 
 from utils.auth import require_auth
+from utils.errors import error_response
+from utils.streaming import stream_json_array
+from utils.projection import requested_expand, requested_fields
+from utils.response_cache import response_cache
 
 # Use the global service instance
 room_controller = StudyRoomController(pocketbase_service)
 room_schema = StudyRoomSchema()
 
 rooms_bp = Blueprint('rooms', __name__, url_prefix='/api/rooms')
+# Presence changes only live counts, which are overlaid on cached listings
+response_cache.invalidate_on_write(rooms_bp, exclude=('rooms.join_room', 'rooms.room_heartbeat', 'rooms.leave_room'))
 
 @rooms_bp.route('/', methods=['GET'])
 @require_auth
+@response_cache.cached(transform=room_presence.overlay)
 def get_rooms():
 	"""Get study rooms with optional filtering"""
 	
@@ -22,31 +30,34 @@ def get_rooms():
 		host_id = request.args.get('host_id')
 		page = request.args.get('page', 1, type=int)
 		per_page = request.args.get('per_page', 30, type=int)
+		fields = requested_fields()
 		
 		if public_only:
-			rooms = room_controller.get_public_rooms()
+			# Every public room, streamed page by page; live counts are overlaid here too, for
+			# listings too long for the response cache (which overlays them on cached copies)
+			return stream_json_array(room_presence.iter_overlay(room_controller.iter_public_rooms(requested_expand("host"), fields)))
 		elif host_id:
-			rooms = room_controller.get_user_rooms(host_id)
+			rooms = room_controller.get_user_rooms(host_id, requested_expand(), fields)
 		else:
-			rooms = room_controller.get_all(page=page, per_page=per_page, expand="host")
+			rooms = room_controller.get_all(page=page, per_page=per_page, expand=requested_expand("host"), fields=fields)
 		
 		return jsonify(rooms), 200
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @rooms_bp.route('/<room_id>', methods=['GET'])
 def get_room(room_id):
 	"""Get room by ID"""
 	try:
-		room = room_controller.get_by_id(room_id, expand="host")
+		room = room_controller.get_by_id(room_id, expand=requested_expand("host"), fields=requested_fields())
 		if room:
-			return jsonify(room), 200
+			return jsonify(room_presence.overlay([room])[0]), 200
 		else:
 			return jsonify({'error': 'Room not found'}), 404
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @rooms_bp.route('/create', methods=['POST'])
 def create_room():
@@ -71,7 +82,7 @@ def create_room():
 	except ValidationError as e:
 		return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @rooms_bp.route('/<room_id>', methods=['PUT'])
 def update_room(room_id):
@@ -96,7 +107,7 @@ def update_room(room_id):
 	except ValidationError as e:
 		return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @rooms_bp.route('/<room_id>', methods=['DELETE'])
 def delete_room(room_id):
@@ -104,9 +115,71 @@ def delete_room(room_id):
 	try:
 		success = room_controller.delete(room_id)
 		if success:
+			room_presence.forget(room_id)
 			return jsonify({'message': 'Room deleted successfully'}), 200
 		else:
 			return jsonify({'error': 'Failed to delete room'}), 500
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
+
+@rooms_bp.route('/<room_id>/join', methods=['POST'])
+@require_auth
+def join_room(user_id, room_id):
+	"""Join a study room"""
+	try:
+		# Load the room from PocketBase only the first time anyone joins it
+		if not room_presence.is_tracked(room_id):
+			room = room_controller.get_by_id(room_id)
+			if not room:
+				return jsonify({'error': 'Room not found'}), 404
+			room_presence.track(room)
+		
+		participants = room_presence.join(room_id, user_id, pocketbase_service.get_auth_token())
+		# Serverless instances may never run the flush thread; a failed flush only delays the write
+		try:
+			room_presence.flush_if_due()
+		except Exception:
+			pass
+		if participants is None:
+			return jsonify({'error': 'Room is full'}), 409
+		return jsonify({'room': room_id, 'participants': participants}), 200
+	
+	except Exception as e:
+		return error_response(e)
+
+@rooms_bp.route('/<room_id>/heartbeat', methods=['POST'])
+@require_auth
+def room_heartbeat(user_id, room_id):
+	"""Keep the caller in a study room"""
+	try:
+		participants = room_presence.heartbeat(room_id, user_id, pocketbase_service.get_auth_token())
+		# Serverless instances may never run the flush thread; a failed flush only delays the write
+		try:
+			room_presence.flush_if_due()
+		except Exception:
+			pass
+		if participants is None:
+			return jsonify({'error': 'Not in room'}), 404
+		return jsonify({'room': room_id, 'participants': participants}), 200
+	
+	except Exception as e:
+		return error_response(e)
+
+@rooms_bp.route('/<room_id>/leave', methods=['POST'])
+@require_auth
+def leave_room(user_id, room_id):
+	"""Leave a study room"""
+	try:
+		participants = room_presence.leave(room_id, user_id, pocketbase_service.get_auth_token())
+		# Serverless instances may never run the flush thread; a failed flush only delays the write
+		try:
+			room_presence.flush_if_due()
+		except Exception:
+			pass
+		if participants is None:
+			return jsonify({'error': 'Not in room'}), 404
+		return jsonify({'room': room_id, 'participants': participants}), 200
+	
+	except Exception as e:
+		return error_response(e)
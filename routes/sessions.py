@@ -1,52 +1,158 @@
+from datetime import datetime, timezone
 from flask import Blueprint, request, jsonify
 from controllers import StudySessionController
 from services.pocketbase_service import pocketbase_service
-from schemas import StudySessionSchema
+from schemas import (StudySessionSchema, StudyRoomSchema, UserSchema, HeartbeatSchema, StartSessionSchema,
+					 StopSessionSchema)
+from schemas.compiled import compile_schema
+from services.heartbeat_aggregator import HeartbeatAggregator
+from services.leaderboard_index import leaderboard_index
+from services.statistics_rollups import statistics_rollups
+from services.achievement_evaluator import achievement_evaluator
 from marshmallow import ValidationError
-from utils.auth import require_auth
+from utils.auth import require_auth, is_admin
+from utils.errors import error_response
+from utils.streaming import csv_columns, stream_csv, stream_json_array, stream_ndjson
+from utils.pagination import keyset_page, wants_keyset_page
+from utils.projection import requested_expand, requested_fields
+from config import Config
+import re
 
 # Use the global service instance
 session_controller = StudySessionController(pocketbase_service)
-session_schema = StudySessionSchema()
+# Schemas are compiled once; valid payloads skip marshmallow entirely
+session_schema = compile_schema(StudySessionSchema())
+start_schema = compile_schema(StartSessionSchema())
+heartbeat_schema = compile_schema(HeartbeatSchema())
+stop_schema = compile_schema(StopSessionSchema())
+
+# Heartbeats are counted in memory and written to PocketBase in batches
+heartbeat_aggregator = HeartbeatAggregator(
+	pocketbase_service,
+	session_controller.collection_name,
+	flush_interval=Config.HEARTBEAT_FLUSH_INTERVAL,
+	idle_timeout=Config.HEARTBEAT_IDLE_TIMEOUT
+)
 
 sessions_bp = Blueprint('sessions', __name__, url_prefix='/api/study_sessions')
 
+# User ids end up inside a PocketBase filter
+USER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_]{1,64}$')
+
+# Schemas of the relations a CSV export can expand, for its columns
+EXPORT_RELATIONS = {'room': StudyRoomSchema(), 'user': UserSchema()}
+
+def session_owner(session_id):
+	"""User id of a session, known from memory while its heartbeats are aggregated (None if not found)"""
+	owner = heartbeat_aggregator.owner_of(session_id)
+	if owner is None:
+		session = session_controller.get_by_id(session_id)
+		owner = session.get('user') if session else None
+	return owner
+
+def pocketbase_datetime(value):
+	"""PocketBase datetime for an ISO 8601 date or datetime (UTC unless it carries an offset)"""
+	parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+	if parsed.tzinfo is not None:
+		parsed = parsed.astimezone(timezone.utc)
+	return parsed.strftime('%Y-%m-%d %H:%M:%S.000Z')
+
 @sessions_bp.route('/', methods=['GET'])
 @require_auth
 def get_sessions():
 	"""Get study sessions with optional filtering"""
 	try:
 		user_id = request.args.get('user_id')
+		if user_id and not USER_ID_PATTERN.match(user_id):
+			return jsonify({'error': 'Invalid user_id'}), 400
 		active_only = request.args.get('active', 'false').lower() == 'true'
 		page = request.args.get('page', 1, type=int)
 		per_page = request.args.get('per_page', 30, type=int)
+		# ?fields=id,startedAt,expand.room.roomName&expand=room
+		fields = requested_fields()
+		
+		if wants_keyset_page():
+			# Cursor pagination, newest first: ?limit=&cursor=&sort=startedAt|created&count=true
+			sort_field = request.args.get('sort', 'startedAt').lstrip('-')
+			if sort_field not in ('startedAt', 'created'):
+				return jsonify({'error': 'sort must be startedAt or created'}), 400
+			conditions = []
+			if user_id:
+				conditions.append(f"user = '{user_id}'")
+			if active_only:
+				conditions.append("active = true")
+			payload, status = keyset_page(session_controller, sort_field, ' && '.join(conditions),
+										  expand=requested_expand("room"), fields=fields)
+			return jsonify(payload), status
 		
 		if user_id:
 			if active_only:
-				sessions = session_controller.get_active_sessions(user_id)
+				sessions = session_controller.get_active_sessions(user_id, requested_expand(), fields)
 			else:
-				sessions = session_controller.get_user_sessions(user_id)
+				# Full history, streamed page by page
+				return stream_json_array(session_controller.iter_user_sessions(user_id, requested_expand("room"), fields))
 		else:
-			sessions = session_controller.get_all(page=page, per_page=per_page)
+			sessions = session_controller.get_all(page=page, per_page=per_page, expand=requested_expand(), fields=fields)
 		
 		return jsonify(sessions), 200
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
+
+@sessions_bp.route('/export', methods=['GET'])
+@require_auth
+def export_sessions(user_id):
+	"""
+	Stream a user's whole session history, newest first, as NDJSON or CSV
+	?format=ndjson|csv&user_id=&from=&to= (from inclusive, to exclusive), plus fields= and expand=
+	"""
+	try:
+		export_format = request.args.get('format', 'ndjson').lower()
+		if export_format not in ('ndjson', 'csv'):
+			return jsonify({'error': 'format must be ndjson or csv'}), 400
+		
+		target_user_id = request.args.get('user_id', user_id)
+		if not USER_ID_PATTERN.match(target_user_id):
+			return jsonify({'error': 'Invalid user_id'}), 400
+		# Another user's whole history is for admins only
+		if target_user_id != user_id and not is_admin():
+			return jsonify({'error': 'Only admins can export another user\'s sessions'}), 403
+		
+		try:
+			started_from = pocketbase_datetime(request.args['from']) if request.args.get('from') else None
+			started_before = pocketbase_datetime(request.args['to']) if request.args.get('to') else None
+		except ValueError:
+			return jsonify({'error': 'from and to must be ISO 8601 dates or datetimes'}), 400
+		
+		# Keyset pages, fetched as the client reads: memory stays at one page whatever the history size
+		expand = requested_expand("room")
+		fields = requested_fields()
+		sessions = session_controller.iter_user_sessions_between(
+			target_user_id, started_from, started_before, Config.EXPORT_PAGE_SIZE, expand, fields
+		)
+		filename = f"study_sessions-{target_user_id}.{export_format}"
+		if export_format == 'csv':
+			relations = {name: EXPORT_RELATIONS[name]
+						 for name in map(str.strip, (expand or '').split(',')) if name in EXPORT_RELATIONS}
+			return stream_csv(sessions, csv_columns(StudySessionSchema(), relations, fields), filename)
+		return stream_ndjson(sessions, filename=filename)
+	
+	except Exception as e:
+		return error_response(e)
 
 @sessions_bp.route('/<session_id>', methods=['GET'])
 @require_auth
 def get_session(session_id):
 	"""Get session by ID"""
 	try:
-		session = session_controller.get_by_id(session_id, expand="user,room")
+		session = session_controller.get_by_id(session_id, expand=requested_expand("user,room"), fields=requested_fields())
 		if session:
 			return jsonify(session), 200
 		else:
 			return jsonify({'error': 'Session not found'}), 404
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @sessions_bp.route('/', methods=['POST'])
 @require_auth
@@ -73,7 +179,7 @@ def create_session():
 			return jsonify({'error': 'Failed to create session'}), 500
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @sessions_bp.route('/<session_id>', methods=['PUT'])
 def update_session(session_id):
@@ -98,20 +204,30 @@ def update_session(session_id):
 	except ValidationError as e:
 		return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @sessions_bp.route('/<session_id>/end', methods=['POST'])
-def end_session(session_id):
+@require_auth
+def end_session(user_id, session_id):
 	"""End a study session"""
 	try:
-		session = session_controller.end_session(session_id)
+		owner = session_owner(session_id)
+		if owner is None:
+			return jsonify({'error': 'Session not found'}), 404
+		if owner != user_id:
+			return jsonify({'error': 'Unauthorized access to session'}), 403
+		
+		# Fold any unflushed heartbeats into the closing update
+		with heartbeat_aggregator.finishing(session_id) as duration:
+			session = session_controller.end_session(session_id, add_duration=duration)
 		if session:
+			statistics_rollups.record_session(session)
 			return jsonify({'message': 'Session ended successfully', 'session': session}), 200
 		else:
 			return jsonify({'error': 'Failed to end session'}), 500
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @sessions_bp.route('/<session_id>', methods=['DELETE'])
 def delete_session(session_id):
@@ -124,7 +240,7 @@ def delete_session(session_id):
 			return jsonify({'error': 'Failed to delete session'}), 500
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 # New endpoints for frontend session management
 
@@ -134,7 +250,10 @@ def start_session(user_id):
 	"""Start a new study session"""
 	try:
 		data = request.get_json()
-		timestamp = data.get('timestamp') if data else None
+		try:
+			timestamp = start_schema.load(data).get('timestamp') if data else None
+		except ValidationError as e:
+			return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
 		
 		# Create a new session for the user with active_duration starting at 1
 		# (PocketBase requires min value of 1)
@@ -156,7 +275,7 @@ def start_session(user_id):
 			return jsonify({'error': 'Failed to start session'}), 500
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @sessions_bp.route('/heartbeat', methods=['POST'])
 @require_auth
@@ -167,48 +286,43 @@ def heartbeat(user_id):
 		if not data:
 			return jsonify({'error': 'No data provided'}), 400
 		
-		session_id = data.get('session_id')
-		timestamp = data.get('timestamp')
-		is_active = data.get('is_active', True)
+		try:
+			payload = heartbeat_schema.load(data)
+		except ValidationError as e:
+			return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
+		session_id = payload['session_id']
+		is_active = payload['is_active']
 		
-		if not session_id:
-			return jsonify({'error': 'session_id is required'}), 400
-		
-		# Get the current session
-		session = session_controller.get_by_id(session_id)
-		if not session:
-			return jsonify({'error': 'Session not found'}), 404
+		# Load the session from PocketBase only on its first heartbeat
+		if heartbeat_aggregator.owner_of(session_id) is None:
+			session = session_controller.get_by_id(session_id)
+			if not session:
+				return jsonify({'error': 'Session not found'}), 404
+			heartbeat_aggregator.track(session)
 		
 		# Verify the session belongs to the authenticated user
-		if session.get('user') != user_id:
+		if heartbeat_aggregator.owner_of(session_id) != user_id:
 			return jsonify({'error': 'Unauthorized access to session'}), 403
 		
-		# Get current active_duration
-		current_duration = session.get('active_duration', 0)
-		
-		# Only increment duration if user is active
-		if is_active:
-			new_duration = current_duration + 1
-		else:
-			new_duration = current_duration
-		
-		# Update the session
-		updated_session = session_controller.update(session_id, {
-			'active_duration': new_duration,
-			'active': is_active
-		})
+		# Only increments duration if user is active; written to PocketBase on the next flush
+		new_duration = heartbeat_aggregator.beat(session_id, is_active, pocketbase_service.get_auth_token())
+		# Serverless instances may never run the flush thread; a failed flush only delays the write
+		try:
+			heartbeat_aggregator.flush_if_due()
+		except Exception:
+			pass
 		
-		if updated_session:
+		if new_duration is not None:
 			return jsonify({
 				'message': 'Heartbeat received',
 				'duration': new_duration,
 				'is_active': is_active
 			}), 200
 		else:
-			return jsonify({'error': 'Failed to update session'}), 500
+			return jsonify({'error': 'Session not found'}), 404
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @sessions_bp.route('/stop', methods=['POST'])
 @require_auth
@@ -219,31 +333,51 @@ def stop_session(user_id):
 		if not data:
 			return jsonify({'error': 'No data provided'}), 400
 		
-		session_id = data.get('session_id')
-		timestamp = data.get('timestamp')
-		
-		if not session_id:
-			return jsonify({'error': 'session_id is required'}), 400
+		try:
+			payload = stop_schema.load(data)
+		except ValidationError as e:
+			return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
+		session_id = payload['session_id']
 		
-		# Get the current session
-		session = session_controller.get_by_id(session_id)
-		if not session:
+		owner = session_owner(session_id)
+		if owner is None:
 			return jsonify({'error': 'Session not found'}), 404
 		
 		# Verify the session belongs to the authenticated user
-		if session.get('user') != user_id:
+		if owner != user_id:
 			return jsonify({'error': 'Unauthorized access to session'}), 403
 		
-		# End the session
-		updated_session = session_controller.end_session(session_id)
+		# End the session, folding any unflushed heartbeats into the closing update
+		# (they stay pending if the update fails)
+		with heartbeat_aggregator.finishing(session_id) as duration:
+			updated_session = session_controller.end_session(session_id, add_duration=duration)
+		
+		# Move the user on the in-memory leaderboard; a failure here only leaves it stale
+		try:
+			leaderboard_index.refresh_user(user_id)
+		except Exception:
+			pass
 		
 		if updated_session:
+			statistics_rollups.record_session(updated_session)
+			
+			# Unlock achievements whose requiredHours the user has now reached (none listed here
+			# while the user's total is first loaded; they are unlocked in the background instead)
+			unlocked = []
+			try:
+				token = pocketbase_service.get_auth_token()
+				achievement_evaluator.record_session(updated_session, token)
+				unlocked = achievement_evaluator.evaluate(user_id, token)
+			except Exception:
+				pass
+			
 			return jsonify({
 				'message': 'Session stopped successfully',
-				'session': updated_session
+				'session': updated_session,
+				'unlocked_achievements': unlocked
 			}), 200
 		else:
 			return jsonify({'error': 'Failed to stop session'}), 500
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
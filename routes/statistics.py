@@ -1,20 +1,38 @@
 from flask import Blueprint, request, jsonify
 from controllers import StudySessionController, StatisticsController
 from services.pocketbase_service import pocketbase_service
+from services.statistics_rollups import statistics_rollups
 from schemas import StudySessionSchema
 from marshmallow import ValidationError
-from utils.auth import require_auth
+from utils.auth import require_auth, is_admin
+from utils.errors import error_response
 
 statistics_bp = Blueprint('statistics', __name__, url_prefix='/api/statistics')
+statistics_controller = StatisticsController(pocketbase_service, statistics_rollups)
 
 @statistics_bp.route('/', methods=['GET'], strict_slashes=False)
 @require_auth
-def get_today_statistics():
-	"""Get today's statistics"""
+def get_today_statistics(user_id):
+	"""Get the authenticated user's study time today, this week and this month"""
 	try:
-		statistics_controller = StatisticsController(pocketbase_service)
-		stats = statistics_controller.get_today_statistics()
+		stats = statistics_controller.get_user_statistics(user_id)
 		return jsonify(stats), 200
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
\ No newline at end of file
+		return error_response(e)
+
+@statistics_bp.route('/rebuild', methods=['POST'])
+@require_auth
+def rebuild_statistics(user_id):
+	"""Recompute rollups from study sessions (?all=true rebuilds every user's, admins only)"""
+	try:
+		rebuild_all = request.args.get('all', 'false').lower() == 'true'
+		# Rebuilding everyone scans every user's sessions and replaces the shared rollups
+		if rebuild_all and not is_admin():
+			return jsonify({'error': 'Only admins can rebuild every user\'s statistics'}), 403
+		
+		rebuilt = statistics_controller.rebuild_statistics(None if rebuild_all else user_id)
+		return jsonify({'message': 'Statistics rebuilt', 'users': rebuilt}), 200
+	
+	except Exception as e:
+		return error_response(e)
\ No newline at end of file
@@ -4,6 +4,7 @@ from services.pocketbase_service import pocketbase_service
 from schemas import StudyTargetSchema
 from marshmallow import ValidationError
 from utils.auth import require_auth
+from utils.errors import error_response
 
 target_bp = Blueprint('targets', __name__, url_prefix='/api/targets')
 study_target_schema = StudyTargetSchema()
@@ -27,7 +28,7 @@ def get_user_targets():
 		}), 200
 
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @target_bp.route('/<record_id>', methods=['PUT'])
 @require_auth
@@ -68,4 +69,4 @@ def update_user_targets(user_id, record_id):
 	except ValidationError as ve:
 		return jsonify({'Validation Error': ve.messages}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
\ No newline at end of file
+		return error_response(e)
\ No newline at end of file
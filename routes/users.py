@@ -7,6 +7,7 @@ from schemas import UserSchema
 from marshmallow import ValidationError
 
 from utils.auth import require_auth
+from utils.errors import error_response
 from utils.uri import cast_image_uri
 
 # Use the global service instance
@@ -68,7 +69,7 @@ def authenticate_user():
 	except BadRequest:
 		return jsonify({'error': 'Invalid request format. Perhaps you made a mistake in comma?'}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 	
 @users_bp.route('/logout', methods=['POST'])
 @require_auth
@@ -82,14 +83,14 @@ def logout_user():
 		}), 200
 
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @users_bp.route('/user/<user_id>', methods=['GET'])
 @require_auth
 def get_user(user_id):
 	"""Get user by ID"""
 	try:
-		user = user_controller.get_user_profile(user_id)
+		user = user_controller.get_user_profile(user_id, pocketbase_service.get_auth_user_id())
 		if user:
 			return jsonify({
 				'success': True,
@@ -106,7 +107,7 @@ def get_user(user_id):
 		else:
 			return jsonify({'error': 'User not found'}), 404
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @users_bp.route('/', methods=['GET'])
 @require_auth
@@ -122,7 +123,7 @@ def get_all_users():
 		}), 200
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @users_bp.route('/signup', methods=['POST'])
 def register_user():
@@ -196,7 +197,7 @@ def update_user(user_id):
 	except ValidationError as e:
 		return jsonify({'error': 'Validation failed', 'details': e.messages}), 400
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
+		return error_response(e)
 
 @users_bp.route('/<user_id>', methods=['DELETE'])
 @require_auth
@@ -210,4 +211,4 @@ def delete_user(user_id):
 			return jsonify({'error': 'Failed to delete user'}), 500
 	
 	except Exception as e:
-		return jsonify({'error': str(e)}), 500
\ No newline at end of file
+		return error_response(e)
\ No newline at end of file
@@ -1,7 +1,13 @@
 from marshmallow import Schema, fields
+from services.metrics import metrics
 
 class BaseSchema(Schema):
     """Base schema for all models"""
     id = fields.Str(required=True)
     created = fields.DateTime(allow_none=True)
     updated = fields.DateTime(allow_none=True)
+
+    @metrics.track_phase('validate')
+    def load(self, *args, **kwargs):
+        """Schema.load, timed as the `validate` phase in /metrics"""
+        return super().load(*args, **kwargs)
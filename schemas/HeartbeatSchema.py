@@ -0,0 +1,10 @@
+from marshmallow import Schema, fields, validate, EXCLUDE
+
+class HeartbeatSchema(Schema):
+    """Heartbeat payload for an active study session"""
+    class Meta:
+        unknown = EXCLUDE
+
+    session_id = fields.Str(required=True, validate=validate.Length(min=1))
+    timestamp = fields.Raw(allow_none=True)
+    is_active = fields.Bool(load_default=True)
@@ -0,0 +1,8 @@
+from marshmallow import Schema, fields, EXCLUDE
+
+class StartSessionSchema(Schema):
+    """Payload for starting a study session"""
+    class Meta:
+        unknown = EXCLUDE
+
+    timestamp = fields.Raw(allow_none=True)
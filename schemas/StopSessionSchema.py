@@ -0,0 +1,9 @@
+from marshmallow import Schema, fields, validate, EXCLUDE
+
+class StopSessionSchema(Schema):
+    """Payload for stopping a study session"""
+    class Meta:
+        unknown = EXCLUDE
+
+    session_id = fields.Str(required=True, validate=validate.Length(min=1))
+    timestamp = fields.Raw(allow_none=True)
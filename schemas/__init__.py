@@ -1,14 +1,6 @@
 # Re-export schema classes for package-level imports
-from .BaseSchema import BaseSchema
-from .UserSchema import UserSchema
-from .StudySessionSchema import StudySessionSchema
-from .StudyRoomSchema import StudyRoomSchema
-from .StudyTargetSchema import StudyTargetSchema
-from .AchievementSchema import AchievementSchema
-from .UserAchievementSchema import UserAchievementSchema
-from .DiscussionSchema import DiscussionSchema
-from .DiscussionReplySchema import DiscussionReplySchema
-from .LeaderboardEntrySchema import LeaderboardEntrySchema
+# Each schema module is imported on first access, so importing one does not load them all
+from importlib import import_module
 
 __all__ = [
     "BaseSchema",
@@ -21,4 +13,19 @@ __all__ = [
     "DiscussionSchema",
     "DiscussionReplySchema",
     "LeaderboardEntrySchema",
+    "HeartbeatSchema",
+    "StartSessionSchema",
+    "StopSessionSchema",
 ]
+
+
+def __getattr__(name):
+    if name not in __all__:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,151 @@
+"""
+Compiled fast path for hot request payloads
+A schema's fields are turned into plain type and range checks once. Payloads that pass
+them are loaded without going through marshmallow; anything else (invalid input, values that
+need coercion such as "12" for an int) falls back to Schema.load, so results and error
+messages are exactly marshmallow's.
+"""
+
+import math
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from marshmallow import EXCLUDE, RAISE, Schema, fields, validate
+from marshmallow.utils import missing
+
+from services.metrics import metrics
+
+# Sentinel returned by a field check when marshmallow must decide
+_FALLBACK = object()
+
+Check = Callable[[Any], Any]
+
+
+def _range_check(validator: validate.Range) -> Callable[[Any], bool]:
+    low, high = validator.min, validator.max
+    low_inclusive, high_inclusive = validator.min_inclusive, validator.max_inclusive
+
+    def check(value):
+        if low is not None and (value < low if low_inclusive else value <= low):
+            return False
+        if high is not None and (value > high if high_inclusive else value >= high):
+            return False
+        return True
+    return check
+
+
+def _length_check(validator: validate.Length) -> Callable[[Any], bool]:
+    low, high, equal = validator.min, validator.max, validator.equal
+
+    def check(value):
+        size = len(value)
+        if equal is not None:
+            return size == equal
+        return (low is None or size >= low) and (high is None or size <= high)
+    return check
+
+
+def _compile_field(field: fields.Field) -> Optional[Check]:
+    """Check for one field, or None if the field type cannot be compiled"""
+    kind = type(field)
+    if kind is fields.String:
+        def convert(value):
+            return value if type(value) is str else _FALLBACK
+    elif kind is fields.Integer:
+        def convert(value):
+            return value if type(value) is int else _FALLBACK
+    elif kind is fields.Float:
+        allow_nan = field.allow_nan
+
+        def convert(value):
+            if type(value) not in (int, float) or (not allow_nan and not math.isfinite(value)):
+                return _FALLBACK
+            return float(value)
+    elif kind is fields.Boolean:
+        def convert(value):
+            return value if type(value) is bool else _FALLBACK
+    elif kind is fields.Raw:
+        def convert(value):
+            return value
+    elif kind is fields.DateTime:
+        # Parsing is marshmallow's job; the fast path only covers the field being absent or null
+        def convert(value):
+            return _FALLBACK
+    else:
+        return None
+
+    checks = []
+    for validator in field.validators:
+        if isinstance(validator, validate.Range):
+            checks.append(_range_check(validator))
+        elif isinstance(validator, validate.Length):
+            checks.append(_length_check(validator))
+        else:
+            return None
+    allow_none = field.allow_none
+
+    def check(value):
+        if value is None:
+            return None if allow_none else _FALLBACK
+        value = convert(value)
+        if value is _FALLBACK:
+            return _FALLBACK
+        for passes in checks:
+            if not passes(value):
+                return _FALLBACK
+        return value
+    return check
+
+
+class CompiledSchema:
+    """Drop-in for `schema.load()` on flat schemas of str/int/float/bool/raw/datetime fields"""
+
+    def __init__(self, schema: Schema):
+        self.schema = schema
+        self._fields: List[Tuple[str, Check, bool, Any]] = []
+        self.compiled = self._compile()
+
+    def _compile(self) -> bool:
+        schema = self.schema
+        if any(schema._hooks.values()) or schema.many or schema.unknown not in (RAISE, EXCLUDE):
+            return False
+        for attr_name, field in schema.load_fields.items():
+            check = _compile_field(field)
+            if check is None or field.attribute is not None or field.data_key not in (None, attr_name):
+                self._fields = []
+                return False
+            self._fields.append((attr_name, check, field.required, field.load_default))
+        self._names = frozenset(name for name, _, _, _ in self._fields)
+        self._raise_unknown = schema.unknown == RAISE
+        return True
+
+    @metrics.track_phase('validate')
+    def load(self, data: Any, partial: Union[bool, Tuple[str, ...], None] = None) -> Dict[str, Any]:
+        """Same result as `schema.load(data, partial=partial)`, raising the same ValidationError"""
+        if self.compiled and isinstance(data, Mapping) and (partial is None or type(partial) is bool):
+            result = self._load(data, bool(partial))
+            if result is not None:
+                return result
+        return self.schema.load(data, partial=partial)
+
+    def _load(self, data: Mapping, partial: bool) -> Optional[Dict[str, Any]]:
+        if self._raise_unknown and not self._names.issuperset(data):
+            return None
+        result = {}
+        for name, check, required, load_default in self._fields:
+            if name in data:
+                value = check(data[name])
+                if value is _FALLBACK:
+                    return None
+                result[name] = value
+            elif partial:
+                continue
+            elif required:
+                return None
+            elif load_default is not missing:
+                result[name] = load_default() if callable(load_default) else load_default
+        return result
+
+
+def compile_schema(schema: Schema) -> CompiledSchema:
+    """Compile a schema instance; unsupported schemas still work, through marshmallow"""
+    return CompiledSchema(schema)
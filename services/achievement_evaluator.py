@@ -0,0 +1,265 @@
+"""
+Automatic achievement unlocking
+Achievements are kept sorted by `requiredHours`, so finding what a user just earned is a
+bisect over the thresholds crossed since their last evaluation rather than a catalog scan
+"""
+
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, ContextManager, List, Set, TYPE_CHECKING
+import logging
+import threading
+import time
+
+from config import Config
+from services.pocketbase_service import PocketBaseService, pocketbase_service
+
+if TYPE_CHECKING:
+	from services.async_pocketbase_service import AsyncPocketBaseService
+
+logger = logging.getLogger(__name__)
+
+
+class AchievementEvaluator:
+	"""
+	Per-user cumulative study hours checked against the achievement catalog's thresholds
+	Each user's total is loaded once, then kept as a running total that stops add to. Users
+	not seen for `ttl` seconds are re-read, which also picks up sessions ended and achievements
+	unlocked by other workers, and only the `max_users` most recently active users are kept.
+	Loading walks the user's whole history, so it runs on a background thread rather than in
+	the stop request, and the user is evaluated once their total is ready
+	"""
+
+	def __init__(self, pb_service: PocketBaseService, units_per_hour: float = 60,
+				 async_service: Optional['AsyncPocketBaseService'] = None,
+				 catalog_collection: str = "achievements",
+				 unlocked_collection: str = "user_achievements",
+				 sessions_collection: str = "study_sessions",
+				 ttl: float = 600.0, max_users: int = 10000, page_size: int = 500, load_workers: int = 2):
+		self.pb_service = pb_service
+		self.units_per_hour = units_per_hour
+		self.async_service = async_service
+		self.catalog_collection = catalog_collection
+		self.unlocked_collection = unlocked_collection
+		self.sessions_collection = sessions_collection
+		self.ttl = ttl
+		self.max_users = max_users
+		self.page_size = page_size
+		self._thresholds: List[float] = []
+		self._achievements: List[Dict[str, Any]] = []
+		self._catalog_version = 0
+		self._catalog_loaded = False
+		# User id -> {'total', 'counted', 'unlocked', 'evaluated', 'loaded_at'}, least recently used first.
+		# `counted` holds what sessions that may still change added to the total (those active when
+		# it was loaded and those ended since), so ending a session again replaces; it starts over
+		# with every reload
+		self._users: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+		# User id -> whether a session ended while the user's load was in flight (it then runs again,
+		# as the load may have read the session before it was written)
+		self._loading: Dict[str, bool] = {}
+		self._loads: Set[Future] = set()
+		self._executor = ThreadPoolExecutor(max_workers=load_workers, thread_name_prefix="achievement-loader")
+		self._lock = threading.RLock()
+
+	# Catalog
+	def refresh_catalog(self) -> int:
+		"""Reload the catalog, sorted by requiredHours; achievements without a threshold are skipped"""
+		achievements = [
+			achievement for achievement in self.pb_service.iter_records(self.catalog_collection)
+			if achievement.get('required_hours') is not None
+		]
+		achievements.sort(key=lambda achievement: achievement['required_hours'])
+		with self._lock:
+			self._achievements = achievements
+			self._thresholds = [achievement['required_hours'] for achievement in achievements]
+			self._catalog_version += 1
+			self._catalog_loaded = True
+		return len(achievements)
+
+	def invalidate_catalog(self) -> None:
+		"""Reload the catalog before the next evaluation (after an achievement is created, updated or deleted)"""
+		with self._lock:
+			self._catalog_loaded = False
+
+	# Per-user state
+	def _load_user(self, user_id: str) -> Dict[str, Any]:
+		"""
+		Sum a user's study time from keyset pages carrying only the duration, and read their unlocks
+		Keyset pages keep deep histories as cheap per page as the first
+		"""
+		total = 0.0
+		counted: Dict[str, float] = {}
+		after = None
+		while True:
+			page = self.pb_service.list_records_after(
+				self.sessions_collection, 'created', self.page_size, after,
+				f"user = '{user_id}'", fields='active,active_duration'
+			)
+			for session in page['items']:
+				duration = session.get('active_duration') or 0
+				total += duration
+				if session.get('active'):
+					counted[session['id']] = duration
+			after = page['last']
+			if after is None:
+				break
+		unlocked = {
+			record.get('achievement')
+			for record in self.pb_service.iter_records(self.unlocked_collection, filter_query=f"user = '{user_id}'")
+		}
+		return {'total': total, 'counted': counted, 'unlocked': unlocked, 'evaluated': None,
+				'loaded_at': time.monotonic()}
+
+	def _user(self, user_id: str, token: Optional[str] = None, changed: bool = False) -> Optional[Dict[str, Any]]:
+		"""
+		A user's state, or None while it is first loaded; a load is started in the background when
+		the user is not in memory or older than ttl (a stale state keeps being used meanwhile)
+		`changed` marks a session ended since, which an in-flight load may have missed
+		"""
+		with self._lock:
+			state = self._users.get(user_id)
+			if state is not None:
+				self._users.move_to_end(user_id)
+			if user_id in self._loading:
+				self._loading[user_id] = self._loading[user_id] or changed
+			elif state is None or time.monotonic() - state['loaded_at'] >= self.ttl:
+				self._loading[user_id] = False
+				future = self._executor.submit(self._load_in_background, user_id, token)
+				self._loads.add(future)
+				future.add_done_callback(self._loads.discard)
+			return state
+
+	def _acting_as(self, token: Optional[str]) -> ContextManager[Any]:
+		return self.pb_service.acting_as(token) if token else nullcontext()
+
+	def _load_in_background(self, user_id: str, token: Optional[str]) -> None:
+		"""Load a user as the caller who triggered it, then unlock whatever their total reaches"""
+		try:
+			with self._acting_as(token):
+				while True:
+					loaded = self._load_user(user_id)
+					with self._lock:
+						if self._loading.get(user_id):
+							self._loading[user_id] = False
+							continue
+						self._loading.pop(user_id, None)
+						self._users[user_id] = loaded
+						self._users.move_to_end(user_id)
+						while len(self._users) > self.max_users:
+							self._users.popitem(last=False)
+						break
+				self.evaluate(user_id, token)
+		except Exception as e:
+			with self._lock:
+				self._loading.pop(user_id, None)
+			logger.warning("Failed to load achievement progress for user %s: %s", user_id, e)
+
+	def join(self, timeout: Optional[float] = None) -> bool:
+		"""Wait for the user loads in flight (and their evaluations); False if some are still running"""
+		with self._lock:
+			loads = set(self._loads)
+		return not wait(loads, timeout).not_done
+
+	def record_session(self, session: Optional[Dict[str, Any]], token: Optional[str] = None) -> None:
+		"""Count an ended session towards its user's total (ending it again replaces, not adds)"""
+		if not session or not session.get('user'):
+			return
+		state = self._user(session['user'], token, changed=True)
+		# Not loaded yet: the load starts after the session was written, so it includes it
+		if state is None:
+			return
+		duration = session.get('active_duration') or 0
+		with self._lock:
+			state['total'] += duration - state['counted'].get(session.get('id'), 0)
+			state['counted'][session.get('id')] = duration
+
+	def hours(self, user_id: str) -> Optional[float]:
+		"""A user's cumulative active study time in hours, or None while it is loading"""
+		state = self._user(user_id)
+		return state['total'] / self.units_per_hour if state is not None else None
+
+	# Evaluation
+	def _newly_earned(self, state: Dict[str, Any], hours: float) -> List[Dict[str, Any]]:
+		with self._lock:
+			reached = bisect_right(self._thresholds, hours)
+			previous = state['evaluated']
+			start = 0
+			if previous is not None and previous[1] == self._catalog_version:
+				# Only thresholds crossed since the last evaluation can be new
+				start = bisect_right(self._thresholds, previous[0])
+			state['evaluated'] = (hours, self._catalog_version)
+			return [
+				achievement for achievement in self._achievements[start:reached]
+				if achievement['id'] not in state['unlocked']
+			]
+
+	def _already_unlocked(self, user_id: str, achievement_ids: List[str]) -> Set[str]:
+		"""Which of these achievements the user already has in PocketBase (e.g. unlocked by another worker)"""
+		achievements = ' || '.join(f"achievement = '{achievement_id}'" for achievement_id in achievement_ids)
+		result = self.pb_service.list_records(
+			self.unlocked_collection, 1, len(achievement_ids), f"user = '{user_id}' && ({achievements})"
+		)
+		return {record.get('achievement') for record in result.get('items', [])}
+
+	def evaluate(self, user_id: str, token: Optional[str] = None) -> List[Dict[str, Any]]:
+		"""
+		Unlock every achievement the user has newly reached
+		Candidates are checked against PocketBase first, as another worker may have unlocked them
+		(a unique index on user_achievements (user, achievement) closes the remaining race)
+		With a token the user_achievements records are created concurrently in one batch
+		Returns the created records; none while the user's total is still loading, as the
+		background load evaluates the user itself once it is done
+		"""
+		state = self._user(user_id, token)
+		if state is None:
+			return []
+		if not self._catalog_loaded:
+			self.refresh_catalog()
+		earned = self._newly_earned(state, state['total'] / self.units_per_hour)
+		if not earned:
+			return []
+
+		# Claim them first so a concurrent evaluation in this process cannot create duplicates
+		earned_ids = [achievement['id'] for achievement in earned]
+		with self._lock:
+			state['unlocked'].update(earned_ids)
+
+		try:
+			existing = self._already_unlocked(user_id, earned_ids)
+			unlocked_at = datetime.now(timezone.utc).isoformat()
+			payloads = [
+				{'user': user_id, 'achievement': achievement_id, 'unlockedAt': unlocked_at}
+				for achievement_id in earned_ids if achievement_id not in existing
+			]
+			if token and len(payloads) > 1:
+				# Imported here: asyncio is only needed once a stop unlocks several achievements at once
+				from services.async_pocketbase_service import async_pocketbase_service
+				async_service = (self.async_service or async_pocketbase_service).with_token(token)
+				return async_service.gather(*[
+					async_service.create_record(self.unlocked_collection, payload) for payload in payloads
+				])
+			return [self.pb_service.create_record(self.unlocked_collection, payload) for payload in payloads]
+		except Exception:
+			# Let the next evaluation retry
+			with self._lock:
+				state['unlocked'].difference_update(earned_ids)
+				state['evaluated'] = None
+			raise
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				'achievements': len(self._achievements),
+				'catalog_loaded': self._catalog_loaded,
+				'users': len(self._users)
+			}
+
+
+# Global instance
+achievement_evaluator = AchievementEvaluator(
+	pocketbase_service, Config.ACTIVE_DURATION_UNITS_PER_HOUR,
+	ttl=Config.ACHIEVEMENT_USER_TTL, max_users=Config.ACHIEVEMENT_MAX_USERS
+)
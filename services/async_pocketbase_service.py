@@ -0,0 +1,229 @@
+"""
+Async PocketBase service for concurrent upstream fan-out
+Mirrors the record methods of PocketBaseService on top of httpx.AsyncClient; calls go through
+the sync service's circuit breaker and are recorded in the same upstream metrics
+"""
+
+from pocketbase.errors import ClientResponseError
+from pocketbase.models.record import Record
+from typing import Optional, Dict, Any, List, Awaitable
+from urllib.parse import quote
+import asyncio
+import copy
+import httpx
+import os
+import threading
+
+from config import Config
+from services.circuit_breaker import CircuitBreaker
+from services.metrics import metrics
+from services.pocketbase_pool import PoolTimeoutError
+from services.pocketbase_service import pocketbase_service, serialize_record
+
+
+class AsyncPocketBaseService:
+	"""
+	Async counterpart of PocketBaseService
+
+	All instances created through with_token() share one AsyncClient (and its keep-alive
+	connections) running on a background event loop, so sync Flask views can fan out with:
+
+		pb = async_pocketbase_service.with_token(token)
+		user, targets = pb.gather(
+			pb.get_record("users", user_id),
+			pb.list_records("study_targets", filter_query=f"user = '{user_id}'")
+		)
+	"""
+
+	def __init__(self, base_url: Optional[str] = None, token: Optional[str] = None,
+				 max_connections: int = Config.POCKETBASE_POOL_SIZE,
+				 timeout: float = Config.POCKETBASE_REQUEST_TIMEOUT,
+				 pool_timeout: float = Config.POCKETBASE_POOL_TIMEOUT,
+				 breaker: Optional[CircuitBreaker] = None):
+		self.base_url = (base_url or os.getenv('POCKETBASE_URL', 'http://127.0.0.1:8090')).rstrip('/')
+		self.token = token
+		# Sized like the sync client pool: at most max_connections requests in flight, and a
+		# request waiting longer than pool_timeout for a connection fails like a pool checkout
+		self.max_connections = max_connections
+		self.timeout = timeout
+		self.pool_timeout = pool_timeout
+		# Shared with the sync service, so both see PocketBase as up or down together
+		self.breaker = breaker or pocketbase_service.breaker
+		self._shared: Dict[str, Any] = {'loop': None, 'client': None, 'lock': threading.Lock()}
+
+	def with_token(self, token: Optional[str]) -> 'AsyncPocketBaseService':
+		"""Return a view of this service authenticated as `token`, sharing the same connections"""
+		bound = copy.copy(self)
+		bound.token = token
+		return bound
+
+	# Event loop bridge for sync callers
+	def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+		shared = self._shared
+		with shared['lock']:
+			if shared['loop'] is None:
+				loop = asyncio.new_event_loop()
+				threading.Thread(target=loop.run_forever, name="pocketbase-async", daemon=True).start()
+				shared['loop'] = loop
+			return shared['loop']
+
+	def run(self, coro: Awaitable[Any]) -> Any:
+		"""Run a coroutine on the service loop and block until it completes"""
+		return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+	def gather(self, *coros: Awaitable[Any]) -> List[Any]:
+		"""Run coroutines concurrently on the service loop and return their results in order"""
+		async def _gather():
+			return await asyncio.gather(*coros)
+		return self.run(_gather())
+
+	def close(self) -> None:
+		"""Close the shared HTTP client and stop the background loop"""
+		shared = self._shared
+		if shared['client'] is not None:
+			self.run(shared['client'].aclose())
+			shared['client'] = None
+		if shared['loop'] is not None:
+			shared['loop'].call_soon_threadsafe(shared['loop'].stop)
+			shared['loop'] = None
+
+	# HTTP plumbing
+	def _client(self) -> httpx.AsyncClient:
+		shared = self._shared
+		if shared['client'] is None:
+			shared['client'] = httpx.AsyncClient(
+				base_url=self.base_url,
+				timeout=httpx.Timeout(self.timeout, pool=self.pool_timeout),
+				limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+			)
+		return shared['client']
+
+	async def _send(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+					body: Optional[Dict[str, Any]] = None) -> Any:
+		"""Send a request through the circuit breaker"""
+		return await self.breaker.call_async(self._request, method, path, params, body)
+
+	async def _request(self, method: str, path: str, params: Optional[Dict[str, Any]],
+					   body: Optional[Dict[str, Any]]) -> Any:
+		"""Send a request and decode the JSON body, raising ClientResponseError like the sync SDK"""
+		headers = {'Authorization': self.token} if self.token else None
+		try:
+			response = await self._client().request(method, path, params=params, json=body, headers=headers)
+		except httpx.PoolTimeout as e:
+			# Saturated locally, not an upstream failure
+			raise PoolTimeoutError(f"No PocketBase connection available after {self.pool_timeout}s") from e
+		except Exception as e:
+			raise ClientResponseError(f"General request error. Original error: {e}", original_error=e)
+		try:
+			data = response.json()
+		except Exception:
+			data = None
+		if response.status_code >= 400:
+			raise ClientResponseError(
+				f"Response error. Status code:{response.status_code}",
+				url=str(response.url),
+				status=response.status_code,
+				data=data
+			)
+		return data
+
+	@staticmethod
+	def _records_path(collection: str, record_id: Optional[str] = None) -> str:
+		path = f"/api/collections/{quote(collection)}/records"
+		return f"{path}/{quote(record_id)}" if record_id else path
+
+	# Same surface as PocketBaseService
+	@metrics.track_upstream('users')
+	async def authenticate(self, email: str, password: str) -> Dict[str, Any]:
+		"""Authenticate user with email/password"""
+		try:
+			data = await self._send('POST', "/api/collections/users/auth-with-password",
+									body={'identity': email, 'password': password})
+			record = Record(data.get('record', {}))
+			return {
+				'record': serialize_record(record),
+				'token': data.get('token'),
+				'user_id': record.id,
+				'isValid': bool(data.get('token'))
+			}
+		except ClientResponseError as e:
+			return {
+				'isValid': False,
+				'error': str(e)
+			}
+
+	@metrics.track_upstream()
+	async def create_record(self, collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
+		"""Create a record in a collection"""
+		try:
+			response = await self._send('POST', self._records_path(collection), body=data)
+			return serialize_record(Record(response))
+		except ClientResponseError as e:
+			raise Exception(f"Failed to create record: {e}")
+
+	@metrics.track_upstream()
+	async def get_record(self, collection: str, record_id: str, expand: Optional[str] = None,
+						 fields: Optional[str] = None) -> Dict[str, Any]:
+		"""Get a record by ID"""
+		try:
+			query_params = {}
+			if expand:
+				query_params['expand'] = expand
+			if fields:
+				query_params['fields'] = fields
+
+			response = await self._send('GET', self._records_path(collection, record_id), params=query_params)
+			return serialize_record(Record(response))
+		except ClientResponseError as e:
+			raise Exception(f"Failed to get record: {e}")
+
+	@metrics.track_upstream()
+	async def update_record(self, collection: str, record_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+		"""Update a record"""
+		try:
+			response = await self._send('PATCH', self._records_path(collection, record_id), body=data)
+			return serialize_record(Record(response))
+		except ClientResponseError as e:
+			raise Exception(f"Failed to update record: {e}")
+
+	@metrics.track_upstream()
+	async def delete_record(self, collection: str, record_id: str) -> bool:
+		"""Delete a record"""
+		try:
+			await self._send('DELETE', self._records_path(collection, record_id))
+			return True
+		except ClientResponseError as e:
+			raise Exception(f"Failed to delete record: {e}")
+
+	@metrics.track_upstream()
+	async def list_records(self, collection: str, page: int = 1, per_page: int = 30,
+						   filter_query: str = "", sort: str = "", expand: Optional[str] = None,
+						   fields: Optional[str] = None) -> Dict[str, Any]:
+		"""List records from a collection"""
+		try:
+			query_params = {
+				'page': page,
+				'perPage': per_page,
+				'filter': filter_query,
+				'sort': sort
+			}
+			if expand:
+				query_params['expand'] = expand
+			if fields:
+				query_params['fields'] = fields
+
+			response = await self._send('GET', self._records_path(collection), params=query_params)
+
+			return {
+				'page': response.get('page', 1),
+				'per_page': response.get('perPage', 0),
+				'total_items': response.get('totalItems', 0),
+				'total_pages': response.get('totalPages', 0),
+				'items': [serialize_record(Record(item)) for item in response.get('items') or []]
+			}
+		except ClientResponseError as e:
+			raise Exception(f"Failed to list records: {e}")
+
+
+# Global instance
+async_pocketbase_service = AsyncPocketBaseService()
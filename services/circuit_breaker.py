@@ -0,0 +1,129 @@
+"""
+Circuit breaker for PocketBase calls
+After `failure_threshold` consecutive upstream failures the circuit opens and calls fail fast
+for `reset_timeout` seconds; then a single trial call decides whether it closes again
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+import threading
+import time
+
+from pocketbase.errors import ClientResponseError
+
+T = TypeVar('T')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+	"""Raised instead of calling PocketBase while the circuit is open"""
+	pass
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+	"""Connection errors, timeouts and 5xx responses count; 4xx answers mean PocketBase is up"""
+	if isinstance(error, ClientResponseError):
+		return error.status == 0 or error.status >= 500
+	return False
+
+
+class CircuitBreaker:
+	"""Consecutive-failure circuit breaker, shared by every thread of the process"""
+
+	def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0,
+				 is_failure: Callable[[BaseException], bool] = is_upstream_failure):
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+		self.is_failure = is_failure
+		self.state = CLOSED
+		self._failures = 0
+		self._opened_at = 0.0
+		self._trial_running = False
+		self._stats = {'rejected': 0, 'opened': 0}
+		self._lock = threading.Lock()
+
+	@property
+	def enabled(self) -> bool:
+		return self.failure_threshold > 0
+
+	def _before_call(self) -> bool:
+		"""Raise if the call must fail fast; returns True when it is the half-open trial"""
+		with self._lock:
+			if self.state == CLOSED:
+				return False
+			if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+				self.state = HALF_OPEN
+			if self.state == HALF_OPEN and not self._trial_running:
+				self._trial_running = True
+				return True
+			self._stats['rejected'] += 1
+			retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+		raise CircuitOpenError(f"PocketBase is unavailable, retry in {retry_in:.0f}s")
+
+	def _on_success(self, trial: bool) -> None:
+		with self._lock:
+			self._failures = 0
+			if trial:
+				self._trial_running = False
+				self.state = CLOSED
+
+	def _on_failure(self, trial: bool) -> None:
+		with self._lock:
+			self._failures += 1
+			if trial:
+				self._trial_running = False
+			if trial or (self.state == CLOSED and self._failures >= self.failure_threshold):
+				self.state = OPEN
+				self._opened_at = time.monotonic()
+				self._stats['opened'] += 1
+
+	def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+		"""Run `fn` through the breaker"""
+		if not self.enabled:
+			return fn(*args, **kwargs)
+		trial = self._before_call()
+		try:
+			result = fn(*args, **kwargs)
+		except BaseException as e:
+			if self.is_failure(e):
+				self._on_failure(trial)
+			else:
+				# PocketBase answered, so it is up
+				self._on_success(trial)
+			raise
+		self._on_success(trial)
+		return result
+
+	async def call_async(self, fn: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+		"""Await `fn` through the breaker (same state as call(), for the async service)"""
+		if not self.enabled:
+			return await fn(*args, **kwargs)
+		trial = self._before_call()
+		try:
+			result = await fn(*args, **kwargs)
+		except BaseException as e:
+			if self.is_failure(e):
+				self._on_failure(trial)
+			else:
+				self._on_success(trial)
+			raise
+		self._on_success(trial)
+		return result
+
+	def reset(self) -> None:
+		with self._lock:
+			self.state = CLOSED
+			self._failures = 0
+			self._trial_running = False
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			return dict(
+				self._stats,
+				state=self.state,
+				consecutive_failures=self._failures,
+				failure_threshold=self.failure_threshold,
+				reset_timeout=self.reset_timeout
+			)
@@ -0,0 +1,257 @@
+"""
+Server-Sent Events for leaderboard and room occupancy changes
+One producer thread diffs the in-memory leaderboard index and room presence on an interval
+and publishes each change once; the broker fans the serialized frame out to every connection
+"""
+
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Set, Tuple
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+
+from config import Config
+from services.leaderboard_index import LeaderboardIndex, leaderboard_index
+from services.metrics import Histogram, metrics
+from services.room_presence import RoomPresence, room_presence
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ('leaderboard', 'rooms')
+
+# Fan-out latency buckets (seconds): delivery is expected within milliseconds
+FANOUT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def format_event(event: str, data: Any, event_id: Optional[int] = None) -> str:
+	"""One SSE frame"""
+	lines = [f'id: {event_id}'] if event_id is not None else []
+	lines.append(f'event: {event}')
+	lines.append('data: ' + json.dumps(data, separators=(',', ':'), default=str))
+	return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+	"""One connection's bounded queue of (frame, published_at)"""
+
+	def __init__(self, topics: Iterable[str], max_queue: int = 100):
+		self.topics = frozenset(topics)
+		self.queue: 'queue.Queue[Tuple[str, float]]' = queue.Queue(max_queue)
+		# Set when the client fell too far behind; it is disconnected and reconnects
+		self.overflowed = False
+
+
+class EventBroker:
+	"""Fans published events out to every subscription of the topic"""
+
+	def __init__(self, max_connections: int = 500, max_queue: int = 100):
+		self.max_connections = max_connections
+		self.max_queue = max_queue
+		self._subscriptions: Set[Subscription] = set()
+		self._next_id = 0
+		self.published = 0
+		self.delivered = 0
+		self.dropped = 0
+		self._fanout = Histogram(FANOUT_BUCKETS)
+		self._lock = threading.Lock()
+
+	def subscribe(self, topics: Iterable[str]) -> Optional[Subscription]:
+		"""A new subscription, or None when max_connections is reached"""
+		subscription = Subscription(topics, self.max_queue)
+		with self._lock:
+			if len(self._subscriptions) >= self.max_connections:
+				return None
+			self._subscriptions.add(subscription)
+		return subscription
+
+	def unsubscribe(self, subscription: Subscription) -> None:
+		with self._lock:
+			self._subscriptions.discard(subscription)
+
+	def publish(self, topic: str, data: Any) -> int:
+		"""Serialize an event once and queue it for every subscriber; returns the number of subscribers reached"""
+		with self._lock:
+			subscriptions = [s for s in self._subscriptions if topic in s.topics]
+			self._next_id += 1
+			event_id = self._next_id
+			self.published += 1
+		if not subscriptions:
+			return 0
+
+		item = (format_event(topic, data, event_id), time.perf_counter())
+		reached = 0
+		for subscription in subscriptions:
+			try:
+				subscription.queue.put_nowait(item)
+				reached += 1
+			except queue.Full:
+				subscription.overflowed = True
+				with self._lock:
+					self.dropped += 1
+		return reached
+
+	def delivered_frame(self, published_at: float) -> None:
+		"""Record that a connection is writing a frame out (publish-to-write latency)"""
+		latency = time.perf_counter() - published_at
+		with self._lock:
+			self.delivered += 1
+			self._fanout.observe(latency)
+
+	def listen(self, subscription: Subscription, initial: Iterable[str] = (),
+			   keepalive: float = 15.0) -> Iterator[str]:
+		"""SSE frames for one connection until it disconnects or overflows"""
+		try:
+			yield f'retry: {int(keepalive * 1000)}\n\n'
+			yield from initial
+			while not subscription.overflowed:
+				try:
+					frame, published_at = subscription.queue.get(timeout=keepalive)
+				except queue.Empty:
+					yield ': keepalive\n\n'
+					continue
+				self.delivered_frame(published_at)
+				yield frame
+		finally:
+			self.unsubscribe(subscription)
+
+	@property
+	def connections(self) -> int:
+		with self._lock:
+			return len(self._subscriptions)
+
+	def fanout_histogram(self) -> Histogram:
+		with self._lock:
+			return self._fanout.copy()
+
+	def stats(self) -> Dict[str, Any]:
+		"""Connections, event counters and mean fan-out latency"""
+		with self._lock:
+			by_topic = {topic: sum(1 for s in self._subscriptions if topic in s.topics) for topic in TOPICS}
+			return {
+				'connections': len(self._subscriptions),
+				'connections_by_topic': by_topic,
+				'max_connections': self.max_connections,
+				'published': self.published,
+				'delivered': self.delivered,
+				'dropped': self.dropped,
+				'fanout_mean_seconds': self._fanout.sum / self._fanout.count if self._fanout.count else None
+			}
+
+
+class ChangeProducer:
+	"""The single shared producer: diffs leaderboard ranks and room occupancy and publishes the changes"""
+
+	def __init__(self, broker: EventBroker, leaderboard: LeaderboardIndex, presence: RoomPresence,
+				 interval: float = 2.0, leaderboard_size: int = 50):
+		self.broker = broker
+		self.leaderboard = leaderboard
+		self.presence = presence
+		self.interval = interval
+		self.leaderboard_size = leaderboard_size
+		self._ranks: Optional[Dict[str, Dict[str, Any]]] = None
+		self._occupancy: Optional[Dict[str, int]] = None
+		self._lock = threading.Lock()
+		self._stop_event = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def _leaderboard_ranks(self) -> Dict[str, Dict[str, Any]]:
+		self.leaderboard.ensure_fresh()
+		score_field = self.leaderboard.score_field
+		return {
+			entry.get('user') or entry.get('id'): {
+				'user': entry.get('user') or entry.get('id'),
+				'rank': entry['rank'],
+				score_field: entry.get(score_field)
+			}
+			for entry in self.leaderboard.top(self.leaderboard_size)
+		}
+
+	def poll(self) -> int:
+		"""Publish what changed since the last poll; returns the number of events published"""
+		published = 0
+		with self._lock:
+			try:
+				ranks = self._leaderboard_ranks()
+			except Exception as e:
+				logger.warning("Leaderboard snapshot for event stream failed: %s", e)
+				ranks = self._ranks
+			occupancy = self.presence.occupancy()
+			previous_ranks, previous_occupancy = self._ranks, self._occupancy
+			self._ranks, self._occupancy = ranks, occupancy
+
+		if ranks is not None and previous_ranks is not None:
+			changes = [entry for user, entry in ranks.items() if previous_ranks.get(user) != entry]
+			changes.extend({'user': user, 'rank': None} for user in previous_ranks if user not in ranks)
+			if changes:
+				self.broker.publish('leaderboard', {'changes': sorted(changes, key=lambda c: c['rank'] or 0)})
+				published += 1
+
+		if previous_occupancy is not None:
+			rooms = {room_id: count for room_id, count in occupancy.items() if previous_occupancy.get(room_id) != count}
+			# Rooms forgotten by the presence tracker are empty
+			rooms.update({room_id: 0 for room_id, count in previous_occupancy.items() if room_id not in occupancy and count})
+			if rooms:
+				self.broker.publish('rooms', {'rooms': rooms})
+				published += 1
+		return published
+
+	def snapshot(self, topics: Iterable[str]) -> List[str]:
+		"""Current state as initial frames for a new connection, so clients can stop polling"""
+		with self._lock:
+			ranks, occupancy = self._ranks, self._occupancy
+		if ranks is None or occupancy is None:
+			self.poll()
+			with self._lock:
+				ranks, occupancy = self._ranks, self._occupancy
+		frames = []
+		if 'leaderboard' in topics and ranks is not None:
+			entries = sorted(ranks.values(), key=lambda entry: entry['rank'])
+			frames.append(format_event('leaderboard', {'snapshot': True, 'changes': entries}))
+		if 'rooms' in topics:
+			frames.append(format_event('rooms', {'snapshot': True, 'rooms': occupancy or {}}))
+		return frames
+
+	def start(self) -> None:
+		"""Start the producer thread (idempotent; disabled when interval <= 0)"""
+		if self._thread is not None or self.interval <= 0:
+			return
+		with self._lock:
+			if self._thread is not None:
+				return
+			self._thread = threading.Thread(target=self._run, name="event-stream-producer", daemon=True)
+			self._thread.start()
+		atexit.register(self.stop)
+
+	def stop(self) -> None:
+		self._stop_event.set()
+		if self._thread is not None:
+			self._thread.join(timeout=self.interval)
+
+	def _run(self) -> None:
+		while not self._stop_event.wait(self.interval):
+			# Nothing to diff for when nobody is listening
+			if not self.broker.connections:
+				continue
+			try:
+				self.poll()
+			except Exception as e:
+				logger.exception("Event stream poll failed: %s", e)
+
+
+# Global instances
+event_broker = EventBroker(Config.SSE_MAX_CONNECTIONS, Config.SSE_QUEUE_SIZE)
+change_producer = ChangeProducer(
+	event_broker,
+	leaderboard_index,
+	room_presence,
+	interval=Config.SSE_POLL_INTERVAL,
+	leaderboard_size=Config.SSE_LEADERBOARD_SIZE
+)
+
+metrics.register_gauge('studyleague_sse_connections', 'Open Server-Sent Events connections',
+					   lambda: event_broker.connections)
+metrics.register_histogram('studyleague_sse_fanout_seconds', 'Time from publishing an event to writing it to a connection',
+						   event_broker.fanout_histogram)
+
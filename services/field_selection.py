@@ -0,0 +1,114 @@
+"""
+Field projection for the `fields` query parameter
+A selection such as `id,title,expand.author.username` is sent to PocketBase so it returns less,
+and applied again locally: the SDK fills in keys PocketBase did not return, and relations
+expanded from the user-profile cache never reach PocketBase's field selection
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import re
+
+from pocketbase.utils import camel_to_snake
+
+# Dot-separated field names or `*`; anything else (modifiers, quotes, spaces) is ignored
+_PATH = re.compile(r'^(?:[A-Za-z0-9_]+|\*)(?:\.(?:[A-Za-z0-9_]+|\*))*$')
+
+
+def _camel(name: str) -> str:
+	head, *rest = name.split('_')
+	return head + ''.join(part[:1].upper() + part[1:] for part in rest)
+
+
+class FieldSelection:
+	"""
+	A parsed `fields` parameter as a tree of key -> subtree
+	A None subtree keeps the whole value; `*` matches every key at its level. Names are compared
+	in the snake_case the SDK gives record keys, so `maxParticipants` and `max_participants` agree
+	"""
+
+	def __init__(self, paths: Iterable[str]):
+		self.paths: List[str] = []
+		self.tree: Dict[str, Any] = {}
+		for path in paths:
+			self._add(path)
+
+	@classmethod
+	def parse(cls, fields: Optional[str]) -> Optional['FieldSelection']:
+		"""Selection for a `fields` value, or None when it selects nothing (every field is returned)"""
+		paths = [path.strip() for path in (fields or '').split(',')]
+		paths = [path for path in paths if _PATH.match(path)]
+		return cls(paths) if paths else None
+
+	def _add(self, path: str) -> None:
+		parts = path.split('.')
+		node = self.tree
+		for index, part in enumerate(parts):
+			# Relation names under `expand` are not converted by the SDK, field names are
+			key = part if part == '*' or (index and parts[index - 1] == 'expand') else camel_to_snake(part)
+			if index == len(parts) - 1:
+				node[key] = None
+			elif key not in node:
+				node[key] = {}
+				node = node[key]
+			elif node[key] is None:
+				# Already selected whole
+				return
+			else:
+				node = node[key]
+		self.paths.append(path)
+
+	def including(self, *paths: str) -> 'FieldSelection':
+		"""A copy that also selects `paths` (e.g. keys a route needs for its own work)"""
+		return FieldSelection(self.paths + [path for path in paths if path not in self.paths])
+
+	def upstream(self, *required: str) -> str:
+		"""
+		The `fields` value for PocketBase, plus `required` keys the caller needs before projecting
+		snake_case names are also sent in camelCase, since the SDK converts PocketBase's keys
+		"""
+		names: List[str] = []
+		for path in self.paths + list(required):
+			for name in (path, _camel(path)):
+				if name not in names:
+					names.append(name)
+		return ','.join(names)
+
+	def selects(self, path: str) -> bool:
+		"""Whether a dotted key of a serialized record (`expand.room.room_name`) is kept"""
+		node: Optional[Dict[str, Any]] = self.tree
+		for key in path.split('.'):
+			if node is None:
+				return True
+			if key in node:
+				node = node[key]
+			elif '*' in node:
+				node = node['*']
+			else:
+				return False
+		return True
+
+	def project(self, record: Dict[str, Any]) -> Dict[str, Any]:
+		"""Copy of a serialized record keeping only the selected keys"""
+		return _project(record, self.tree)
+
+	def project_all(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+		"""Lazily project a stream of records"""
+		for record in records:
+			yield _project(record, self.tree)
+
+
+def _project(value: Any, tree: Optional[Dict[str, Any]]) -> Any:
+	if tree is None:
+		return value
+	if isinstance(value, list):
+		return [_project(item, tree) for item in value]
+	if not isinstance(value, dict):
+		return value
+	wildcard = '*' in tree
+	projected = {}
+	for key, item in value.items():
+		if key in tree:
+			projected[key] = _project(item, tree[key])
+		elif wildcard:
+			projected[key] = _project(item, tree['*'])
+	return projected
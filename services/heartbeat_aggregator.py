@@ -0,0 +1,227 @@
+"""
+Write-behind aggregation of study session heartbeats
+Heartbeats are counted in memory and flushed to PocketBase in batches, instead of
+a get + update round trip per heartbeat. Flushes send increments (`active_duration+`),
+so workers that aggregate heartbeats for the same session add up instead of overwriting
+each other
+"""
+
+from contextlib import contextmanager
+from typing import Optional, Dict, Any, Iterator, List
+import atexit
+import logging
+import threading
+import time
+
+from pocketbase.errors import ClientResponseError
+
+from services.pocketbase_service import PocketBaseService
+
+logger = logging.getLogger(__name__)
+
+
+def _is_auth_failure(error: BaseException) -> bool:
+	"""PocketBase rejected the recorded token; retrying with it cannot succeed"""
+	return isinstance(error, ClientResponseError) and error.status in (401, 403)
+
+
+class HeartbeatAggregator:
+	"""Accumulates per-session active durations and flushes them periodically"""
+
+	def __init__(self, pb_service: PocketBaseService, collection_name: str = "study_sessions",
+				 flush_interval: float = 10.0, idle_timeout: float = 300.0):
+		self.pb_service = pb_service
+		self.collection_name = collection_name
+		self.flush_interval = flush_interval
+		self.idle_timeout = idle_timeout
+		self._sessions: Dict[str, Dict[str, Any]] = {}
+		self._lock = threading.Lock()
+		# Held for a whole flush pass so finishing() never races an in-flight write
+		self._flush_lock = threading.Lock()
+		self._last_flush = time.monotonic()
+		self._stop_event = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def owner_of(self, session_id: str) -> Optional[str]:
+		"""User id of a tracked session, or None if the session is not in memory"""
+		with self._lock:
+			entry = self._sessions.get(session_id)
+			return entry['user'] if entry else None
+
+	def track(self, session: Dict[str, Any]) -> None:
+		"""Start aggregating heartbeats for a session record loaded from PocketBase"""
+		duration = session.get('active_duration') or 0
+		active = bool(session.get('active', True))
+		with self._lock:
+			self._sessions.setdefault(session['id'], {
+				'user': session.get('user'),
+				'token': None,
+				# Duration reported to the client: the loaded value plus this process's heartbeats
+				'duration': duration,
+				# Active seconds counted here and not yet added in PocketBase
+				'pending': 0,
+				'active': active,
+				'persisted_active': active,
+				'last_beat': time.monotonic()
+			})
+		self.start()
+
+	def beat(self, session_id: str, is_active: bool, token: Optional[str]) -> Optional[int]:
+		"""Record a heartbeat and return the session's current duration (None if untracked)"""
+		with self._lock:
+			entry = self._sessions.get(session_id)
+			if entry is None:
+				return None
+			if is_active:
+				entry['duration'] += 1
+				entry['pending'] += 1
+			entry['active'] = is_active
+			entry['last_beat'] = time.monotonic()
+			if token:
+				entry['token'] = token
+			return entry['duration']
+
+	@contextmanager
+	def finishing(self, session_id: str) -> Iterator[Optional[int]]:
+		"""
+		Stop tracking a session and yield the active seconds not yet written, so the caller
+		can add them in the closing update (None if nothing is pending)
+		If the update raises, the session is tracked again with its seconds still pending
+		"""
+		with self._flush_lock, self._lock:
+			entry = self._sessions.pop(session_id, None)
+		pending = entry['pending'] if entry is not None else 0
+		try:
+			yield pending or None
+		except BaseException:
+			if entry is not None:
+				self._restore(session_id, entry)
+			raise
+
+	def _restore(self, session_id: str, entry: Dict[str, Any]) -> None:
+		with self._lock:
+			current = self._sessions.get(session_id)
+			if current is None:
+				self._sessions[session_id] = entry
+				return
+			# A heartbeat tracked the session again meanwhile, from the record without these seconds
+			current['duration'] += entry['pending']
+			current['pending'] += entry['pending']
+			if current['token'] is None:
+				current['token'] = entry['token']
+
+	def flush(self) -> int:
+		"""Write every changed session to PocketBase; returns the number of sessions written"""
+		with self._flush_lock:
+			return self._flush()
+
+	def flush_if_due(self) -> int:
+		"""
+		Flush from the calling request once flush_interval has passed since the last flush
+		Background threads and atexit hooks are not reliable on serverless hosts, so heartbeat
+		requests drive the flush as well; a request never waits for a flush already running
+		"""
+		if self.flush_interval <= 0 or time.monotonic() - self._last_flush < self.flush_interval:
+			return 0
+		if not self._flush_lock.acquire(blocking=False):
+			return 0
+		try:
+			return self._flush()
+		finally:
+			self._flush_lock.release()
+
+	def _flush(self) -> int:
+		self._last_flush = time.monotonic()
+		with self._lock:
+			pending: List[Dict[str, Any]] = [
+				{'id': session_id, 'token': entry['token'], 'pending': entry['pending'], 'active': entry['active']}
+				for session_id, entry in self._sessions.items()
+				if entry['pending'] or entry['active'] != entry['persisted_active']
+			]
+
+		written = 0
+		for item in pending:
+			try:
+				self._write(item)
+			except Exception as e:
+				# Keep the entry dirty; it is retried on the next pass
+				logger.warning("Failed to flush heartbeat for session %s: %s", item['id'], e)
+				if _is_auth_failure(e):
+					with self._lock:
+						entry = self._sessions.get(item['id'])
+						# A heartbeat may have brought a fresh token since
+						if entry is not None and entry['token'] == item['token']:
+							entry['token'] = None
+				continue
+			written += 1
+			with self._lock:
+				entry = self._sessions.get(item['id'])
+				if entry is not None:
+					# Heartbeats received during the write stay pending
+					entry['pending'] -= item['pending']
+					entry['persisted_active'] = item['active']
+
+		self._evict_idle()
+		return written
+
+	def _write(self, item: Dict[str, Any]) -> None:
+		"""Add one session's aggregated seconds in PocketBase as the user who sent its heartbeats"""
+		data: Dict[str, Any] = {'active': item['active']}
+		if item['pending']:
+			data['active_duration+'] = item['pending']
+		if not item['token']:
+			raise Exception("no auth token recorded for session")
+		with self.pb_service.authenticated_client(item['token']) as client:
+			client.collection(self.collection_name).update(item['id'], data)
+
+	def _evict_idle(self) -> None:
+		"""
+		Forget sessions that stopped sending heartbeats: clean ones, and dirty ones whose
+		token PocketBase rejected, since they can never be written
+		"""
+		cutoff = time.monotonic() - self.idle_timeout
+		with self._lock:
+			for session_id, entry in list(self._sessions.items()):
+				if entry['last_beat'] >= cutoff:
+					continue
+				dirty = entry['pending'] or entry['active'] != entry['persisted_active']
+				if dirty and entry['token'] is not None:
+					continue
+				if dirty:
+					logger.warning("Dropping %s unflushed heartbeat seconds for session %s: no valid auth token",
+								   entry['pending'], session_id)
+				del self._sessions[session_id]
+
+	def start(self) -> None:
+		"""Start the background flush thread (idempotent; disabled when flush_interval <= 0)"""
+		if self._thread is not None or self.flush_interval <= 0:
+			return
+		with self._lock:
+			if self._thread is not None:
+				return
+			self._thread = threading.Thread(target=self._run, name="heartbeat-flusher", daemon=True)
+			self._thread.start()
+		atexit.register(self.stop)
+
+	def stop(self) -> None:
+		"""Stop the background thread and flush whatever is still pending"""
+		self._stop_event.set()
+		if self._thread is not None:
+			self._thread.join(timeout=self.flush_interval)
+		self.flush()
+
+	def _run(self) -> None:
+		while not self._stop_event.wait(self.flush_interval):
+			try:
+				self.flush()
+			except Exception as e:
+				logger.exception("Heartbeat flush failed: %s", e)
+
+	def stats(self) -> Dict[str, Any]:
+		"""Number of tracked and dirty sessions"""
+		with self._lock:
+			dirty = sum(
+				1 for entry in self._sessions.values()
+				if entry['pending'] or entry['active'] != entry['persisted_active']
+			)
+			return {'tracked': len(self._sessions), 'dirty': dirty}
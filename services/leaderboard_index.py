@@ -0,0 +1,295 @@
+"""
+In-process leaderboard index
+Keeps leaderboard entries ordered by score so top-N, rank and neighbour lookups
+are answered from memory in O(log n) instead of sorting the collection in PocketBase
+"""
+
+from typing import Optional, Dict, Any, List, Tuple, Iterator
+import logging
+import random
+import threading
+import time
+
+from flask import has_app_context
+from pocketbase.errors import ClientResponseError
+
+from config import Config
+from services.pocketbase_service import PocketBaseService, pocketbase_service
+from services.user_profile_cache import public_profile
+
+logger = logging.getLogger(__name__)
+
+
+class _Node:
+	__slots__ = ('key', 'next', 'width')
+
+	def __init__(self, key: Any, level: int):
+		self.key = key
+		self.next: List[Optional['_Node']] = [None] * level
+		self.width: List[int] = [1] * level
+
+
+class IndexableSkipList:
+	"""Sorted collection of unique keys with O(log n) insert, remove, rank and positional access"""
+
+	MAX_LEVEL = 32
+
+	def __init__(self, seed: Optional[int] = None):
+		self._head = _Node(None, self.MAX_LEVEL)
+		self._level = 1
+		self._size = 0
+		self._random = random.Random(seed)
+
+	def __len__(self) -> int:
+		return self._size
+
+	def _random_level(self) -> int:
+		level = 1
+		while level < self.MAX_LEVEL and self._random.random() < 0.5:
+			level += 1
+		return level
+
+	def insert(self, key: Any) -> None:
+		update: List[_Node] = [self._head] * self.MAX_LEVEL
+		steps = [0] * self.MAX_LEVEL
+		node, position = self._head, 0
+		for i in reversed(range(self._level)):
+			while node.next[i] is not None and node.next[i].key < key:
+				position += node.width[i]
+				node = node.next[i]
+			update[i], steps[i] = node, position
+
+		level = self._random_level()
+		if level > self._level:
+			for i in range(self._level, level):
+				self._head.width[i] = self._size + 1
+			self._level = level
+
+		new = _Node(key, level)
+		for i in range(level):
+			new.next[i] = update[i].next[i]
+			update[i].next[i] = new
+			new.width[i] = update[i].width[i] - (position - steps[i])
+			update[i].width[i] = position - steps[i] + 1
+		for i in range(level, self._level):
+			update[i].width[i] += 1
+		self._size += 1
+
+	def remove(self, key: Any) -> None:
+		update: List[_Node] = [self._head] * self.MAX_LEVEL
+		node = self._head
+		for i in reversed(range(self._level)):
+			while node.next[i] is not None and node.next[i].key < key:
+				node = node.next[i]
+			update[i] = node
+
+		target = node.next[0]
+		if target is None or target.key != key:
+			raise KeyError(key)
+		for i in range(self._level):
+			if update[i].next[i] is target:
+				update[i].width[i] += target.width[i] - 1
+				update[i].next[i] = target.next[i]
+			else:
+				update[i].width[i] -= 1
+		self._size -= 1
+
+	def rank(self, key: Any) -> int:
+		"""0-based position of an existing key"""
+		node, position = self._head, 0
+		for i in reversed(range(self._level)):
+			while node.next[i] is not None and node.next[i].key < key:
+				position += node.width[i]
+				node = node.next[i]
+		if node.next[0] is None or node.next[0].key != key:
+			raise KeyError(key)
+		return position
+
+	def _node_at(self, index: int) -> _Node:
+		if not 0 <= index < self._size:
+			raise IndexError(index)
+		node, position = self._head, 0
+		for i in reversed(range(self._level)):
+			while node.next[i] is not None and position + node.width[i] <= index + 1:
+				position += node.width[i]
+				node = node.next[i]
+		return node
+
+	def slice(self, start: int, stop: int) -> Iterator[Any]:
+		"""Keys at positions [start, stop)"""
+		start, stop = max(0, start), min(stop, self._size)
+		if start >= stop:
+			return
+		node: Optional[_Node] = self._node_at(start)
+		for _ in range(stop - start):
+			yield node.key
+			node = node.next[0]
+
+
+class LeaderboardIndex:
+	"""Ordered leaderboard kept in memory and refreshed from PocketBase"""
+
+	def __init__(self, pb_service: PocketBaseService, collection_name: str = "leaderboard",
+				 score_field: str = "total_day", expand: Optional[str] = "user", max_age: float = 900.0):
+		self.pb_service = pb_service
+		self.collection_name = collection_name
+		self.score_field = score_field
+		self.expand = expand
+		self.max_age = max_age
+		self._ordered = IndexableSkipList()
+		self._entries: Dict[str, Tuple[Tuple[float, str], Dict[str, Any]]] = {}
+		self._lock = threading.RLock()
+		self._rebuild_lock = threading.Lock()
+		self.loaded_at: Optional[float] = None
+		self.updated_at: Optional[float] = None
+		# Token of the last request that read the leaderboard, for rebuilds outside a request
+		self._token: Optional[str] = None
+
+	@staticmethod
+	def _user_key(record: Dict[str, Any]) -> str:
+		return record.get('user') or record.get('id', '')
+
+	@staticmethod
+	def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+		"""
+		Entries are served to every caller, but were loaded with one caller's token: keep the
+		expanded user as its public profile, without the email PocketBase shows only to its owner
+		"""
+		user = (record.get('expand') or {}).get('user')
+		if not isinstance(user, dict):
+			return record
+		return dict(record, expand=dict(record['expand'], user=public_profile(user)))
+
+	def _score(self, record: Dict[str, Any]) -> float:
+		try:
+			return float(record.get(self.score_field) or 0)
+		except (TypeError, ValueError):
+			return 0.0
+
+	def _remember_caller(self) -> None:
+		if has_app_context():
+			token = self.pb_service.get_auth_token()
+			if token:
+				self._token = token
+
+	def rebuild(self) -> int:
+		"""Reload every leaderboard record from PocketBase; returns the number of entries"""
+		self._remember_caller()
+		ordered = IndexableSkipList()
+		entries: Dict[str, Tuple[Tuple[float, str], Dict[str, Any]]] = {}
+		for record in self.pb_service.iter_records(self.collection_name, expand=self.expand):
+			record = self._public(record)
+			user_key = self._user_key(record)
+			if user_key in entries:
+				ordered.remove(entries[user_key][0])
+			key = (-self._score(record), user_key)
+			ordered.insert(key)
+			entries[user_key] = (key, record)
+
+		with self._lock:
+			self._ordered, self._entries = ordered, entries
+			self.loaded_at = self.updated_at = time.time()
+		return len(entries)
+
+	def ensure_fresh(self) -> None:
+		"""Rebuild if the index was never loaded or is older than max_age"""
+		if not self._is_stale():
+			return
+		with self._rebuild_lock:
+			# Another request may have rebuilt it while we waited
+			if self._is_stale():
+				self._rebuild_as_caller()
+	
+	def _rebuild_as_caller(self) -> None:
+		"""
+		Rebuild as the current request's user, or, outside a request (the event stream's
+		producer thread), as the last user seen reading the leaderboard
+		"""
+		token = self._token
+		if has_app_context() or not token:
+			self.rebuild()
+			return
+		try:
+			with self.pb_service.acting_as(token):
+				self.rebuild()
+		except Exception as e:
+			# The service wraps ClientResponseError; an expired token is dropped so the next
+			# request's token is used instead
+			upstream = e.__context__
+			if isinstance(upstream, ClientResponseError) and upstream.status in (401, 403) and self._token == token:
+				self._token = None
+			raise
+	
+	def _is_stale(self) -> bool:
+		return self.loaded_at is None or time.time() - self.loaded_at > self.max_age
+
+	def upsert(self, record: Dict[str, Any]) -> None:
+		"""Insert or move a single leaderboard record"""
+		record = self._public(record)
+		user_key = self._user_key(record)
+		key = (-self._score(record), user_key)
+		with self._lock:
+			previous = self._entries.get(user_key)
+			if previous is not None:
+				self._ordered.remove(previous[0])
+			self._ordered.insert(key)
+			self._entries[user_key] = (key, record)
+			self.updated_at = time.time()
+
+	def refresh_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+		"""Re-read one user's leaderboard record (e.g. after a session stops) and update the index"""
+		if self.loaded_at is None:
+			return None
+		self._remember_caller()
+		records = self.pb_service.list_records(
+			self.collection_name, 1, 1, f"user = '{user_id}'", "", self.expand
+		).get('items', [])
+		if records:
+			self.upsert(records[0])
+			return self._public(records[0])
+		return None
+
+	def _ranked(self, keys: Iterator[Tuple[float, str]], first_rank: int) -> List[Dict[str, Any]]:
+		return [
+			dict(self._entries[key[1]][1], rank=rank)
+			for rank, key in enumerate(keys, start=first_rank)
+		]
+
+	def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+		"""Highest scoring entries, best first"""
+		with self._lock:
+			return self._ranked(self._ordered.slice(0, limit), 1)
+
+	def rank_of(self, user_id: str) -> Optional[Dict[str, Any]]:
+		"""1-based rank and entry of a user, or None if the user is not on the leaderboard"""
+		with self._lock:
+			entry = self._entries.get(user_id)
+			if entry is None:
+				return None
+			return dict(entry[1], rank=self._ordered.rank(entry[0]) + 1)
+
+	def around(self, user_id: str, radius: int = 5) -> List[Dict[str, Any]]:
+		"""Entries ranked up to `radius` places above and below a user"""
+		with self._lock:
+			entry = self._entries.get(user_id)
+			if entry is None:
+				return []
+			position = self._ordered.rank(entry[0])
+			start = max(0, position - radius)
+			return self._ranked(self._ordered.slice(start, position + radius + 1), start + 1)
+
+	def stats(self) -> Dict[str, Any]:
+		"""Size and staleness of the index"""
+		now = time.time()
+		with self._lock:
+			return {
+				'size': len(self._ordered),
+				'loaded': self.loaded_at is not None,
+				'age_seconds': now - self.loaded_at if self.loaded_at else None,
+				'seconds_since_update': now - self.updated_at if self.updated_at else None,
+				'max_age_seconds': self.max_age
+			}
+
+
+# Global instance
+leaderboard_index = LeaderboardIndex(pocketbase_service, max_age=Config.LEADERBOARD_MAX_AGE)
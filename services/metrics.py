@@ -0,0 +1,315 @@
+"""
+Request and upstream-call metrics in Prometheus text format
+Latency histograms per route, per PocketBaseService method/collection and per in-process
+phase (payload validation, record serialization), error counters and in-flight gauges,
+recorded under one lock so each observation costs a few microseconds
+"""
+
+from bisect import bisect_left
+from functools import wraps
+from typing import Optional, Dict, Any, Callable, List, Tuple
+from flask import Flask, Response, g, request
+from config import Config
+import inspect
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+	"""Cumulative-bucket latency histogram (seconds)"""
+	__slots__ = ('buckets', 'counts', 'sum', 'count')
+
+	def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+		self.buckets = buckets
+		self.counts = [0] * (len(buckets) + 1)
+		self.sum = 0.0
+		self.count = 0
+
+	def observe(self, value: float) -> None:
+		self.counts[bisect_left(self.buckets, value)] += 1
+		self.sum += value
+		self.count += 1
+
+	def copy(self) -> 'Histogram':
+		other = Histogram(self.buckets)
+		other.counts = list(self.counts)
+		other.sum, other.count = self.sum, self.count
+		return other
+
+	def cumulative(self) -> List[Tuple[str, int]]:
+		"""(le, count) pairs as Prometheus expects, ending with +Inf"""
+		total = 0
+		pairs = []
+		for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+			total += count
+			pairs.append(('+Inf' if bound == float('inf') else repr(bound), total))
+		return pairs
+
+
+def _labels(**labels: Any) -> str:
+	if not labels:
+		return ''
+	escaped = (
+		f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+		for name, value in labels.items()
+	)
+	return '{' + ','.join(escaped) + '}'
+
+
+class MetricsRegistry:
+	"""Per-route and per-PocketBase-call latency, errors and in-flight counts"""
+
+	def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, enabled: bool = True):
+		self.buckets = buckets
+		self.enabled = enabled
+		self._requests: Dict[Tuple[str, str], Histogram] = {}
+		self._responses: Dict[Tuple[str, str, int], int] = {}
+		self._errors: Dict[Tuple[str, str], int] = {}
+		self._in_flight: Dict[str, int] = {}
+		self._upstream: Dict[Tuple[str, str], Histogram] = {}
+		self._upstream_errors: Dict[Tuple[str, str], int] = {}
+		self._upstream_in_flight = 0
+		self._phases: Dict[Tuple[str, str], Histogram] = {}
+		# Per thread: the phase being timed, phase seconds spent so far (subtracted from the
+		# PocketBase call they ran inside) and the current request's seconds per phase
+		self._local = threading.local()
+		self._gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+		self._histograms: Dict[str, Tuple[str, Callable[[], Histogram]]] = {}
+		self._lock = threading.Lock()
+
+	# Requests
+	def observe_request(self, route: str, method: str, status: int, seconds: float) -> None:
+		with self._lock:
+			histogram = self._requests.get((route, method))
+			if histogram is None:
+				histogram = self._requests[(route, method)] = Histogram(self.buckets)
+			histogram.observe(seconds)
+			key = (route, method, status)
+			self._responses[key] = self._responses.get(key, 0) + 1
+			if status >= 500:
+				self._errors[(route, method)] = self._errors.get((route, method), 0) + 1
+
+	def _before_request(self) -> None:
+		route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+		g._metrics = [route, time.perf_counter(), False]
+		self._local.request_phases = {}
+		with self._lock:
+			self._in_flight[route] = self._in_flight.get(route, 0) + 1
+
+	def _after_request(self, response: Response) -> Response:
+		state = g.get('_metrics')
+		if state is not None:
+			state[2] = True
+			self.observe_request(state[0], request.method, response.status_code, time.perf_counter() - state[1])
+		return response
+
+	def _teardown_request(self, exception: Optional[BaseException] = None) -> None:
+		state = g.pop('_metrics', None)
+		if state is None:
+			return
+		# One observation per phase and request: per-call timings would cost more than small calls
+		phases, self._local.request_phases = getattr(self._local, 'request_phases', None), None
+		for phase, seconds in (phases or {}).items():
+			self.observe_phase(phase, state[0], seconds)
+		if not state[2]:
+			# The request failed before a response was produced
+			self.observe_request(state[0], request.method, 500, time.perf_counter() - state[1])
+		with self._lock:
+			self._in_flight[state[0]] -= 1
+
+	def init_app(self, app: Flask) -> None:
+		"""Time every request of the app"""
+		if not self.enabled:
+			return
+		app.before_request(self._before_request)
+		app.after_request(self._after_request)
+		app.teardown_request(self._teardown_request)
+
+	# PocketBase calls
+	def observe_upstream(self, method: str, collection: str, seconds: float, error: bool = False) -> None:
+		with self._lock:
+			histogram = self._upstream.get((method, collection))
+			if histogram is None:
+				histogram = self._upstream[(method, collection)] = Histogram(self.buckets)
+			histogram.observe(seconds)
+			if error:
+				self._upstream_errors[(method, collection)] = self._upstream_errors.get((method, collection), 0) + 1
+
+	def _phase_seconds(self) -> float:
+		return getattr(self._local, 'phase_seconds', 0.0)
+
+	def _upstream_seconds(self, started: float, phase_before: float) -> float:
+		"""Wall time of a PocketBase call minus the serialization timed inside it"""
+		return time.perf_counter() - started - (self._phase_seconds() - phase_before)
+
+	def track_upstream(self, collection: Optional[str] = None):
+		"""
+		Decorator for PocketBaseService and AsyncPocketBaseService methods
+		The collection label is `collection`, or the method's first argument when not given
+		"""
+		def decorator(f):
+			method = f.__name__
+
+			def label_of(args, kwargs) -> str:
+				return collection or (args[0] if args else kwargs.get('collection', ''))
+
+			def finished(label: str, started: float, phase_before: float, failed: bool) -> None:
+				self.observe_upstream(method, label, self._upstream_seconds(started, phase_before), failed)
+				with self._lock:
+					self._upstream_in_flight -= 1
+
+			if inspect.iscoroutinefunction(f):
+				@wraps(f)
+				async def async_wrapper(service, *args, **kwargs):
+					if not self.enabled:
+						return await f(service, *args, **kwargs)
+					label = label_of(args, kwargs)
+					with self._lock:
+						self._upstream_in_flight += 1
+					phase_before = self._phase_seconds()
+					started = time.perf_counter()
+					failed = True
+					try:
+						result = await f(service, *args, **kwargs)
+						failed = False
+						return result
+					finally:
+						finished(label, started, phase_before, failed)
+
+				return async_wrapper
+
+			@wraps(f)
+			def wrapper(service, *args, **kwargs):
+				if not self.enabled:
+					return f(service, *args, **kwargs)
+				label = label_of(args, kwargs)
+				with self._lock:
+					self._upstream_in_flight += 1
+				phase_before = self._phase_seconds()
+				started = time.perf_counter()
+				failed = True
+				try:
+					result = f(service, *args, **kwargs)
+					failed = False
+					return result
+				finally:
+					finished(label, started, phase_before, failed)
+
+			return wrapper
+		return decorator
+
+	# In-process phases
+	def observe_phase(self, phase: str, route: str, seconds: float) -> None:
+		with self._lock:
+			histogram = self._phases.get((phase, route))
+			if histogram is None:
+				histogram = self._phases[(phase, route)] = Histogram(self.buckets)
+			histogram.observe(seconds)
+
+	def track_phase(self, phase: str):
+		"""
+		Decorator timing a function as `phase` (e.g. 'validate', 'serialize')
+		Inside a request the time is summed and observed once per request under its route
+		(outside one, per call under `background`); calls nested inside an already timed
+		phase are not timed again
+		"""
+		def decorator(f):
+			@wraps(f)
+			def wrapper(*args, **kwargs):
+				local = self._local
+				if not self.enabled or getattr(local, 'phase', None) is not None:
+					return f(*args, **kwargs)
+				local.phase = phase
+				started = time.perf_counter()
+				try:
+					return f(*args, **kwargs)
+				finally:
+					seconds = time.perf_counter() - started
+					local.phase = None
+					local.phase_seconds = getattr(local, 'phase_seconds', 0.0) + seconds
+					phases = getattr(local, 'request_phases', None)
+					if phases is not None:
+						phases[phase] = phases.get(phase, 0.0) + seconds
+					else:
+						self.observe_phase(phase, 'background', seconds)
+
+			return wrapper
+		return decorator
+
+	# Exposition
+	def register_gauge(self, name: str, help_text: str, fn: Callable[[], float]) -> None:
+		"""Report the value of `fn()` as a gauge each time metrics are rendered"""
+		self._gauges[name] = (help_text, fn)
+
+	def register_histogram(self, name: str, help_text: str, fn: Callable[[], Histogram]) -> None:
+		"""Report a histogram kept elsewhere (`fn()` returns a consistent copy) each time metrics are rendered"""
+		self._histograms[name] = (help_text, fn)
+
+	def render(self) -> str:
+		"""All metrics in the Prometheus text exposition format"""
+		with self._lock:
+			requests = {key: (h.cumulative(), h.sum, h.count) for key, h in self._requests.items()}
+			upstream = {key: (h.cumulative(), h.sum, h.count) for key, h in self._upstream.items()}
+			phases = {key: (h.cumulative(), h.sum, h.count) for key, h in self._phases.items()}
+			responses = dict(self._responses)
+			errors = dict(self._errors)
+			in_flight = dict(self._in_flight)
+			upstream_errors = dict(self._upstream_errors)
+			upstream_in_flight = self._upstream_in_flight
+
+		lines: List[str] = []
+
+		def histogram(name: str, help_text: str, series: Dict[Tuple[str, ...], Any], label_names: Tuple[str, ...]) -> None:
+			lines.append(f'# HELP {name} {help_text}')
+			lines.append(f'# TYPE {name} histogram')
+			for key, (buckets, total, count) in sorted(series.items()):
+				labels = dict(zip(label_names, key))
+				for le, value in buckets:
+					lines.append(f'{name}_bucket{_labels(**labels, le=le)} {value}')
+				lines.append(f'{name}_sum{_labels(**labels)} {total}')
+				lines.append(f'{name}_count{_labels(**labels)} {count}')
+
+		def simple(name: str, kind: str, help_text: str, series: Dict[Tuple[Any, ...], float], label_names: Tuple[str, ...]) -> None:
+			lines.append(f'# HELP {name} {help_text}')
+			lines.append(f'# TYPE {name} {kind}')
+			for key, value in sorted(series.items()):
+				lines.append(f'{name}{_labels(**dict(zip(label_names, key)))} {value}')
+
+		histogram('studyleague_http_request_duration_seconds', 'Request latency by route',
+				  requests, ('route', 'method'))
+		simple('studyleague_http_responses_total', 'counter', 'Responses by route and status code',
+			   responses, ('route', 'method', 'status'))
+		simple('studyleague_http_errors_total', 'counter', 'Responses with a 5xx status by route',
+			   errors, ('route', 'method'))
+		simple('studyleague_http_requests_in_flight', 'gauge', 'Requests currently being handled by route',
+			   {(route,): value for route, value in in_flight.items()}, ('route',))
+		histogram('studyleague_pocketbase_call_duration_seconds', 'PocketBaseService call latency, record serialization excluded',
+				  upstream, ('method', 'collection'))
+		simple('studyleague_pocketbase_errors_total', 'counter', 'PocketBaseService calls that raised',
+			   upstream_errors, ('method', 'collection'))
+		simple('studyleague_pocketbase_calls_in_flight', 'gauge', 'PocketBaseService calls currently running',
+			   {(): upstream_in_flight}, ())
+		histogram('studyleague_phase_duration_seconds', 'Payload validation and record serialization time per request, by route',
+				  phases, ('phase', 'route'))
+
+		for name, (help_text, fn) in sorted(self._gauges.items()):
+			try:
+				value = fn()
+			except Exception:
+				continue
+			simple(name, 'gauge', help_text, {(): value}, ())
+
+		for name, (help_text, fn) in sorted(self._histograms.items()):
+			try:
+				h = fn()
+			except Exception:
+				continue
+			histogram(name, help_text, {(): (h.cumulative(), h.sum, h.count)}, ())
+
+		return '\n'.join(lines) + '\n'
+
+
+# Global instance
+metrics = MetricsRegistry(enabled=Config.METRICS_ENABLED)
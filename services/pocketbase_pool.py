@@ -0,0 +1,99 @@
+"""
+Bounded pool of PocketBase clients
+Each client owns its auth store and a keep-alive HTTP connection, so concurrent
+requests never share (and clobber) each other's tokens
+"""
+
+from pocketbase import PocketBase
+from queue import LifoQueue, Empty
+from typing import Optional, Dict, Any
+import httpx
+import threading
+import time
+
+
+class PoolTimeoutError(Exception):
+	"""Raised when no PocketBase client becomes free within the wait timeout"""
+	pass
+
+
+class PocketBaseClientPool:
+	"""Thread-safe pool of PocketBase clients checked out per request"""
+
+	def __init__(self, base_url: str, size: int = 10, timeout: float = 5.0, collect_stats: bool = True,
+				 request_timeout: float = 120.0):
+		self.base_url = base_url
+		self.size = max(1, size)
+		self.timeout = timeout
+		self.request_timeout = request_timeout
+		self.collect_stats = collect_stats
+		self._idle: LifoQueue = LifoQueue()
+		self._created = 0
+		self._lock = threading.Lock()
+		self._stats = {
+			'checkouts': 0,
+			'timeouts': 0,
+			'in_use': 0,
+			'wait_total_ms': 0.0,
+			'wait_max_ms': 0.0
+		}
+
+	def _new_client(self) -> PocketBase:
+		"""Create a client with its own keep-alive HTTP connection"""
+		http_client = httpx.Client(limits=httpx.Limits(max_connections=1, max_keepalive_connections=1))
+		return PocketBase(self.base_url, timeout=self.request_timeout, http_client=http_client)
+
+	def checkout(self, timeout: Optional[float] = None) -> PocketBase:
+		"""Borrow a client, creating one if the pool is not full yet, else wait for a free one"""
+		started = time.perf_counter()
+		client = None
+		try:
+			client = self._idle.get_nowait()
+		except Empty:
+			with self._lock:
+				if self._created < self.size:
+					self._created += 1
+					client = self._new_client()
+			if client is None:
+				try:
+					client = self._idle.get(timeout=self.timeout if timeout is None else timeout)
+				except Empty:
+					with self._lock:
+						self._stats['timeouts'] += 1
+					raise PoolTimeoutError(f"No PocketBase client available after {self.timeout}s (pool size {self.size})")
+
+		with self._lock:
+			self._stats['checkouts'] += 1
+			self._stats['in_use'] += 1
+			if self.collect_stats:
+				waited_ms = (time.perf_counter() - started) * 1000
+				self._stats['wait_total_ms'] += waited_ms
+				self._stats['wait_max_ms'] = max(self._stats['wait_max_ms'], waited_ms)
+		return client
+
+	def checkin(self, client: PocketBase) -> None:
+		"""Return a client to the pool with its auth state wiped"""
+		client.auth_store.clear()
+		with self._lock:
+			self._stats['in_use'] -= 1
+		self._idle.put(client)
+
+	def close(self) -> None:
+		"""Close the HTTP connections of all idle clients"""
+		while True:
+			try:
+				client = self._idle.get_nowait()
+			except Empty:
+				break
+			client.http_client.close()
+			with self._lock:
+				self._created -= 1
+
+	def stats(self) -> Dict[str, Any]:
+		"""Pool occupancy and checkout-latency statistics"""
+		with self._lock:
+			stats = dict(self._stats)
+			stats['size'] = self.size
+			stats['created'] = self._created
+			stats['wait_avg_ms'] = stats['wait_total_ms'] / stats['checkouts'] if stats['checkouts'] else 0.0
+			return stats
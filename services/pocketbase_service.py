@@ -3,16 +3,75 @@ PocketBase service for simple token-based authentication
 Mirrors JavaScript PocketBase SDK behavior
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from flask import Flask, g, has_app_context
 from pocketbase import PocketBase
 from pocketbase.errors import ClientResponseError
-from typing import Optional, Dict, Any, Union
+from pocketbase.models.record import Record
+from typing import Optional, Dict, Any, Union, Iterator, Tuple, Callable, Hashable
+from config import Config
+from services.circuit_breaker import CircuitBreaker
+from services.metrics import metrics
+from services.pocketbase_pool import PocketBaseClientPool
+from services.single_flight import SingleFlight
+from services.token_cache import TokenCache
 import os
+import threading
+import time
 
+# Per-collection field layout: (field count, keys that may hold JSON containers needing a shallow copy)
+_container_layouts: Dict[Optional[str], Tuple[int, Tuple[str, ...]]] = {}
+
+@metrics.track_phase('serialize')
 def serialize_record(record) -> Dict[str, Any]:
     """Helper function to properly serialize PocketBase records including expanded relations"""
     if not record:
         return {}
     
+    # Fast path: SDK records only hold JSON values, Records can only appear under `expand`
+    if type(record) is Record:
+        return _serialize_sdk_record(record)
+    
+    return _serialize_object(record)
+
+def _serialize_sdk_record(record: Record) -> Dict[str, Any]:
+    """Serialize an SDK Record using its collection's cached field layout"""
+    result = record.__dict__.copy()
+    
+    # Nullable JSON fields count as containers; a different field count means the schema changed
+    collection = result.get('collection_name')
+    layout = _container_layouts.get(collection)
+    if layout is None or layout[0] != len(result):
+        layout = (len(result), tuple(
+            key for key, value in result.items()
+            if key != 'expand' and (value is None or isinstance(value, (dict, list)))
+        ))
+        _container_layouts[collection] = layout
+    for key in layout[1]:
+        value = result.get(key)
+        if isinstance(value, dict):
+            result[key] = dict(value)
+        elif isinstance(value, list):
+            result[key] = list(value)
+    
+    expand = result.get('expand')
+    if isinstance(expand, dict):
+        result['expand'] = {key: _serialize_relation(value) for key, value in expand.items()}
+    return result
+
+def _serialize_relation(value):
+    """Serialize an expanded relation: a single record or a list of records"""
+    if type(value) is Record:
+        return _serialize_sdk_record(value)
+    if isinstance(value, list):
+        return [serialize_record(item) if hasattr(item, '__dict__') and hasattr(item, 'id') else item for item in value]
+    if hasattr(value, '__dict__') and hasattr(value, 'id'):
+        return serialize_record(value)
+    return value
+
+def _serialize_object(record) -> Dict[str, Any]:
+    """Generic serializer for arbitrary record-like objects"""
     # Start with the record's dictionary
     result = record.__dict__.copy() if hasattr(record, '__dict__') else {}
     
@@ -25,6 +84,8 @@ def serialize_record(record) -> Dict[str, Any]:
             for sub_key, sub_value in value.items():
                 if hasattr(sub_value, '__dict__') and hasattr(sub_value, 'id'):  # Record object
                     serialized_dict[sub_key] = serialize_record(sub_value)
+                elif isinstance(sub_value, list):  # Multi-relation expand
+                    serialized_dict[sub_key] = _serialize_relation(sub_value)
                 else:
                     serialized_dict[sub_key] = sub_value
             result[key] = serialized_dict
@@ -37,10 +98,122 @@ def serialize_record(record) -> Dict[str, Any]:
 class PocketBaseService:
 	"""Simple PocketBase service that mirrors JavaScript SDK behavior"""
 	
-	def __init__(self, base_url: Optional[str] = None):
+	def __init__(self, base_url: Optional[str] = None, token_cache: Optional[TokenCache] = None,
+				 pool: Optional[PocketBaseClientPool] = None, breaker: Optional[CircuitBreaker] = None,
+				 single_flight: Optional[SingleFlight] = None):
 		self.base_url = base_url or os.getenv('POCKETBASE_URL', 'http://127.0.0.1:8090')
-		self.pb = PocketBase(self.base_url)
+		self.token_cache = token_cache or TokenCache(Config.TOKEN_CACHE_MAX_SIZE, Config.TOKEN_CACHE_TTL)
+		self.pool = pool or PocketBaseClientPool(
+			self.base_url,
+			size=Config.POCKETBASE_POOL_SIZE,
+			timeout=Config.POCKETBASE_POOL_TIMEOUT,
+			collect_stats=Config.POCKETBASE_POOL_STATS,
+			request_timeout=Config.POCKETBASE_REQUEST_TIMEOUT
+		)
+		self.breaker = breaker or CircuitBreaker(
+			Config.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+			Config.CIRCUIT_BREAKER_RESET_TIMEOUT
+		)
+		self.single_flight = single_flight or (SingleFlight() if Config.SINGLE_FLIGHT_ENABLED else None)
+		# Collections whose API rules do not depend on the caller, so reads are shared across users
+		self.shared_collections = frozenset(Config.SINGLE_FLIGHT_SHARED_COLLECTIONS)
+		self._default_client: Optional[PocketBase] = None
+		# Client bound by acting_as() for work done outside a request
+		self._local = threading.local()
+	
+	@property
+	def pb(self) -> PocketBase:
+		"""
+		PocketBase client for the current request
+		Inside an app context a client is checked out of the pool on first use and
+		returned by release_client(); outside one (scripts, tests) a private client is used,
+		unless acting_as() bound one to the thread
+		"""
+		bound = getattr(self._local, 'client', None)
+		if bound is not None:
+			return bound
+		if has_app_context():
+			client = g.get('_pb_client')
+			if client is None:
+				client = self.pool.checkout()
+				# Auth kept by suspend_client() moves to the new client
+				auth = g.pop('_pb_auth', None)
+				if auth is not None:
+					client.auth_store.save(*auth)
+				g._pb_client = client
+			return client
+		
+		if self._default_client is None:
+			self._default_client = PocketBase(self.base_url)
+		return self._default_client
 	
+	def release_client(self, exception: Optional[BaseException] = None) -> None:
+		"""Return the current request's client to the pool"""
+		client = g.pop('_pb_client', None)
+		if client is not None:
+			self.pool.checkin(client)
+	
+	def suspend_client(self) -> None:
+		"""
+		Return the current request's client to the pool before the request ends, keeping its auth
+		for the next checkout, so a long streamed response only holds a client while it fetches
+		"""
+		if not has_app_context() or getattr(self._local, 'client', None) is not None:
+			return
+		client = g.get('_pb_client')
+		if client is not None:
+			g._pb_auth = (client.auth_store.token, client.auth_store.model)
+			self.release_client()
+	
+	def init_app(self, app: Flask) -> None:
+		"""Release the checked-out client when each request's app context ends"""
+		app.teardown_appcontext(self.release_client)
+	
+	def _coalesced(self, key: Tuple[Hashable, ...], fetch: Callable[[], Any],
+				   expand: Optional[str] = None) -> Any:
+		"""
+		Run an identical concurrent read once (single-flight)
+		`key` starts with the method name and collection; reads of collections outside
+		shared_collections, and expanded reads (a related user record shows its email to
+		that user only), are only shared between requests of the same user
+		"""
+		if self.single_flight is None:
+			return fetch()
+		auth_store = self.pb.auth_store
+		if key[1] in self.shared_collections and not expand:
+			identity: Hashable = bool(auth_store.token)
+		else:
+			identity = getattr(auth_store.model, 'id', None) or auth_store.token
+		return self.single_flight.do(key + (identity,), fetch)
+	
+	@contextmanager
+	def authenticated_client(self, token: str) -> Iterator[PocketBase]:
+		"""
+		Borrow a pooled client authenticated with `token` for work done outside a request
+		(e.g. background flushes on behalf of a user)
+		"""
+		client = self.pool.checkout()
+		client.auth_store.save(token, None)
+		try:
+			yield client
+		finally:
+			self.pool.checkin(client)
+	
+	@contextmanager
+	def acting_as(self, token: str) -> Iterator[None]:
+		"""
+		Run the service's methods as the user of `token` on this thread, outside a request
+		(e.g. a background rebuild that PocketBase's API rules only allow to authenticated users)
+		"""
+		with self.authenticated_client(token) as client:
+			previous = getattr(self._local, 'client', None)
+			self._local.client = client
+			try:
+				yield
+			finally:
+				self._local.client = previous
+	
+	@metrics.track_upstream('users')
 	def authenticate(self, email: str, password: str) -> Dict[str, Any]:
 		"""
 		Authenticate user with email/password
@@ -56,7 +229,7 @@ class PocketBaseService:
 		"""
 		try:
 			# Authenticate with PocketBase
-			auth_data = self.pb.collection("users").auth_with_password(email, password)
+			auth_data = self.breaker.call(self.pb.collection("users").auth_with_password, email, password)
 			
 			# Return data in JavaScript SDK format
 			return {
@@ -75,16 +248,23 @@ class PocketBaseService:
 		"""
 		Set authentication token manually and fetch user model
 		Equivalent to: pb.authStore.save(token, model)
+		Verified tokens are cached, so only the first call per token hits PocketBase
 		"""
+		cached_record = self.token_cache.get(token)
+		if cached_record is not None:
+			self.pb.auth_store.save(token, cached_record)
+			return
+
 		try:
 			# First, save the token temporarily
 			self.pb.auth_store.save(token, None)
 			
 			# Then refresh to get the user model
-			auth_data = self.pb.collection("users").auth_refresh()
+			auth_data = self.breaker.call(self.pb.collection("users").auth_refresh)
 			
 			# Now save both token and model
 			self.pb.auth_store.save(token, auth_data.record)
+			self.token_cache.put(token, auth_data.record)
 		except ClientResponseError:
 			# If refresh fails, just save the token without model
 			self.pb.auth_store.save(token, None)
@@ -105,9 +285,11 @@ class PocketBaseService:
 	
 	def clear_auth(self) -> None:
 		"""
-		Clear authentication
+		Clear authentication and evict the current token from the verified-token cache
 		Equivalent to: pb.authStore.clear()
 		"""
+		if self.pb.auth_store.token:
+			self.token_cache.invalidate(self.pb.auth_store.token)
 		self.pb.auth_store.clear()
 	
 	def get_current_user(self) -> Optional[Dict[str, Any]]:
@@ -128,17 +310,27 @@ class PocketBaseService:
 			return self.pb.auth_store.model.id
 		return None
 	
+	@metrics.track_upstream('users')
 	def verify_token(self, token: str) -> Dict[str, Any]:
 		"""
 		Verify a token and return user info
 		"""
+		cached_record = self.token_cache.get(token)
+		if cached_record is not None:
+			return {
+				'valid': True,
+				'user': serialize_record(cached_record),
+				'user_id': cached_record.id
+			}
+
 		old_token = self.pb.auth_store.token  # Save current token first
 		try:
 			# Set the token temporarily to verify
 			self.pb.auth_store.save(token, None)
 			
 			# Try to refresh the token to verify it's valid
-			auth_data = self.pb.collection("users").auth_refresh()
+			auth_data = self.breaker.call(self.pb.collection("users").auth_refresh)
+			self.token_cache.put(token, auth_data.record)
 			
 			return {
 				'valid': True,
@@ -159,69 +351,196 @@ class PocketBaseService:
 		"""Get a PocketBase collection"""
 		return self.pb.collection(collection_name)
 	
+	@metrics.track_upstream()
 	def create_record(self, collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
 		"""Create a record in a collection"""
 		try:
-			record = self.pb.collection(collection).create(data)
+			record = self.breaker.call(self.pb.collection(collection).create, data)
 			return serialize_record(record)
 		except ClientResponseError as e:
 			raise Exception(f"Failed to create record: {e}")
 	
-	def get_record(self, collection: str, record_id: str, expand: Optional[str] = None) -> Dict[str, Any]:
-		"""Get a record by ID"""
-		try:
-			query_params = {}
-			if expand:
-				query_params['expand'] = expand
-			
-			record = self.pb.collection(collection).get_one(record_id, query_params)
-			return serialize_record(record)
-		except ClientResponseError as e:
-			raise Exception(f"Failed to get record: {e}")
+	@metrics.track_upstream()
+	def get_record(self, collection: str, record_id: str, expand: Optional[str] = None,
+				   fields: Optional[str] = None) -> Dict[str, Any]:
+		"""Get a record by ID; identical concurrent reads share one upstream call"""
+		query_params = {}
+		if expand:
+			query_params['expand'] = expand
+		if fields:
+			query_params['fields'] = fields
+		
+		def fetch() -> Dict[str, Any]:
+			try:
+				record = self.breaker.call(self.pb.collection(collection).get_one, record_id, query_params)
+				return serialize_record(record)
+			except ClientResponseError as e:
+				raise Exception(f"Failed to get record: {e}")
+		
+		return self._coalesced(('get_record', collection, record_id, expand, fields), fetch, expand)
 	
+	@metrics.track_upstream()
 	def update_record(self, collection: str, record_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
 		"""Update a record"""
 		try:
-			record = self.pb.collection(collection).update(record_id, data)
+			record = self.breaker.call(self.pb.collection(collection).update, record_id, data)
 			return serialize_record(record)
 		except ClientResponseError as e:
 			raise Exception(f"Failed to update record: {e}")
 	
+	@metrics.track_upstream()
 	def delete_record(self, collection: str, record_id: str) -> bool:
 		"""Delete a record"""
 		try:
-			self.pb.collection(collection).delete(record_id)
+			self.breaker.call(self.pb.collection(collection).delete, record_id)
 			return True
 		except ClientResponseError as e:
 			raise Exception(f"Failed to delete record: {e}")
 	
+	@metrics.track_upstream()
 	def list_records(self, collection: str, page: int = 1, per_page: int = 30, 
-					filter_query: str = "", sort: str = "", expand: Optional[str] = None) -> Dict[str, Any]:
-		"""List records from a collection"""
-		try:
-			query_params = {
-				'filter': filter_query,
-				'sort': sort
-			}
-			if expand:
-				query_params['expand'] = expand
+					filter_query: str = "", sort: str = "", expand: Optional[str] = None,
+					fields: Optional[str] = None) -> Dict[str, Any]:
+		"""List records from a collection; identical concurrent reads share one upstream call"""
+		query_params = {
+			'filter': filter_query,
+			'sort': sort
+		}
+		if expand:
+			query_params['expand'] = expand
+		if fields:
+			query_params['fields'] = fields
+		
+		def fetch() -> Dict[str, Any]:
+			try:
+				result = self.breaker.call(
+					self.pb.collection(collection).get_list,
+					page=page,
+					per_page=per_page,
+					query_params=query_params
+				)
 				
-			result = self.pb.collection(collection).get_list(
-				page=page,
-				per_page=per_page,
-				query_params=query_params
+				return {
+					'page': result.page,
+					'per_page': result.per_page,
+					'total_items': result.total_items,
+					'total_pages': result.total_pages,
+					'items': [serialize_record(item) for item in result.items]
+				}
+			except ClientResponseError as e:
+				raise Exception(f"Failed to list records: {e}")
+		
+		return self._coalesced(('list_records', collection, page, per_page, filter_query, sort, expand, fields), fetch,
+							   expand)
+	
+	@metrics.track_upstream()
+	def list_records_after(self, collection: str, sort_field: str, limit: int = 30,
+						   after: Optional[Tuple[str, str]] = None, filter_query: str = "",
+						   expand: Optional[str] = None, fields: Optional[str] = None) -> Dict[str, Any]:
+		"""
+		Keyset page ordered by `sort_field` then id, newest first
+		`after` is the (sort value, id) of the last record already returned. The position is
+		a filter rather than an offset and no total is counted, so deep pages cost the same as the first
+		A `fields` selection always gets id and `sort_field` added, since the cursor is built from them
+		
+		Returns {'items': [...], 'last': (sort value, id) to continue from, or None on the last page}
+		"""
+		conditions = [f"({filter_query})"] if filter_query else []
+		if after:
+			value, record_id = after
+			conditions.append(
+				f"({sort_field} < '{value}' || ({sort_field} = '{value}' && id < '{record_id}'))"
 			)
+		query_params = {
+			'page': 1,
+			'perPage': limit + 1,
+			'filter': ' && '.join(conditions),
+			'sort': f"-{sort_field},-id",
+			'skipTotal': 1
+		}
+		if expand:
+			query_params['expand'] = expand
+		if fields:
+			query_params['fields'] = f"{fields},id,{sort_field}"
+		
+		def fetch() -> Dict[str, Any]:
+			try:
+				# Raw items keep the sort value exactly as PocketBase stores it (Record drops milliseconds)
+				collection_service = self.pb.collection(collection)
+				response_data = self.breaker.call(
+					self.pb.send, collection_service.base_crud_path(), {'method': 'GET', 'params': query_params}
+				)
+			except ClientResponseError as e:
+				raise Exception(f"Failed to list records: {e}")
 			
+			items = response_data.get('items') or []
+			last = None
+			if len(items) > limit:
+				items = items[:limit]
+				last = (items[-1].get(sort_field) or '', items[-1]['id'])
 			return {
-				'page': result.page,
-				'per_page': result.per_page,
-				'total_items': result.total_items,
-				'total_pages': result.total_pages,
-				'items': [serialize_record(item) for item in result.items]
+				'items': [serialize_record(collection_service.decode(item)) for item in items],
+				'last': last
 			}
-		except ClientResponseError as e:
-			raise Exception(f"Failed to list records: {e}")
+		
+		return self._coalesced(('list_records_after', collection, sort_field, limit, after, filter_query, expand, fields),
+							   fetch, expand)
+	
+	def iter_records(self, collection: str, per_page: int = 200, filter_query: str = "",
+					 sort: str = "", expand: Optional[str] = None, fields: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+		"""
+		Yield every record of a collection, page by page
+		The next page is fetched in the background while the current one is consumed,
+		so at most two pages are held in memory regardless of collection size
+		"""
+		# Bind the caller's client now; the prefetch thread has no request context
+		client = self.pb
+		
+		def fetch(page: int):
+			query_params = {
+				'filter': filter_query,
+				'sort': sort,
+				'skipTotal': 1
+			}
+			if expand:
+				query_params['expand'] = expand
+			if fields:
+				query_params['fields'] = fields
+			started = time.perf_counter()
+			try:
+				result = self.breaker.call(
+					client.collection(collection).get_list, page=page, per_page=per_page, query_params=query_params
+				)
+			except ClientResponseError as e:
+				metrics.observe_upstream('iter_records', collection, time.perf_counter() - started, error=True)
+				raise Exception(f"Failed to list records: {e}")
+			metrics.observe_upstream('iter_records', collection, time.perf_counter() - started)
+			return result
+		
+		with ThreadPoolExecutor(max_workers=1) as executor:
+			page = 1
+			future = executor.submit(fetch, page)
+			while True:
+				items = future.result().items
+				# A short page is the last one (skipTotal leaves total_pages unknown)
+				has_more = len(items) == per_page
+				if has_more:
+					future = executor.submit(fetch, page + 1)
+				for item in items:
+					yield serialize_record(item)
+				if not has_more:
+					return
+				page += 1
 
 
 # Global instance
-pocketbase_service = PocketBaseService()
\ No newline at end of file
+pocketbase_service = PocketBaseService()
+
+metrics.register_gauge('studyleague_pocketbase_pool_in_use', 'Pooled PocketBase clients checked out',
+					   lambda: pocketbase_service.pool.stats()['in_use'])
+metrics.register_gauge('studyleague_pocketbase_circuit_open', 'Whether calls to PocketBase are failing fast (1) or not (0)',
+					   lambda: int(pocketbase_service.breaker.state != 'closed'))
+metrics.register_gauge('studyleague_pocketbase_reads_coalesced', 'PocketBase reads answered by an identical in-flight call',
+					   lambda: pocketbase_service.single_flight.stats()['coalesced'] if pocketbase_service.single_flight else 0)
+metrics.register_gauge('studyleague_token_cache_hit_ratio', 'Verified-token cache hit ratio',
+					   lambda: pocketbase_service.token_cache.stats()['hit_ratio'])
@@ -0,0 +1,308 @@
+"""
+In-memory presence for study rooms
+Participants join, leave and send heartbeats in memory; silent participants expire after a TTL.
+Each worker adds its own changes to `study_rooms.participants` as increments, so the stored
+count is the sum over workers: a join reserves its seat with an immediate +1 and is refused if
+that takes the stored count past the room's capacity, while leaves and expiries are written in
+periodic batches. Membership itself is per process, so a participant's heartbeats must reach
+the worker they joined on (sticky sessions with several workers)
+"""
+
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
+import atexit
+import logging
+import threading
+import time
+
+from pocketbase.errors import ClientResponseError
+
+from config import Config
+from services.metrics import metrics
+from services.pocketbase_service import PocketBaseService, pocketbase_service
+
+logger = logging.getLogger(__name__)
+
+
+def _is_auth_failure(error: BaseException) -> bool:
+	"""PocketBase rejected the recorded token; retrying with it cannot succeed"""
+	return isinstance(error, ClientResponseError) and error.status in (401, 403)
+
+
+class RoomPresence:
+	"""Live participants per room, with the counts kept in PocketBase as per-worker increments"""
+
+	def __init__(self, pb_service: PocketBaseService, collection_name: str = "study_rooms",
+				 ttl: float = 60.0, flush_interval: float = 15.0, idle_timeout: float = 300.0):
+		self.pb_service = pb_service
+		self.collection_name = collection_name
+		self.ttl = ttl
+		self.flush_interval = flush_interval
+		self.idle_timeout = idle_timeout
+		# Per room: {user_id: last seen}, capacity, the stored count as last read or written here,
+		# how many of this worker's participants it includes, seats whose increment is being
+		# written and a token to write with
+		self._rooms: Dict[str, Dict[str, Any]] = {}
+		self._lock = threading.Lock()
+		self._flush_lock = threading.Lock()
+		self._last_flush = time.monotonic()
+		self._stop_event = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def is_tracked(self, room_id: str) -> bool:
+		with self._lock:
+			return room_id in self._rooms
+
+	def track(self, room: Dict[str, Any]) -> None:
+		"""Start tracking a room record loaded from PocketBase"""
+		with self._lock:
+			self._rooms.setdefault(room['id'], {
+				'members': {},
+				'capacity': room.get('max_participants'),
+				'stored': room.get('participants') or 0,
+				'contributed': 0,
+				'joining': 0,
+				'token': None,
+				'last_change': time.monotonic()
+			})
+		self.start()
+
+	def _live(self, entry: Dict[str, Any], now: float) -> Dict[str, float]:
+		"""Drop the room's expired participants and return the rest"""
+		cutoff = now - self.ttl
+		members = entry['members']
+		expired = [user_id for user_id, last_seen in members.items() if last_seen < cutoff]
+		for user_id in expired:
+			del members[user_id]
+		if expired:
+			entry['last_change'] = now
+		return members
+
+	@staticmethod
+	def _estimate(entry: Dict[str, Any], live: int) -> int:
+		"""The stored count plus this worker's changes not yet written"""
+		return max(0, entry['stored'] + live - entry['contributed'])
+
+	def join(self, room_id: str, user_id: str, token: Optional[str]) -> Optional[int]:
+		"""
+		Add a participant (joining again only refreshes them) and return the room's count
+		A new participant's seat is written straight away and the capacity checked against
+		the stored count it returns, so rooms cannot be overfilled from several workers
+		Returns None if the room is untracked or full
+		"""
+		now = time.monotonic()
+		with self._lock:
+			entry = self._rooms.get(room_id)
+			if entry is None:
+				return None
+			members = self._live(entry, now)
+			if token:
+				entry['token'] = token
+			if user_id in members:
+				members[user_id] = now
+				return self._estimate(entry, len(members))
+			# Full from this worker's participants alone; otherwise the stored count decides
+			if entry['capacity'] and len(members) >= entry['capacity']:
+				return None
+			# Hold the seat while the increment is written; flushes leave it to this join
+			members[user_id] = now
+			entry['joining'] += 1
+			entry['last_change'] = now
+
+		try:
+			stored = self._write(room_id, 1, token)
+			full = bool(entry['capacity']) and stored > entry['capacity']
+			if full:
+				stored = self._write(room_id, -1, token)
+		except Exception:
+			with self._lock:
+				entry['joining'] -= 1
+				entry['members'].pop(user_id, None)
+			raise
+		with self._lock:
+			entry['joining'] -= 1
+			entry['stored'] = stored
+			if full:
+				entry['members'].pop(user_id, None)
+				return None
+			entry['contributed'] += 1
+			return self._estimate(entry, len(self._live(entry, now)))
+
+	def heartbeat(self, room_id: str, user_id: str, token: Optional[str]) -> Optional[int]:
+		"""Keep a participant alive; None if they are not (or no longer) in the room"""
+		now = time.monotonic()
+		with self._lock:
+			entry = self._rooms.get(room_id)
+			if entry is None:
+				return None
+			members = self._live(entry, now)
+			if user_id not in members:
+				return None
+			members[user_id] = now
+			if token:
+				entry['token'] = token
+			return self._estimate(entry, len(members))
+
+	def leave(self, room_id: str, user_id: str, token: Optional[str]) -> Optional[int]:
+		"""Remove a participant and return the room's count (None if they were not in it)"""
+		now = time.monotonic()
+		with self._lock:
+			entry = self._rooms.get(room_id)
+			if entry is None:
+				return None
+			members = self._live(entry, now)
+			if members.pop(user_id, None) is None:
+				return None
+			entry['last_change'] = now
+			if token:
+				entry['token'] = token
+			return self._estimate(entry, len(members))
+
+	def count(self, room_id: str) -> Optional[int]:
+		"""The room's participant count, or None if the room is not tracked"""
+		with self._lock:
+			entry = self._rooms.get(room_id)
+			return self._estimate(entry, len(self._live(entry, time.monotonic()))) if entry is not None else None
+
+	def occupancy(self) -> Dict[str, int]:
+		"""Participant count of every tracked room"""
+		now = time.monotonic()
+		with self._lock:
+			return {room_id: self._estimate(entry, len(self._live(entry, now))) for room_id, entry in self._rooms.items()}
+
+	def overlay(self, rooms: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+		"""
+		Copies of room records with `participants` replaced by the count known here
+		Rooms projected without `participants` (or without `id`) are left as they are
+		"""
+		return list(self.iter_overlay(rooms))
+
+	def iter_overlay(self, rooms: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+		"""overlay() applied lazily to a stream of rooms"""
+		counts = self.occupancy()
+		for room in rooms:
+			yield dict(room, participants=counts[room.get('id')]) if room.get('id') in counts and 'participants' in room else room
+
+	def forget(self, room_id: str) -> None:
+		"""Stop tracking a room (e.g. after it is deleted)"""
+		with self._lock:
+			self._rooms.pop(room_id, None)
+
+	def flush(self) -> int:
+		"""Write every room whose live count differs from what this worker added; returns the number of rooms written"""
+		with self._flush_lock:
+			return self._flush()
+
+	def flush_if_due(self) -> int:
+		"""
+		Flush from the calling request once flush_interval has passed since the last flush
+		Background threads and atexit hooks are not reliable on serverless hosts, so presence
+		requests drive the flush as well; a request never waits for a flush already running
+		"""
+		if self.flush_interval <= 0 or time.monotonic() - self._last_flush < self.flush_interval:
+			return 0
+		if not self._flush_lock.acquire(blocking=False):
+			return 0
+		try:
+			return self._flush()
+		finally:
+			self._flush_lock.release()
+
+	def _flush(self) -> int:
+		now = self._last_flush = time.monotonic()
+		with self._lock:
+			pending: List[Tuple[str, int, Optional[str]]] = []
+			for room_id, entry in self._rooms.items():
+				delta = len(self._live(entry, now)) - entry['contributed'] - entry['joining']
+				if delta:
+					pending.append((room_id, delta, entry['token']))
+
+		written = 0
+		for room_id, delta, token in pending:
+			try:
+				stored = self._write(room_id, delta, token)
+			except Exception as e:
+				# Keep the room dirty; it is retried on the next pass
+				if _is_auth_failure(e):
+					with self._lock:
+						entry = self._rooms.get(room_id)
+						if entry is not None and entry['token'] == token:
+							entry['token'] = None
+				logger.warning("Failed to persist participants for room %s: %s", room_id, e)
+				continue
+			written += 1
+			with self._lock:
+				entry = self._rooms.get(room_id)
+				if entry is not None:
+					entry['contributed'] += delta
+					entry['stored'] = stored
+
+		self._evict_idle(now)
+		return written
+
+	def _write(self, room_id: str, delta: int, token: Optional[str]) -> int:
+		"""Add `delta` to the room's stored count as the participant who last touched it; returns the new count"""
+		if not token:
+			raise Exception("no auth token recorded for room")
+		data = {'participants+': delta} if delta > 0 else {'participants-': -delta}
+		with self.pb_service.authenticated_client(token) as client:
+			record = client.collection(self.collection_name).update(room_id, data)
+		return getattr(record, 'participants', None) or 0
+
+	def _evict_idle(self, now: float) -> None:
+		"""Forget empty rooms with nothing left to write that have not changed for idle_timeout"""
+		cutoff = now - self.idle_timeout
+		with self._lock:
+			for room_id in [
+				room_id for room_id, entry in self._rooms.items()
+				if not entry['members'] and entry['contributed'] == 0 and entry['last_change'] < cutoff
+			]:
+				del self._rooms[room_id]
+
+	def start(self) -> None:
+		"""Start the background flush thread (idempotent; disabled when flush_interval <= 0)"""
+		if self._thread is not None or self.flush_interval <= 0:
+			return
+		with self._lock:
+			if self._thread is not None:
+				return
+			self._thread = threading.Thread(target=self._run, name="room-presence-flusher", daemon=True)
+			self._thread.start()
+		atexit.register(self.stop)
+
+	def stop(self) -> None:
+		"""Stop the background thread and persist whatever is still pending"""
+		self._stop_event.set()
+		if self._thread is not None:
+			self._thread.join(timeout=self.flush_interval)
+		self.flush()
+
+	def _run(self) -> None:
+		while not self._stop_event.wait(self.flush_interval):
+			try:
+				self.flush()
+			except Exception as e:
+				logger.exception("Room presence flush failed: %s", e)
+
+	def stats(self) -> Dict[str, Any]:
+		"""Tracked rooms, this worker's live participants and rooms with unwritten changes"""
+		now = time.monotonic()
+		with self._lock:
+			counts = {room_id: len(self._live(entry, now)) for room_id, entry in self._rooms.items()}
+			dirty = sum(
+				1 for room_id, count in counts.items()
+				if count != self._rooms[room_id]['contributed'] + self._rooms[room_id]['joining']
+			)
+			return {'rooms': len(counts), 'participants': sum(counts.values()), 'dirty': dirty}
+
+
+# Global instance
+room_presence = RoomPresence(
+	pocketbase_service,
+	ttl=Config.ROOM_PRESENCE_TTL,
+	flush_interval=Config.ROOM_PRESENCE_FLUSH_INTERVAL,
+	idle_timeout=Config.ROOM_PRESENCE_IDLE_TIMEOUT
+)
+
+metrics.register_gauge('studyleague_room_participants', 'Live study room participants held in memory',
+					   lambda: room_presence.stats()['participants'])
+
@@ -0,0 +1,72 @@
+"""
+Request coalescing (single-flight) for identical PocketBase reads
+Concurrent calls with the same key share one in-flight upstream call: the first caller
+runs it and every caller that arrives meanwhile waits for that result instead of its own
+"""
+
+from typing import Any, Callable, Dict, Hashable, TypeVar
+import threading
+
+T = TypeVar('T')
+
+
+def copy_json(value: Any) -> Any:
+	"""Copy of a JSON-like value (dicts and lists are rebuilt, everything else is immutable)"""
+	if isinstance(value, dict):
+		return {key: copy_json(item) for key, item in value.items()}
+	if isinstance(value, list):
+		return [copy_json(item) for item in value]
+	return value
+
+
+class _Call:
+	__slots__ = ('done', 'result', 'error', 'waiters')
+
+	def __init__(self):
+		self.done = threading.Event()
+		self.result: Any = None
+		self.error: BaseException = None
+		self.waiters = 0
+
+
+class SingleFlight:
+	"""Coalesces concurrent calls by key; results are copied for every waiter, so callers may mutate them"""
+
+	def __init__(self):
+		self._calls: Dict[Hashable, _Call] = {}
+		self._stats = {'calls': 0, 'coalesced': 0}
+		self._lock = threading.Lock()
+
+	def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+		with self._lock:
+			self._stats['calls'] += 1
+			call = self._calls.get(key)
+			if call is not None:
+				call.waiters += 1
+				self._stats['coalesced'] += 1
+				leader = False
+			else:
+				call = self._calls[key] = _Call()
+				leader = True
+
+		if not leader:
+			call.done.wait()
+			if call.error is not None:
+				raise call.error
+			return copy_json(call.result)
+
+		try:
+			call.result = fn()
+		except BaseException as e:
+			call.error = e
+			raise
+		finally:
+			with self._lock:
+				del self._calls[key]
+			call.done.set()
+		# Waiters copy the result concurrently, so the leader must not hand out the shared original
+		return copy_json(call.result) if call.waiters else call.result
+
+	def stats(self) -> Dict[str, Any]:
+		with self._lock:
+			return dict(self._stats, in_flight=len(self._calls))
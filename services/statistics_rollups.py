@@ -0,0 +1,197 @@
+"""
+Pre-aggregated study statistics
+Per-user daily/weekly/monthly totals of active study time, maintained incrementally
+when sessions end so /api/statistics is answered from memory. Only the current week and
+month are kept; a user's totals are re-read from PocketBase every `ttl` seconds, so sessions
+ended on other workers show up within that delay
+"""
+
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Dict, Any, Tuple
+import threading
+import time
+
+from config import Config
+from services.pocketbase_service import PocketBaseService, pocketbase_service
+
+
+def session_day(session: Dict[str, Any]) -> Optional[date]:
+	"""UTC day a session belongs to: its start time, else its creation time"""
+	for field in ('started_at', 'startedAt', 'created'):
+		value = session.get(field)
+		if isinstance(value, datetime):
+			return value.date()
+		if isinstance(value, str) and len(value) >= 10:
+			try:
+				return date.fromisoformat(value[:10])
+			except ValueError:
+				continue
+	return None
+
+
+def window_start(today: date) -> date:
+	"""Earliest day that still counts towards the current week or month"""
+	return min(today - timedelta(days=today.weekday()), today.replace(day=1))
+
+
+def window_filter(start: date) -> str:
+	"""PocketBase filter for the sessions session_day() places on or after `start`"""
+	since = f"{start.isoformat()} 00:00:00"
+	return f"(startedAt >= '{since}' || (startedAt = '' && created >= '{since}'))"
+
+
+def _empty_rollup() -> Dict[str, Dict[Any, float]]:
+	return {'daily': {}, 'weekly': {}, 'monthly': {}}
+
+
+def _prune(rollup: Dict[str, Dict[Any, float]], earliest: date) -> None:
+	"""Drop the buckets of days, weeks and months that ended before `earliest`"""
+	year, week, _ = earliest.isocalendar()
+	for period, first in (('daily', earliest), ('weekly', (year, week)), ('monthly', (earliest.year, earliest.month))):
+		buckets = rollup[period]
+		for key in [key for key in buckets if key < first]:
+			del buckets[key]
+
+
+class StudyStatisticsRollups:
+	"""In-memory per-user rollups of `active_duration` by day, ISO week and month"""
+
+	def __init__(self, pb_service: PocketBaseService, collection_name: str = "study_sessions",
+				 ttl: float = 60.0, max_users: int = 10000):
+		self.pb_service = pb_service
+		self.collection_name = collection_name
+		self.ttl = ttl
+		self.max_users = max_users
+		self._users: Dict[str, Dict[str, Dict[Any, float]]] = {}
+		# Contribution of each recent session, so ending a session twice never double counts
+		self._contributions: Dict[str, Tuple[str, date, float]] = {}
+		# User id -> when their rollup was loaded, least recently read first
+		self._hydrated: 'OrderedDict[str, float]' = OrderedDict()
+		self._lock = threading.RLock()
+
+	@staticmethod
+	def _today() -> date:
+		return datetime.now(timezone.utc).date()
+
+	def _add(self, user_id: str, day: date, amount: float) -> None:
+		rollup = self._users.setdefault(user_id, _empty_rollup())
+		year, week, _ = day.isocalendar()
+		for period, key in (('daily', day), ('weekly', (year, week)), ('monthly', (day.year, day.month))):
+			rollup[period][key] = rollup[period].get(key, 0) + amount
+
+	def _apply(self, session: Dict[str, Any], earliest: date) -> None:
+		"""Add a session's duration, replacing whatever it contributed before"""
+		user_id = session.get('user')
+		day = session_day(session)
+		if not user_id or day is None:
+			return
+		duration = session.get('active_duration') or 0
+
+		previous = self._contributions.pop(session.get('id'), None)
+		if previous is not None:
+			self._add(previous[0], previous[1], -previous[2])
+		self._add(user_id, day, duration)
+		# Only sessions inside the current week/month can still change
+		if day >= earliest and session.get('id'):
+			self._contributions[session['id']] = (user_id, day, duration)
+
+	def record_session(self, session: Optional[Dict[str, Any]]) -> None:
+		"""
+		Fold an ended session into its user's rollups
+		Users not in memory are skipped: their next summary loads the session from PocketBase
+		"""
+		if not session or session.get('user') not in self._hydrated:
+			return
+		earliest = window_start(self._today())
+		with self._lock:
+			self._apply(session, earliest)
+			rollup = self._users.get(session['user'])
+			if rollup is not None:
+				_prune(rollup, earliest)
+
+	def _load(self, filter_query: str) -> Tuple[Dict[str, Dict[str, Dict[Any, float]]], Dict[str, Tuple[str, date, float]]]:
+		"""Aggregate the current window's matching sessions into fresh structures without touching the live ones"""
+		builder = StudyStatisticsRollups(self.pb_service, self.collection_name)
+		earliest = window_start(self._today())
+		window = window_filter(earliest)
+		filter_query = f"{filter_query} && {window}" if filter_query else window
+		for session in self.pb_service.iter_records(self.collection_name, filter_query=filter_query):
+			builder._apply(session, earliest)
+		for rollup in builder._users.values():
+			_prune(rollup, earliest)
+		return builder._users, builder._contributions
+
+	def _is_fresh(self, user_id: str) -> bool:
+		loaded_at = self._hydrated.get(user_id)
+		return loaded_at is not None and time.monotonic() - loaded_at < self.ttl
+
+	def ensure_user(self, user_id: str) -> None:
+		"""Load a user's current week and month from PocketBase when not in memory or older than ttl"""
+		with self._lock:
+			if self._is_fresh(user_id):
+				self._hydrated.move_to_end(user_id)
+				return
+		users, contributions = self._load(f"user = '{user_id}'")
+		with self._lock:
+			if self._is_fresh(user_id):
+				return
+			self._replace_user(user_id, users.get(user_id, _empty_rollup()), contributions)
+
+	def _replace_user(self, user_id: str, rollup: Dict[str, Dict[Any, float]],
+					  contributions: Dict[str, Tuple[str, date, float]]) -> None:
+		self._forget(user_id)
+		self._users[user_id] = rollup
+		self._contributions.update(contributions)
+		self._hydrated[user_id] = time.monotonic()
+		self._evict()
+
+	def _forget(self, user_id: str) -> None:
+		for session_id in [sid for sid, entry in self._contributions.items() if entry[0] == user_id]:
+			del self._contributions[session_id]
+		self._users.pop(user_id, None)
+		self._hydrated.pop(user_id, None)
+
+	def _evict(self) -> None:
+		"""Forget the least recently read users beyond max_users"""
+		while len(self._hydrated) > self.max_users:
+			self._forget(next(iter(self._hydrated)))
+
+	def rebuild(self, user_id: Optional[str] = None) -> int:
+		"""
+		Recompute the current week and month from PocketBase for every user (or one user)
+		Returns the number of users rebuilt
+		"""
+		users, contributions = self._load(f"user = '{user_id}'" if user_id else "")
+		with self._lock:
+			if user_id:
+				self._replace_user(user_id, users.get(user_id, _empty_rollup()), contributions)
+				return 1
+			loaded_at = time.monotonic()
+			self._users, self._contributions = users, contributions
+			self._hydrated = OrderedDict((user, loaded_at) for user in users)
+			self._evict()
+			return len(users)
+
+	def summary(self, user_id: str, today: Optional[date] = None) -> Dict[str, Any]:
+		"""Today's, this week's and this month's totals for a user"""
+		self.ensure_user(user_id)
+		today = today or self._today()
+		year, week, _ = today.isocalendar()
+		with self._lock:
+			rollup = self._users.get(user_id, _empty_rollup())
+			return {
+				'user': user_id,
+				'date': today.isoformat(),
+				'today': rollup['daily'].get(today, 0),
+				'this_week': rollup['weekly'].get((year, week), 0),
+				'this_month': rollup['monthly'].get((today.year, today.month), 0)
+			}
+
+
+# Global instance
+statistics_rollups = StudyStatisticsRollups(
+	pocketbase_service,
+	ttl=Config.STATISTICS_ROLLUP_TTL,
+	max_users=Config.STATISTICS_ROLLUP_MAX_USERS
+)
@@ -0,0 +1,99 @@
+"""
+Verified-token cache for PocketBase auth tokens
+Keeps the result of auth_refresh() so only the first request per token hits PocketBase
+"""
+
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+import base64
+import hashlib
+import json
+import threading
+import time
+
+
+def decode_token_exp(token: str) -> Optional[float]:
+	"""
+	Decode the `exp` claim of a JWT locally (no signature check)
+	Returns None when the token is malformed or carries no expiry
+	"""
+	parts = token.split('.')
+	if len(parts) != 3:
+		return None
+	try:
+		payload = parts[1] + '=' * (-len(parts[1]) % 4)
+		claims = json.loads(base64.urlsafe_b64decode(payload).decode('utf-8'))
+		return float(claims['exp'])
+	except (ValueError, KeyError, TypeError):
+		return None
+
+
+class TokenCache:
+	"""Bounded LRU cache of verified tokens with a TTL capped at the token's expiry"""
+
+	def __init__(self, max_size: int = 1024, ttl: float = 300):
+		self.max_size = max_size
+		self.ttl = ttl
+		self.hits = 0
+		self.misses = 0
+		self._entries: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+		self._lock = threading.Lock()
+
+	@staticmethod
+	def _key(token: str) -> str:
+		"""Hash tokens so raw credentials never sit in memory as dict keys"""
+		return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+	def get(self, token: str) -> Optional[Any]:
+		"""Return the cached user record for a token, or None on a miss"""
+		key = self._key(token)
+		now = time.time()
+		with self._lock:
+			entry = self._entries.get(key)
+			if entry is None or entry[0] <= now:
+				if entry is not None:
+					del self._entries[key]
+				self.misses += 1
+				return None
+			self._entries.move_to_end(key)
+			self.hits += 1
+			return entry[1]
+
+	def put(self, token: str, record: Any) -> None:
+		"""Cache a verified token; tokens that are already expired are ignored"""
+		now = time.time()
+		expires_at = now + self.ttl
+		exp = decode_token_exp(token)
+		if exp is not None:
+			expires_at = min(expires_at, exp)
+		if expires_at <= now or self.max_size <= 0:
+			return
+
+		key = self._key(token)
+		with self._lock:
+			self._entries[key] = (expires_at, record)
+			self._entries.move_to_end(key)
+			while len(self._entries) > self.max_size:
+				self._entries.popitem(last=False)
+
+	def invalidate(self, token: str) -> None:
+		"""Evict a token (e.g. on logout)"""
+		with self._lock:
+			self._entries.pop(self._key(token), None)
+
+	def clear(self) -> None:
+		"""Drop every cached token"""
+		with self._lock:
+			self._entries.clear()
+
+	def stats(self) -> Dict[str, Any]:
+		"""Hit/miss counters and current size"""
+		with self._lock:
+			total = self.hits + self.misses
+			return {
+				'size': len(self._entries),
+				'max_size': self.max_size,
+				'hits': self.hits,
+				'misses': self.misses,
+				'hit_ratio': self.hits / total if total else 0.0
+			}
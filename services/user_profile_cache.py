@@ -0,0 +1,142 @@
+"""
+Shared user-profile cache
+Resolves author/host/user relations from memory instead of having PocketBase join the same
+users into every response; missing profiles are fetched with one filtered query per batch
+"""
+
+from collections import OrderedDict
+from itertools import islice
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Sequence, Tuple
+import re
+import threading
+import time
+
+from config import Config
+from services.pocketbase_service import PocketBaseService
+
+# Ids per `id = 'a' || id = 'b' ...` query, keeping the filter well inside URL limits
+FETCH_BATCH_SIZE = 100
+
+# Ids are interpolated into the filter, so anything else is never looked up
+RECORD_ID_PATTERN = re.compile(r'^[A-Za-z0-9_]{1,64}$')
+
+
+def public_profile(user: Dict[str, Any]) -> Dict[str, Any]:
+	"""
+	Profiles are shared between viewers, so drop the email unless the user made it visible
+	(a user fetching their own record sees it, other viewers must not)
+	"""
+	if user.get('email_visibility'):
+		return user
+	return {key: value for key, value in user.items() if key != 'email'}
+
+
+class UserProfileCache:
+	"""Bounded LRU of public user profiles with a TTL"""
+
+	def __init__(self, max_size: int = 5000, ttl: float = 300, collection_name: str = "users"):
+		self.max_size = max_size
+		self.ttl = ttl
+		self.collection_name = collection_name
+		self.hits = 0
+		self.misses = 0
+		self._entries: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+		self._lock = threading.Lock()
+
+	def put(self, user: Dict[str, Any]) -> None:
+		"""Cache a user record (as its public profile)"""
+		if not user.get('id') or self.max_size <= 0:
+			return
+		with self._lock:
+			self._entries[user['id']] = (time.time() + self.ttl, public_profile(user))
+			self._entries.move_to_end(user['id'])
+			while len(self._entries) > self.max_size:
+				self._entries.popitem(last=False)
+
+	def invalidate(self, user_id: str) -> None:
+		"""Evict a profile (e.g. after the user updates it)"""
+		with self._lock:
+			self._entries.pop(user_id, None)
+
+	def clear(self) -> None:
+		with self._lock:
+			self._entries.clear()
+
+	def _cached(self, user_ids: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+		"""Split ids into cached profiles and ids that must be fetched"""
+		now = time.time()
+		found: Dict[str, Dict[str, Any]] = {}
+		missing: List[str] = []
+		with self._lock:
+			for user_id in user_ids:
+				entry = self._entries.get(user_id)
+				if entry is not None and entry[0] > now:
+					self._entries.move_to_end(user_id)
+					found[user_id] = entry[1]
+					self.hits += 1
+				else:
+					missing.append(user_id)
+					self.misses += 1
+		return found, missing
+
+	def get_many(self, pb_service: PocketBaseService, user_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+		"""
+		Profiles by id; every missing id is fetched in a single filtered query per batch
+		Ids that are not valid record ids (e.g. from a URL path) are left out, as no user has them
+		"""
+		found, missing = self._cached(dict.fromkeys(
+			user_id for user_id in user_ids if user_id and RECORD_ID_PATTERN.match(user_id)
+		))
+		for start in range(0, len(missing), FETCH_BATCH_SIZE):
+			batch = missing[start:start + FETCH_BATCH_SIZE]
+			filter_query = ' || '.join(f"id = '{user_id}'" for user_id in batch)
+			result = pb_service.list_records(self.collection_name, 1, len(batch), filter_query)
+			for user in result.get('items', []):
+				self.put(user)
+				found[user['id']] = public_profile(user)
+		return found
+
+	def get(self, pb_service: PocketBaseService, user_id: str) -> Optional[Dict[str, Any]]:
+		"""One profile, or None if the user does not exist"""
+		return self.get_many(pb_service, [user_id]).get(user_id)
+
+	def expand(self, pb_service: PocketBaseService, records: List[Dict[str, Any]],
+			   fields: Sequence[str]) -> List[Dict[str, Any]]:
+		"""Attach the users referenced by `fields` under each record's `expand`, like PocketBase does"""
+		user_ids = [record.get(field) for record in records for field in fields]
+		profiles = self.get_many(pb_service, [user_id for user_id in user_ids if isinstance(user_id, str)])
+		for record in records:
+			expanded = record.setdefault('expand', {})
+			if expanded is None:
+				expanded = record['expand'] = {}
+			for field in fields:
+				profile = profiles.get(record.get(field))
+				if profile is not None:
+					expanded[field] = profile
+		return records
+
+	def expand_iter(self, pb_service: PocketBaseService, records: Iterable[Dict[str, Any]],
+					fields: Sequence[str], batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+		"""expand() over a lazy stream of records, one batch at a time"""
+		records = iter(records)
+		while True:
+			batch = list(islice(records, batch_size))
+			if not batch:
+				return
+			yield from self.expand(pb_service, batch, fields)
+
+	def stats(self) -> Dict[str, Any]:
+		"""Hit/miss counters and current size"""
+		with self._lock:
+			total = self.hits + self.misses
+			return {
+				'size': len(self._entries),
+				'max_size': self.max_size,
+				'hits': self.hits,
+				'misses': self.misses,
+				'hit_ratio': self.hits / total if total else 0.0
+			}
+
+
+# Global instance
+user_profile_cache = UserProfileCache(Config.USER_PROFILE_CACHE_MAX_SIZE, Config.USER_PROFILE_CACHE_TTL)
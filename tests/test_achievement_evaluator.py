@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test automatic achievement unlocking against requiredHours thresholds
+"""
+
+from contextlib import contextmanager
+import threading
+import time
+
+from services.achievement_evaluator import AchievementEvaluator
+
+
+class FakePocketBase:
+    """Just enough of PocketBaseService for the evaluator"""
+
+    def __init__(self, thresholds, sessions, unlocked=()):
+        self.records = {
+            'achievements': [{'id': f'ach{hours}', 'required_hours': hours} for hours in thresholds]
+                            + [{'id': 'manual', 'required_hours': None}],
+            'study_sessions': sessions,
+            'user_achievements': [{'user': 'u1', 'achievement': a} for a in unlocked],
+        }
+        self.created = []
+        self.listed = []
+        self.tokens = []
+
+    @contextmanager
+    def acting_as(self, token):
+        self.tokens.append(token)
+        yield
+
+    def iter_records(self, collection, per_page=200, filter_query="", sort="", expand=None):
+        self.listed.append(collection)
+        return iter(list(self.records[collection]))
+
+    def list_records_after(self, collection, sort_field, limit=30, after=None, filter_query="", expand=None, fields=None):
+        # Pages of `limit`, with the offset standing in for the cursor
+        if after is None:
+            self.listed.append(collection)
+        start = after[1] if after else 0
+        items = self.records[collection][start:start + limit]
+        last = ('', start + limit) if start + limit < len(self.records[collection]) else None
+        return {'items': [dict(item) for item in items], 'last': last}
+
+    def list_records(self, collection, page=1, per_page=30, filter_query="", sort="", expand=None, fields=None):
+        return {'items': [record for record in self.records[collection] if f"'{record['achievement']}'" in filter_query]}
+
+    def create_record(self, collection, data):
+        self.created.append(data)
+        return dict(data, id=f"ua{len(self.created)}")
+
+
+def test_unlocks_only_new_thresholds():
+    print("🔄 Testing newly reached achievements are created once...")
+    service = FakePocketBase([50, 1, 10, 5], [{'id': 's1', 'user': 'u1', 'active_duration': 120}], unlocked=['ach1'])
+    evaluator = AchievementEvaluator(service, units_per_hour=60)
+
+    # The user's total loads in the background; 2 hours: ach1 is already unlocked, nothing else reached
+    assert evaluator.evaluate('u1') == []
+    assert evaluator.join(5) and service.created == []
+
+    # Another 8 hours crosses 5 and 10
+    evaluator.record_session({'id': 's2', 'user': 'u1', 'active_duration': 480})
+    created = evaluator.evaluate('u1')
+    assert sorted(record['achievement'] for record in created) == ['ach10', 'ach5']
+    assert evaluator.hours('u1') == 10
+
+    # Ending the same session again must not double count or re-unlock
+    evaluator.record_session({'id': 's2', 'user': 'u1', 'active_duration': 480})
+    assert evaluator.evaluate('u1') == []
+    assert len(service.created) == 2
+    # Catalog and user were each loaded once
+    assert service.listed.count('achievements') == 1
+    assert service.listed.count('study_sessions') == 1
+
+
+def test_running_total_counts_open_sessions_once():
+    print("🔄 Testing sessions active at load time are not counted twice...")
+    sessions = [{'id': f's{index}', 'user': 'u1', 'active_duration': 60} for index in range(5)]
+    sessions.append({'id': 'open', 'user': 'u1', 'active_duration': 30, 'active': True})
+    service = FakePocketBase([], sessions)
+    evaluator = AchievementEvaluator(service, units_per_hour=60, page_size=2)
+    assert evaluator.hours('u1') is None
+    assert evaluator.join(5) and evaluator.hours('u1') == 5.5
+    # The load walked three keyset pages; the open session then ends with 90 in total
+    evaluator.record_session({'id': 'open', 'user': 'u1', 'active_duration': 90})
+    assert evaluator.hours('u1') == 6.5
+
+
+def test_users_expire_and_are_evicted():
+    print("🔄 Testing per-user state is bounded and re-read...")
+    service = FakePocketBase([], [{'id': 's1', 'user': 'u1', 'active_duration': 60}])
+    evaluator = AchievementEvaluator(service, units_per_hour=60, ttl=0.05, max_users=2)
+    for user_id in ('u1', 'u2', 'u3'):
+        evaluator.hours(user_id)
+    assert evaluator.join(5) and evaluator.stats()['users'] == 2
+
+    assert evaluator.hours('u3') == 1
+    loads = service.listed.count('study_sessions')
+    time.sleep(0.06)
+    # Another worker ended a session meanwhile; the stale total is used until the reload sees it
+    service.records['study_sessions'].append({'id': 's2', 'user': 'u3', 'active_duration': 60})
+    assert evaluator.hours('u3') == 1
+    assert evaluator.join(5) and evaluator.hours('u3') == 2
+    assert service.listed.count('study_sessions') == loads + 1
+
+
+def test_skips_achievements_unlocked_elsewhere():
+    print("🔄 Testing achievements unlocked by another worker are not created again...")
+    service = FakePocketBase([1, 2], [{'id': 's1', 'user': 'u1', 'active_duration': 30}])
+    evaluator = AchievementEvaluator(service, units_per_hour=60)
+    assert evaluator.evaluate('u1') == []
+    evaluator.join(5)
+
+    # Another worker unlocked ach1 after this one loaded the user
+    service.records['user_achievements'].append({'user': 'u1', 'achievement': 'ach1'})
+    evaluator.record_session({'id': 's2', 'user': 'u1', 'active_duration': 120})
+    assert [record['achievement'] for record in evaluator.evaluate('u1')] == ['ach2']
+    assert evaluator.evaluate('u1') == []
+
+
+def test_catalog_invalidation():
+    print("🔄 Testing catalog changes are picked up...")
+    service = FakePocketBase([5], [{'id': 's1', 'user': 'u1', 'active_duration': 180}])
+    evaluator = AchievementEvaluator(service, units_per_hour=60)
+    assert evaluator.evaluate('u1') == []
+    evaluator.join(5)
+
+    # A new, already-reached achievement is unlocked after the catalog refreshes
+    service.records['achievements'].append({'id': 'ach2', 'required_hours': 2})
+    assert evaluator.evaluate('u1') == []
+    evaluator.invalidate_catalog()
+    assert [record['achievement'] for record in evaluator.evaluate('u1')] == ['ach2']
+
+
+def test_stop_does_not_wait_for_the_history_load():
+    print("🔄 Testing a stop returns while the user's history loads...")
+    release = threading.Event()
+
+    class SlowPocketBase(FakePocketBase):
+        def list_records_after(self, *args, **kwargs):
+            release.wait(5)
+            return super().list_records_after(*args, **kwargs)
+
+    service = SlowPocketBase([2], [{'id': 's1', 'user': 'u1', 'active_duration': 60}])
+    evaluator = AchievementEvaluator(service, units_per_hour=60)
+    started = time.monotonic()
+    evaluator.record_session({'id': 's1', 'user': 'u1', 'active_duration': 60}, 'tok')
+    assert evaluator.evaluate('u1', 'tok') == []
+
+    # A second session ends while the load is in flight, which may have read the history before it
+    service.records['study_sessions'].append({'id': 's2', 'user': 'u1', 'active_duration': 60})
+    evaluator.record_session({'id': 's2', 'user': 'u1', 'active_duration': 60}, 'tok')
+    assert time.monotonic() - started < 1
+
+    release.set()
+    assert evaluator.join(5)
+    # Loaded again, not counted twice, and unlocked once ready, as the stopping user
+    assert evaluator.hours('u1') == 2
+    assert service.listed.count('study_sessions') == 2
+    assert [record['achievement'] for record in service.created] == ['ach2']
+    assert service.tokens == ['tok']
+
+
+if __name__ == "__main__":
+    test_unlocks_only_new_thresholds()
+    test_running_total_counts_open_sessions_once()
+    test_users_expire_and_are_evicted()
+    test_skips_achievements_unlocked_elsewhere()
+    test_catalog_invalidation()
+    test_stop_does_not_wait_for_the_history_load()
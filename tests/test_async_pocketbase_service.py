@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test the async PocketBase service against the local stub
+"""
+
+from benchmarks.pocketbase_stub import PocketBaseStub
+from services.async_pocketbase_service import AsyncPocketBaseService
+from services.circuit_breaker import OPEN, CircuitBreaker, CircuitOpenError
+from services.metrics import metrics
+from services.pocketbase_service import PocketBaseService
+
+
+def test_matches_sync_service():
+    print("🔄 Testing async results match the sync service...")
+    with PocketBaseStub(records_per_collection=20) as stub:
+        sync_service = PocketBaseService(stub.url)
+        async_service = AsyncPocketBaseService(stub.url).with_token("token")
+        try:
+            expected = [
+                sync_service.list_records('study_sessions', per_page=5, expand='user,room'),
+                sync_service.get_record('discussions', 'discus000000003', expand='author'),
+            ]
+            actual = async_service.gather(
+                async_service.list_records('study_sessions', per_page=5, expand='user,room'),
+                async_service.get_record('discussions', 'discus000000003', expand='author'),
+            )
+            assert actual == expected
+
+            created = async_service.run(async_service.create_record('study_targets', {'daily_target': 90}))
+            assert created['daily_target'] == 90
+            assert async_service.run(async_service.delete_record('study_targets', created['id'])) is True
+
+            try:
+                async_service.run(async_service.get_record('discussions', 'missing'))
+                assert False, "missing records should raise"
+            except Exception as e:
+                assert str(e).startswith("Failed to get record")
+        finally:
+            async_service.close()
+
+
+def test_fields_breaker_and_metrics():
+    print("🔄 Testing the async service uses fields, the breaker and metrics...")
+    with PocketBaseStub(records_per_collection=20) as stub:
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        async_service = AsyncPocketBaseService(stub.url, breaker=breaker).with_token("token")
+        try:
+            def calls():
+                histogram = metrics._upstream.get(('get_record', 'discussions'))
+                return histogram.count if histogram else 0
+
+            before = calls()
+            record = async_service.run(async_service.get_record('discussions', 'discus000000003', fields='id,title'))
+            assert record['id'] == 'discus000000003' and record['title'] and 'content' not in record
+            page = async_service.run(async_service.list_records('study_rooms', per_page=3, fields='id'))
+            assert all(item['id'] and 'room_name' not in item for item in page['items'])
+            if metrics.enabled:
+                assert calls() == before + 1
+
+            # An unreachable PocketBase opens the shared breaker; later calls fail fast
+            unreachable = AsyncPocketBaseService('http://127.0.0.1:9', breaker=breaker)
+            try:
+                unreachable.run(unreachable.get_record('discussions', 'discus000000003'))
+                assert False, "an unreachable PocketBase should raise"
+            except Exception as e:
+                assert str(e).startswith("Failed to get record")
+            finally:
+                unreachable.close()
+            assert breaker.state == OPEN
+            try:
+                async_service.run(async_service.list_records('study_rooms'))
+                assert False, "an open circuit should fail fast"
+            except CircuitOpenError:
+                pass
+        finally:
+            async_service.close()
+
+
+if __name__ == "__main__":
+    test_matches_sync_service()
+    test_fields_breaker_and_metrics()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test the /api/batch endpoint dispatches sub-requests concurrently
+"""
+
+import threading
+import time
+
+from flask import Blueprint, Flask, jsonify, request
+
+import routes.batch
+import utils.auth
+from benchmarks.pocketbase_stub import PocketBaseStub, make_token
+from config import Config
+from routes.batch import batch_bp
+from services.pocketbase_service import PocketBaseService
+from utils.auth import require_auth
+
+
+def make_app(stub_url):
+    service = PocketBaseService(stub_url)
+    items_bp = Blueprint('items', __name__, url_prefix='/api/items')
+    active = {'now': 0, 'peak': 0}
+    lock = threading.Lock()
+
+    @items_bp.route('/<item_id>', methods=['GET'])
+    @require_auth
+    def get_item(user_id, item_id):
+        with lock:
+            active['now'] += 1
+            active['peak'] = max(active['peak'], active['now'])
+        time.sleep(0.05)
+        with lock:
+            active['now'] -= 1
+        if item_id == 'missing':
+            return jsonify({'error': 'Item not found'}), 404
+        return jsonify({'id': item_id, 'user': user_id}), 200
+
+    @items_bp.route('/', methods=['POST'])
+    @require_auth
+    def create_item():
+        return jsonify(request.get_json()), 201
+
+    app = Flask(__name__)
+    service.init_app(app)
+    app.register_blueprint(items_bp)
+    app.register_blueprint(batch_bp)
+    return app, service, active
+
+
+def run_with_stub(test):
+    with PocketBaseStub() as stub:
+        app, service, active = make_app(stub.url)
+        original = utils.auth.pocketbase_service, routes.batch.pocketbase_service
+        utils.auth.pocketbase_service = routes.batch.pocketbase_service = service
+        try:
+            headers = {'Authorization': 'Bearer ' + make_token('users0000000000')}
+            test(app.test_client(), headers, active, stub)
+        finally:
+            utils.auth.pocketbase_service, routes.batch.pocketbase_service = original
+
+
+def test_batch_results_in_order():
+    print("🔄 Testing batch returns per-request status codes in order...")
+
+    def check(client, headers, active, stub):
+        response = client.post('/api/batch', headers=headers, json={'requests': [
+            {'id': 'a', 'path': '/api/items/one'},
+            {'id': 'b', 'path': '/api/items/missing'},
+            {'id': 'c', 'method': 'POST', 'path': '/api/items/', 'body': {'name': 'new'}},
+            {'id': 'd', 'path': '/api/items/two'}
+        ]})
+        assert response.status_code == 200
+        results = response.get_json()['responses']
+        assert [(r['id'], r['status']) for r in results] == [('a', 200), ('b', 404), ('c', 201), ('d', 200)]
+        assert results[0]['body'] == {'id': 'one', 'user': 'users0000000000'}
+        assert results[2]['body'] == {'name': 'new'}
+        # Sub-requests ran in parallel and the token was only checked upstream once
+        assert active['peak'] > 1
+        assert stub.requests == 1
+        print(f"✅ Peak concurrency {active['peak']}, upstream auth calls {stub.requests}")
+
+    run_with_stub(check)
+
+
+def test_batch_rejections():
+    print("🔄 Testing batch validation...")
+
+    def check(client, headers, active, stub):
+        assert client.post('/api/batch', json={'requests': [{'path': '/api/items/one'}]}).status_code == 401
+        too_many = [{'path': '/api/items/one'}] * (Config.BATCH_MAX_REQUESTS + 1)
+        assert client.post('/api/batch', headers=headers, json={'requests': too_many}).status_code == 400
+        assert client.post('/api/batch', headers=headers, json={'requests': [{'path': '/api/batch'}]}).status_code == 400
+        assert client.post('/api/batch', headers=headers, json={'requests': [{'path': '/api/items/one', 'method': 'TRACE'}]}).status_code == 400
+        assert client.post('/api/batch', headers=headers, json={}).status_code == 400
+
+    run_with_stub(check)
+
+
+if __name__ == "__main__":
+    test_batch_results_in_order()
+    test_batch_rejections()
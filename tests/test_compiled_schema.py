@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test compiled schemas load exactly what marshmallow loads and fail with the same errors
+"""
+
+from marshmallow import Schema, ValidationError, fields
+
+from schemas import HeartbeatSchema, StartSessionSchema, StopSessionSchema, StudySessionSchema
+from schemas.compiled import compile_schema
+
+SESSION = {'id': 'abc123', 'user': 'u1', 'room': None, 'active_duration': 25, 'active': True, 'integrity_score': 97}
+
+PAYLOADS = [
+    (HeartbeatSchema, [
+        {'session_id': 'abc123'},
+        {'session_id': 'abc123', 'timestamp': 1718000000000, 'is_active': False, 'extra': 1},
+        {'session_id': 'abc123', 'is_active': 'false'},
+        {'session_id': ''},
+        {'session_id': 12},
+        {'is_active': 'maybe'},
+        {},
+        [],
+        None,
+    ]),
+    (StartSessionSchema, [{'timestamp': '2024-06-10T08:00:00Z'}, {'timestamp': None}, {}]),
+    (StopSessionSchema, [{'session_id': 'abc123', 'timestamp': 1}, {'session_id': None}, {'timestamp': 1}]),
+    (StudySessionSchema, [
+        SESSION,
+        dict(SESSION, active_duration='12'),
+        dict(SESSION, active_duration=1.5),
+        dict(SESSION, active_duration=True),
+        dict(SESSION, active_duration=0),
+        dict(SESSION, integrity_score=float('nan')),
+        dict(SESSION, integrity_score=101),
+        dict(SESSION, started_at='2024-06-10T08:00:00Z'),
+        dict(SESSION, started_at='yesterday'),
+        dict(SESSION, unknown='field'),
+        {'user': None},
+    ]),
+]
+
+
+def outcome(load, payload, partial=None):
+    try:
+        return 'ok', load(payload, partial=partial)
+    except ValidationError as e:
+        return 'error', e.messages
+
+
+def test_matches_marshmallow():
+    print("🔄 Testing compiled schemas against marshmallow...")
+    for schema_class, payloads in PAYLOADS:
+        schema = schema_class()
+        compiled = compile_schema(schema)
+        assert compiled.compiled, schema_class.__name__
+        for payload in payloads:
+            for partial in (None, True):
+                expected = outcome(schema.load, payload, partial)
+                assert outcome(compiled.load, payload, partial) == expected, (schema_class.__name__, payload, partial)
+    print("✅ Same results and error messages")
+
+
+def test_fast_path_skips_marshmallow():
+    print("🔄 Testing valid payloads never reach Schema.load...")
+    schema = StudySessionSchema()
+    compiled = compile_schema(schema)
+    calls = []
+    original = schema.load
+    schema.load = lambda *args, **kwargs: calls.append(args) or original(*args, **kwargs)
+
+    assert compiled.load(SESSION)['integrity_score'] == 97.0
+    assert compiled.load({'active_duration': 30}, partial=True) == {'active_duration': 30}
+    assert calls == []
+
+    compiled.load(dict(SESSION, started_at='2024-06-10T08:00:00Z'))
+    assert len(calls) == 1
+
+
+def test_unsupported_schemas_fall_back():
+    print("🔄 Testing schemas with unsupported fields go through marshmallow...")
+
+    class TaggedSchema(Schema):
+        tags = fields.List(fields.Str(), required=True)
+
+    compiled = compile_schema(TaggedSchema())
+    assert not compiled.compiled
+    assert compiled.load({'tags': ['focus']}) == {'tags': ['focus']}
+    assert outcome(compiled.load, {}) == ('error', {'tags': ['Missing data for required field.']})
+
+
+if __name__ == "__main__":
+    test_matches_marshmallow()
+    test_fast_path_skips_marshmallow()
+    test_unsupported_schemas_fall_back()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test Accept-Encoding negotiated response compression
+"""
+
+import gzip
+import json
+
+from flask import Flask, Response, jsonify
+
+from utils.compression import ResponseCompression
+from utils.response_cache import ResponseCache
+
+ROOMS = [{'id': f'room{index}', 'roomName': f'Room {index}', 'expand': {'host': {'username': 'student'}}} for index in range(100)]
+
+
+def make_app(min_size=1024):
+    app = Flask(__name__)
+    compression = ResponseCompression(min_size=min_size, level=6)
+    cache = ResponseCache()
+    pulled = []
+
+    @app.route('/rooms')
+    @cache.cached
+    def rooms():
+        return jsonify(ROOMS)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/stream')
+    def stream():
+        def generate():
+            for index in range(5000):
+                pulled.append(index)
+                yield json.dumps(ROOMS[index % len(ROOMS)]) + '\n'
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    @app.route('/events')
+    def events():
+        return Response(iter(['data: {}\n\n'] * 200), mimetype='text/event-stream')
+
+    compression.init_app(app)
+    return app, compression, pulled
+
+
+def test_buffered_responses_are_negotiated():
+    print("🔄 Testing buffered responses are compressed when accepted and large enough...")
+    app, compression, _ = make_app()
+    client = app.test_client()
+
+    plain = client.get('/rooms')
+    assert plain.headers.get('Content-Encoding') is None
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+
+    response = client.get('/rooms', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data)) == ROOMS
+    assert len(response.data) < len(plain.data) / 5
+
+    # The compressed representation carries a weak ETag that still revalidates
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    assert client.get('/rooms', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+
+    assert client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers.get('Content-Encoding') is None
+    assert client.get('/rooms', headers={'Accept-Encoding': 'gzip;q=0'}).headers.get('Content-Encoding') is None
+
+    stats = compression.stats()['routes']['/rooms']
+    assert stats['responses'] == 1 and stats['encodings'] == {'gzip': 1}
+    assert stats['ratio'] > 5
+    print(f"✅ Ratio {stats['ratio']:.1f}x, {stats['cpu_ms_per_response']:.3f} ms CPU")
+
+
+def test_streamed_responses_compress_incrementally():
+    print("🔄 Testing streamed responses are compressed as they are sent...")
+    app, compression, pulled = make_app()
+    client = app.test_client()
+
+    response = client.get('/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    # Starting the response pulls only as much as the first compressed chunk needs
+    assert len(pulled) < 5000
+    body = b''.join(response.response)
+    response.close()
+    lines = gzip.decompress(body).decode().splitlines()
+    assert len(lines) == 5000 and json.loads(lines[-1]) == ROOMS[-1]
+    assert compression.stats()['routes']['/stream']['responses'] == 1
+
+    events = client.get('/events', headers={'Accept-Encoding': 'gzip'})
+    assert events.headers.get('Content-Encoding') is None
+    print("✅ Streams compressed incrementally, event streams left alone")
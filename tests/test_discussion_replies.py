@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test reply pagination, denormalized reply counts and embedded replies
+"""
+
+from benchmarks.pocketbase_stub import PocketBaseStub, record_id
+from controllers import DiscussionController, DiscussionReplyController
+from services.pocketbase_service import PocketBaseService
+
+
+def test_replies_page_and_count():
+    print("🔄 Testing paginated replies and reply counts...")
+    # 60 replies over 50 discussions: discussions 0-9 have two replies, the rest one
+    with PocketBaseStub(records_per_collection=60) as stub:
+        service = PocketBaseService(stub.url)
+        discussions = DiscussionController(service)
+        replies = DiscussionReplyController(service)
+        discussion_id = record_id('discussions', 3)
+
+        first = replies.get_discussion_replies(discussion_id, page=1, per_page=1)
+        second = replies.get_discussion_replies(discussion_id, page=2, per_page=1)
+        assert len(first) == 1 and len(second) == 1 and first[0]['id'] != second[0]['id']
+        assert first[0]['expand']['author']['collection_name'] == 'users'
+
+        assert replies.count_replies(discussion_id) == 2
+        updated = discussions.record_reply_activity(discussion_id, replies.count_replies(discussion_id))
+        assert updated['reply_count'] == 2
+        assert updated['last_activity_at']
+
+
+def test_embed_replies_one_query_per_batch():
+    print("🔄 Testing embedded replies avoid one request per discussion...")
+    # 50 replies, one per discussion
+    with PocketBaseStub(records_per_collection=50) as stub:
+        service = PocketBaseService(stub.url)
+        discussions = DiscussionController(service).get_all_discussions()
+        replies = DiscussionReplyController(service)
+
+        stub.requests = 0
+        embedded = list(replies.embed_replies(discussions, count=1, batch_size=50))
+        assert stub.requests == 1
+        assert [d['id'] for d in embedded] == [d['id'] for d in discussions]
+        for discussion in embedded:
+            assert len(discussion['replies']) == 1
+            assert discussion['replies'][0]['discussion'] == discussion['id']
+        print(f"✅ {len(embedded)} discussions, {stub.requests} reply query")
+
+
+def test_embed_replies_fetch_is_bounded():
+    print("🔄 Testing embedded replies stop at count rows per discussion...")
+    # 60 replies over discussions 0-49: discussions 0-9 have two replies, 10-49 one and 50-59 none
+    with PocketBaseStub(records_per_collection=60) as stub:
+        service = PocketBaseService(stub.url)
+        discussions = DiscussionController(service).get_all_discussions()
+        replies = DiscussionReplyController(service)
+
+        # count above most discussions' totals: one query, nothing missing
+        stub.requests = 0
+        embedded = list(replies.embed_replies(discussions, count=3, batch_size=50))
+        assert stub.requests == 1
+        totals = {record_id('discussions', index): (index < 50) + (index < 10) for index in range(60)}
+        assert all(len(d['replies']) == totals[d['id']] for d in embedded)
+        assert any(totals[d['id']] < 3 for d in embedded)
+
+        # A busy discussion fills the capped page; the ones it crowded out share one more query
+        busy, quiet = record_id('discussions', 0), [record_id('discussions', index) for index in (1, 2, 3)]
+        batch = [{'id': busy}] + [{'id': discussion_id} for discussion_id in quiet]
+        author = next(replies.embed_replies(batch, count=2))['replies'][0]['author']
+        for _ in range(5):
+            service.create_record('discussion_replies', {'discussion': busy, 'author': author,
+                                                         'created': '2025-09-01 08:00:00.000Z'})
+        stub.requests = 0
+        embedded = {d['id']: d['replies'] for d in replies.embed_replies(batch, count=2)}
+        assert stub.requests == 2
+        assert len(embedded[busy]) == 2 and all(r['created'].month == 9 for r in embedded[busy])
+        assert all([r['discussion'] for r in embedded[discussion_id]] == [discussion_id] * 2 for discussion_id in quiet)
+    print("✅ Reply embedding never pages through whole discussions")
+
+
+if __name__ == "__main__":
+    test_replies_page_and_count()
+    test_embed_replies_one_query_per_batch()
+    test_embed_replies_fetch_is_bounded()
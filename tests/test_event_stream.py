@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test the shared event producer and SSE fan-out
+"""
+
+from services.event_stream import ChangeProducer, EventBroker
+
+
+class FakeLeaderboard:
+    score_field = 'total_day'
+
+    def __init__(self, scores):
+        self.scores = scores
+
+    def ensure_fresh(self):
+        pass
+
+    def top(self, limit):
+        ordered = sorted(self.scores.items(), key=lambda item: -item[1])[:limit]
+        return [{'user': user, 'total_day': score, 'rank': rank} for rank, (user, score) in enumerate(ordered, start=1)]
+
+
+class FakePresence:
+    def __init__(self, counts):
+        self.counts = counts
+
+    def occupancy(self):
+        return dict(self.counts)
+
+
+def drain(subscription):
+    frames = []
+    while not subscription.queue.empty():
+        frames.append(subscription.queue.get_nowait()[0])
+    return frames
+
+
+def test_fan_out_serializes_once():
+    print("🔄 Testing one publish reaches every subscriber of the topic...")
+    broker = EventBroker(max_connections=3, max_queue=10)
+    rooms = [broker.subscribe(['rooms']) for _ in range(2)]
+    leaderboard = broker.subscribe(['leaderboard'])
+    assert broker.subscribe(['rooms']) is None
+
+    assert broker.publish('rooms', {'rooms': {'r1': 2}}) == 2
+    first, second = drain(rooms[0]), drain(rooms[1])
+    assert first == ['id: 1\nevent: rooms\ndata: {"rooms":{"r1":2}}\n\n']
+    assert first[0] is second[0]
+    assert drain(leaderboard) == []
+    assert broker.stats()['connections_by_topic'] == {'leaderboard': 1, 'rooms': 2}
+
+
+def test_slow_clients_are_disconnected():
+    print("🔄 Testing a full queue ends the connection instead of blocking the producer...")
+    broker = EventBroker(max_queue=2)
+    subscription = broker.subscribe(['rooms'])
+    stream = broker.listen(subscription, keepalive=0.01)
+    assert next(stream).startswith('retry:')
+    for count in range(3):
+        broker.publish('rooms', {'rooms': {'r1': count}})
+    assert subscription.overflowed and broker.stats()['dropped'] == 1
+    assert list(stream) == []
+    assert broker.connections == 0
+
+
+def test_listen_measures_fan_out_latency():
+    print("🔄 Testing delivered frames are timed...")
+    broker = EventBroker()
+    subscription = broker.subscribe(['rooms'])
+    stream = broker.listen(subscription, initial=['event: rooms\ndata: {}\n\n'], keepalive=0.01)
+    assert next(stream).startswith('retry:')
+    assert next(stream) == 'event: rooms\ndata: {}\n\n'
+    assert next(stream) == ': keepalive\n\n'
+    broker.publish('rooms', {'rooms': {}})
+    assert 'event: rooms' in next(stream)
+    stream.close()
+    stats = broker.stats()
+    assert stats['delivered'] == 1 and stats['fanout_mean_seconds'] >= 0
+    assert broker.fanout_histogram().count == 1
+    assert broker.connections == 0
+
+
+def test_producer_publishes_only_changes():
+    print("🔄 Testing rank and occupancy diffs...")
+    broker = EventBroker()
+    leaderboard = FakeLeaderboard({'u1': 10, 'u2': 5, 'u3': 1})
+    presence = FakePresence({'r1': 1})
+    producer = ChangeProducer(broker, leaderboard, presence, interval=0, leaderboard_size=2)
+    subscription = broker.subscribe(['leaderboard', 'rooms'])
+
+    snapshot = producer.snapshot(['leaderboard', 'rooms'])
+    assert '"snapshot":true' in snapshot[0] and '"u1"' in snapshot[0] and '"u3"' not in snapshot[0]
+    assert producer.poll() == 0
+
+    leaderboard.scores['u3'] = 20
+    presence.counts = {'r2': 3}
+    assert producer.poll() == 2
+    frames = drain(subscription)
+    assert frames[0].startswith('id: ') and 'event: leaderboard' in frames[0]
+    assert '{"user":"u3","rank":1,"total_day":20}' in frames[0]
+    assert '{"user":"u1","rank":2,"total_day":10}' in frames[0]
+    assert '{"user":"u2","rank":null}' in frames[0]
+    assert 'data: {"rooms":{"r2":3,"r1":0}}' in frames[1]
+
+
+if __name__ == "__main__":
+    test_fan_out_serializes_once()
+    test_slow_clients_are_disconnected()
+    test_listen_measures_fan_out_latency()
+    test_producer_publishes_only_changes()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test the streamed NDJSON and CSV export of a user's study sessions
+"""
+
+import csv
+import io
+import json
+
+from flask import Flask
+
+from benchmarks.pocketbase_stub import PocketBaseStub, make_token, record_id
+from controllers import StudySessionController
+from schemas import StudyRoomSchema, StudySessionSchema
+from services.field_selection import FieldSelection
+from services.pocketbase_pool import PocketBaseClientPool
+from services.pocketbase_service import PocketBaseService, pocketbase_service
+from utils.streaming import csv_columns, flatten_record, stream_csv, stream_ndjson
+
+
+def test_iter_user_sessions_walks_keyset_pages():
+    print("🔄 Testing a user's sessions are read page by page...")
+    with PocketBaseStub(records_per_collection=1000) as stub:
+        sessions = StudySessionController(PocketBaseService(stub.url))
+        user_id = record_id('users', 0)
+
+        # Sessions 0, 200, 400, 600 and 800 belong to the user; 3 pages of 2
+        records = list(sessions.iter_user_sessions_between(user_id, per_page=2, expand=None))
+        assert [record['id'] for record in records] == [record_id('study_sessions', index) for index in (800, 600, 400, 200, 0)]
+        assert stub.requests == 3
+
+        # from is inclusive, to exclusive
+        bounded = sessions.iter_user_sessions_between(
+            user_id, '2025-10-05 08:00:00.000Z', '2025-10-13 08:00:00.000Z', per_page=2, expand=None
+        )
+        assert [record['id'] for record in bounded] == [record_id('study_sessions', index) for index in (400, 200)]
+    print("✅ Sessions are paged and date-bounded")
+
+
+def test_flatten_record():
+    record = {'id': 's1', 'tags': ['a', 'b'], 'expand': {'room': {'room_name': 'Room 1'}}}
+    assert flatten_record(record) == {'id': 's1', 'tags': '["a", "b"]', 'expand.room.room_name': 'Room 1'}
+
+
+def test_csv_columns_come_from_the_schema():
+    columns = csv_columns(StudySessionSchema(), {'room': StudyRoomSchema()})
+    assert columns[:5] == ['id', 'created', 'updated', 'collection_id', 'collection_name']
+    assert {'started_at', 'integrity_score', 'expand.room.room_name', 'expand.room.max_participants'} <= set(columns)
+
+    selected = csv_columns(StudySessionSchema(), {'room': StudyRoomSchema()},
+                           FieldSelection.parse('id,startedAt,expand.room.roomName'))
+    assert selected == ['id', 'started_at', 'expand.room.room_name']
+
+    # A first session without a room keeps the room columns for the sessions after it
+    app = Flask(__name__)
+    records = [{'id': 's1', 'room': None}, {'id': 's2', 'room': 'r1', 'expand': {'room': {'room_name': 'Room 1'}}}]
+    with app.test_request_context():
+        body = stream_csv(records, selected).get_data(as_text=True)
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert [row['expand.room.room_name'] for row in rows] == ['', 'Room 1']
+
+
+def test_stream_ndjson_and_csv():
+    print("🔄 Testing NDJSON and CSV exports...")
+    with PocketBaseStub(records_per_collection=1000) as stub:
+        service = PocketBaseService(stub.url, pool=PocketBaseClientPool(stub.url, size=1))
+        sessions = StudySessionController(service)
+        app = Flask(__name__)
+        service.init_app(app)
+        user_id = record_id('users', 1)
+
+        @app.route('/ndjson')
+        def ndjson():
+            return stream_ndjson(sessions.iter_user_sessions_between(user_id, per_page=2), filename='sessions.ndjson')
+
+        @app.route('/csv')
+        def as_csv():
+            return stream_csv(sessions.iter_user_sessions_between(user_id, per_page=2, expand=None))
+
+        @app.route('/empty')
+        def empty():
+            return stream_csv(iter([]), columns=['id', 'started_at'])
+
+        client = app.test_client()
+        response = client.get('/ndjson')
+        assert response.mimetype == 'application/x-ndjson'
+        assert response.headers['Content-Disposition'] == 'attachment; filename="sessions.ndjson"'
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert len(lines) == 5
+        assert all(line['user'] == user_id and 'room' in line['expand'] for line in lines)
+
+        response = client.get('/csv')
+        assert response.mimetype == 'text/csv'
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        assert len(rows) == 5
+        assert {'id', 'user', 'started_at'} <= set(rows[0])
+
+        assert client.get('/empty').get_data(as_text=True).splitlines() == ['id,started_at']
+        # The pooled client is returned once each stream has been consumed
+        assert service.pool.stats()['in_use'] == 0
+    print("✅ Exports stream every session")
+
+
+def test_export_releases_the_client_between_pages():
+    print("🔄 Testing a slow export does not hold a pooled client...")
+    with PocketBaseStub(records_per_collection=1000) as stub:
+        service = PocketBaseService(stub.url, pool=PocketBaseClientPool(stub.url, size=1, timeout=0.1))
+        sessions = StudySessionController(service)
+        app = Flask(__name__)
+        service.init_app(app)
+        user_id = record_id('users', 1)
+
+        with app.app_context():
+            service.pb.auth_store.save('user-token', None)
+            records = sessions.iter_user_sessions_between(user_id, per_page=2, expand=None)
+            next(records)
+            # Mid-page, the only client is free for other requests
+            assert service.pool.stats()['in_use'] == 0
+            other = service.pool.checkout()
+            assert other.auth_store.token == ''
+            service.pool.checkin(other)
+            assert len(list(records)) == 4
+            # Each page is fetched as the same user
+            assert service.pb.auth_store.token == 'user-token'
+        assert service.pool.stats()['in_use'] == 0
+    print("✅ The client is returned between pages")
+
+
+def test_only_admins_export_other_users():
+    print("🔄 Testing another user's history is for admins only...")
+    from app import create_base_app, init_api_app
+    from routes.sessions import sessions_bp
+
+    with PocketBaseStub(records_per_collection=1000) as stub, stub.serving(pocketbase_service):
+        app = init_api_app(create_base_app('default'))
+        app.register_blueprint(sessions_bp)
+        client = app.test_client()
+        member, admin = record_id('users', 2), record_id('users', 3)
+        stub.collection('users')[admin]['role'] = 'admin'
+
+        def export(user, query=''):
+            return client.get(f'/api/study_sessions/export{query}', headers={'Authorization': 'Bearer ' + make_token(user)})
+
+        other = f'?user_id={record_id("users", 1)}'
+        assert export(member, other).status_code == 403
+        assert export(member, f'?user_id={member}').status_code == 200
+        response = export(admin, other)
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert lines and all(line['user'] == record_id('users', 1) for line in lines)
+    print("✅ Exports of other users are refused to non-admins")
+
+
+if __name__ == "__main__":
+    test_iter_user_sessions_walks_keyset_pages()
+    test_flatten_record()
+    test_csv_columns_come_from_the_schema()
+    test_stream_ndjson_and_csv()
+    test_export_releases_the_client_between_pages()
+    test_only_admins_export_other_users()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Test the serialize_record fast path produces the same output as the generic serializer
+"""
+
+import json
+
+from pocketbase.models.record import Record
+
+from benchmarks.bench_serialize_record import legacy_serialize_record, make_session_records
+from benchmarks.pocketbase_stub import make_record
+from services.pocketbase_service import serialize_record
+
+
+def test_fast_path_matches_legacy():
+    print("🔄 Testing fast path output against the legacy serializer...")
+    records = make_session_records(300)
+    for record in records:
+        assert serialize_record(record) == legacy_serialize_record(record)
+
+    # Records without expand or with an empty one
+    plain = Record(make_record('achievements', 1))
+    assert serialize_record(plain) == legacy_serialize_record(plain)
+
+
+def test_containers_are_copied():
+    print("🔄 Testing JSON fields are not shared with the record...")
+    record = make_session_records(1)[0]
+    serialized = serialize_record(record)
+    serialized['tags'].append('history')
+    serialized['meta']['device'] = 'ios'
+    assert record.tags == ['focus', 'math']
+    assert record.meta['device'] == 'android'
+
+
+def test_multi_relation_expand():
+    print("🔄 Testing multi-relation expands serialize to plain dicts...")
+    data = make_record('discussions', 1)
+    data['expand'] = {'participants': [make_record('users', 1), make_record('users', 2)]}
+    serialized = serialize_record(Record(data))
+    assert [user['id'] for user in serialized['expand']['participants']] == ['users0000000001', 'users0000000002']
+    json.dumps(serialized, default=str)
+
+
+if __name__ == "__main__":
+    test_fast_path_matches_legacy()
+    test_containers_are_copied()
+    test_multi_relation_expand()
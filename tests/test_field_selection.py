@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test `fields` projection and `expand` overrides, locally and through PocketBase
+"""
+
+from benchmarks.pocketbase_stub import PocketBaseStub, record_id
+from controllers import DiscussionController, StudySessionController
+from services.field_selection import FieldSelection
+from services.pocketbase_service import PocketBaseService
+from services.user_profile_cache import UserProfileCache
+
+
+def test_parse_and_project():
+    print("🔄 Testing field selections...")
+    assert FieldSelection.parse(None) is None
+    assert FieldSelection.parse(' , ') is None
+    # Malformed entries are ignored, the way PocketBase ignores unknown fields
+    selection = FieldSelection.parse("id,maxParticipants,expand.host.username,title:excerpt(10),a b")
+    assert selection.paths == ['id', 'maxParticipants', 'expand.host.username']
+    assert selection.upstream('host') == 'id,maxParticipants,expand.host.username,host'
+    assert FieldSelection.parse('room_name').upstream() == 'room_name,roomName'
+
+    room = {
+        'id': 'r1', 'max_participants': 20, 'host': 'u1', 'created': '',
+        'expand': {'host': {'id': 'u1', 'username': 'student', 'email': 'a@b.c'}}
+    }
+    assert selection.project(room) == {'id': 'r1', 'max_participants': 20, 'expand': {'host': {'username': 'student'}}}
+    assert FieldSelection.parse('expand.*.id').project(room) == {'expand': {'host': {'id': 'u1'}}}
+    assert FieldSelection.parse('*,expand.host.id').project(room)['expand'] == {'host': {'id': 'u1'}}
+    # A whole selection wins over a narrower one for the same key
+    assert FieldSelection.parse('expand.host.id,expand').project(room)['expand'] == room['expand']
+    print("✅ Selections parse and project")
+
+
+def test_controllers_pass_fields_and_expand_upstream():
+    print("🔄 Testing fields and expand through the controllers...")
+    with PocketBaseStub(records_per_collection=30) as stub:
+        service = PocketBaseService(stub.url)
+        sessions = StudySessionController(service)
+        sessions.profiles = UserProfileCache()
+        session_id = record_id('study_sessions', 3)
+
+        # room is expanded by PocketBase, user from the profile cache
+        selection = FieldSelection.parse('id,startedAt,expand.room.roomName,expand.user.username')
+        session = sessions.get_by_id(session_id, expand='user,room', fields=selection)
+        assert session == {
+            'id': session_id,
+            'started_at': session['started_at'],
+            'expand': {'room': {'room_name': 'Room 3'}, 'user': {'username': 'student3'}}
+        }
+
+        # The default expand is replaced, and an empty one expands nothing
+        assert sessions.get_by_id(session_id, expand='', fields=FieldSelection.parse('id,expand'))['expand'] == {}
+        full = sessions.get_user_sessions(record_id('users', 3))
+        assert full and 'room' in full[0]['expand']
+        bare = sessions.get_user_sessions(record_id('users', 3), expand=None)
+        assert bare and not bare[0]['expand']
+
+        # Keyset pages still get a cursor when id and the sort field are not selected
+        discussions = DiscussionController(service)
+        discussions.profiles = UserProfileCache()
+        page = discussions.get_page_after('created', 5, fields=FieldSelection.parse('title'))
+        assert page['last'] is not None
+        assert all(list(item) == ['title'] for item in page['items'])
+
+        streamed = list(discussions.iter_all_discussions(fields=FieldSelection.parse('expand.author.username')))
+        assert len(streamed) == 30 and all(list(item['expand']['author']) == ['username'] for item in streamed)
+    print("✅ Projection reaches PocketBase and local expands")
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Test write-behind heartbeat aggregation
+"""
+
+from contextlib import contextmanager
+import time
+
+from pocketbase.errors import ClientResponseError
+
+from benchmarks.pocketbase_stub import PocketBaseStub, record_id
+from services.heartbeat_aggregator import HeartbeatAggregator
+from services.pocketbase_service import PocketBaseService
+
+
+class FakeCollection:
+    def __init__(self, service):
+        self.service = service
+
+    def update(self, record_id, data):
+        if self.service.error is not None:
+            raise self.service.error
+        self.service.writes.append((record_id, data))
+
+
+class FakeClient:
+    def __init__(self, service):
+        self.service = service
+
+    def collection(self, name):
+        return FakeCollection(self.service)
+
+
+class FakeService:
+    """Stands in for PocketBaseService.authenticated_client"""
+    def __init__(self):
+        self.writes = []
+        self.tokens = []
+        self.error = None
+
+    @contextmanager
+    def authenticated_client(self, token):
+        self.tokens.append(token)
+        yield FakeClient(self)
+
+
+def make_aggregator():
+    service = FakeService()
+    return service, HeartbeatAggregator(service, flush_interval=0)
+
+
+def test_beats_accumulate_in_memory():
+    print("🔄 Testing heartbeats are counted without upstream writes...")
+    service, aggregator = make_aggregator()
+    aggregator.track({'id': 's1', 'user': 'u1', 'active_duration': 5, 'active': True})
+
+    assert aggregator.owner_of('s1') == 'u1'
+    assert aggregator.beat('s1', True, 'tok') == 6
+    assert aggregator.beat('s1', True, 'tok') == 7
+    assert aggregator.beat('s1', False, 'tok') == 7
+    assert aggregator.beat('missing', True, 'tok') is None
+    assert service.writes == []
+
+
+def test_flush_writes_once_per_session():
+    print("🔄 Testing batched flush...")
+    service, aggregator = make_aggregator()
+    aggregator.track({'id': 's1', 'user': 'u1', 'active_duration': 0, 'active': True})
+    aggregator.track({'id': 's2', 'user': 'u2', 'active_duration': 0, 'active': True})
+    for _ in range(10):
+        aggregator.beat('s1', True, 'tok1')
+    aggregator.beat('s2', True, 'tok2')
+
+    assert aggregator.flush() == 2
+    assert sorted(service.writes) == [
+        ('s1', {'active': True, 'active_duration+': 10}),
+        ('s2', {'active': True, 'active_duration+': 1}),
+    ]
+    assert sorted(service.tokens) == ['tok1', 'tok2']
+
+    # Nothing changed since the last flush
+    assert aggregator.flush() == 0
+    assert aggregator.stats() == {'tracked': 2, 'dirty': 0}
+
+
+def test_finish_returns_unflushed_duration():
+    print("🔄 Testing forced flush on stop...")
+    service, aggregator = make_aggregator()
+    aggregator.track({'id': 's1', 'user': 'u1', 'active_duration': 3, 'active': True})
+    aggregator.beat('s1', True, 'tok')
+
+    # Only the seconds not yet added in PocketBase
+    with aggregator.finishing('s1') as pending:
+        assert pending == 1
+    assert aggregator.owner_of('s1') is None
+    with aggregator.finishing('s1') as pending:
+        assert pending is None
+    assert aggregator.flush() == 0
+
+
+def test_failed_closing_update_keeps_pending_seconds():
+    print("🔄 Testing a failed stop keeps unflushed heartbeats...")
+    service, aggregator = make_aggregator()
+    aggregator.track({'id': 's1', 'user': 'u1', 'active_duration': 3, 'active': True})
+    aggregator.beat('s1', True, 'tok')
+    aggregator.beat('s1', True, 'tok')
+
+    def end_session(add_duration):
+        raise Exception("Failed to update record: circuit open")
+
+    try:
+        with aggregator.finishing('s1') as pending:
+            end_session(add_duration=pending)
+    except Exception:
+        pass
+    assert aggregator.owner_of('s1') == 'u1'
+    assert aggregator.stats() == {'tracked': 1, 'dirty': 1}
+
+    # The next flush, or the retried stop, still writes them
+    assert aggregator.flush() == 1
+    assert service.writes == [('s1', {'active': True, 'active_duration+': 2})]
+
+
+def test_workers_add_up_instead_of_overwriting():
+    print("🔄 Testing two workers flushing the same session...")
+    with PocketBaseStub(records_per_collection=10) as stub:
+        session_id = record_id('study_sessions', 3)
+        stub.collection('study_sessions')[session_id]['active_duration'] = 5
+        service = PocketBaseService(stub.url)
+        session = service.get_record('study_sessions', session_id)
+        # Two processes load the session at the same time and receive different heartbeats
+        first = HeartbeatAggregator(service, flush_interval=0)
+        second = HeartbeatAggregator(service, flush_interval=0)
+        first.track(session)
+        second.track(session)
+        for _ in range(3):
+            first.beat(session_id, True, 'tok')
+        second.beat(session_id, True, 'tok')
+
+        assert first.flush() == 1 and second.flush() == 1
+        assert stub.collection('study_sessions')[session_id]['active_duration'] == 9
+
+
+def test_flush_if_due_runs_from_requests():
+    print("🔄 Testing request-driven flush...")
+    service = FakeService()
+    aggregator = HeartbeatAggregator(service, flush_interval=60)
+    aggregator._thread = object()  # no background thread, as on a serverless instance
+    aggregator.track({'id': 's1', 'user': 'u1', 'active_duration': 0, 'active': True})
+    aggregator.beat('s1', True, 'tok')
+
+    assert aggregator.flush_if_due() == 0
+    aggregator._last_flush = time.monotonic() - 61
+    assert aggregator.flush_if_due() == 1
+    assert service.writes == [('s1', {'active': True, 'active_duration+': 1})]
+    # Only once per interval
+    aggregator.beat('s1', True, 'tok')
+    assert aggregator.flush_if_due() == 0
+
+
+def test_rejected_token_is_evicted_when_idle():
+    print("🔄 Testing sessions with a rejected token are dropped...")
+    service, aggregator = make_aggregator()
+    aggregator.idle_timeout = 0
+    aggregator.track({'id': 's1', 'user': 'u1', 'active_duration': 0, 'active': True})
+    aggregator.track({'id': 's2', 'user': 'u2', 'active_duration': 0, 'active': True})
+    aggregator.beat('s1', True, 'expired')
+    aggregator.beat('s2', True, 'tok')
+
+    # A transient failure keeps the session for the next pass
+    service.error = ClientResponseError(status=0)
+    assert aggregator.flush() == 0
+    assert aggregator.stats() == {'tracked': 2, 'dirty': 2}
+
+    # A rejected token cannot be retried, so the idle session is dropped
+    service.error = ClientResponseError(status=401)
+    assert aggregator.flush() == 0
+    assert aggregator.owner_of('s1') is None
+    assert aggregator.stats() == {'tracked': 0, 'dirty': 0}
+
+
+if __name__ == "__main__":
+    test_beats_accumulate_in_memory()
+    test_flush_writes_once_per_session()
+    test_finish_returns_unflushed_duration()
+    test_failed_closing_update_keeps_pending_seconds()
+    test_workers_add_up_instead_of_overwriting()
+    test_flush_if_due_runs_from_requests()
+    test_rejected_token_is_evicted_when_idle()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test the orjson-backed JSON provider against Flask's default provider
+"""
+
+from datetime import datetime, timezone
+from decimal import Decimal
+import json
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from pocketbase.models.record import Record
+
+from benchmarks.pocketbase_stub import make_record
+from services.pocketbase_service import serialize_record
+import utils.json_provider as json_provider
+from utils.json_provider import FastJSONProvider
+
+
+def make_payload():
+    discussion = make_record('discussions', 1)
+    discussion['expand'] = {'author': make_record('users', 1)}
+    return {
+        'discussions': [serialize_record(Record(discussion))],
+        'count': 1,
+        'at': datetime(2025, 10, 2, 8, 0, tzinfo=timezone.utc),
+        'score': Decimal('87.5'),
+        'by_hour': {8: 3},
+        'title': 'Révision ✓'
+    }
+
+
+def test_responses_match_default_provider():
+    print("🔄 Testing responses decode to the default provider's values...")
+    app = Flask(__name__)
+    app.debug = False
+    default, fast = DefaultJSONProvider(app), FastJSONProvider(app)
+    assert fast.encoder == 'orjson'
+    payload = make_payload()
+    with app.app_context():
+        expected = json.loads(default.response(payload).get_data())
+        body = fast.response(payload).get_data()
+    assert json.loads(body) == expected
+    # Dates keep Flask's HTTP date format
+    assert expected['at'] == 'Thu, 02 Oct 2025 08:00:00 GMT'
+    assert json.loads(body)['discussions'][0]['created'].endswith(' GMT')
+    assert body.endswith(b'\n') and b'\n ' not in body
+    print("✅ Responses match")
+
+
+def test_debug_indent_records_and_fallbacks():
+    print("🔄 Testing indentation, raw records and encoder fallbacks...")
+    app = Flask(__name__)
+    app.debug = True
+    fast = FastJSONProvider(app)
+    with app.app_context():
+        assert b'\n  "a": 1' in fast.response({'a': 1}).get_data()
+
+    record = Record(make_record('users', 2))
+    assert fast.loads(fast.dumps({'user': record})) == json.loads(fast.dumps({'user': serialize_record(record)}))
+    # orjson rejects integers beyond 64 bits; the standard encoder takes over
+    assert fast.loads(fast.dumps({'big': 2 ** 70})) == {'big': 2 ** 70}
+    assert fast.dumps({'b': 1, 'a': 2}, indent=4) == json.dumps({'a': 2, 'b': 1}, indent=4)
+    print("✅ Indentation and fallbacks work")
+
+
+def test_standard_library_without_orjson(monkeypatch):
+    print("🔄 Testing the provider without orjson installed...")
+    monkeypatch.setattr(json_provider, 'orjson', None)
+    app = Flask(__name__)
+    fast = FastJSONProvider(app)
+    assert fast.encoder == 'json'
+    payload = make_payload()
+    with app.app_context():
+        assert fast.response(payload).get_data() == DefaultJSONProvider(app).response(payload).get_data()
+    assert fast.loads('{"a": [1, 2]}') == {'a': [1, 2]}
+    print("✅ Standard library fallback works")
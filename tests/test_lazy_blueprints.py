@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test lazy blueprint registration and the startup profile
+"""
+
+import sys
+import threading
+
+from flask import Blueprint, Flask, jsonify
+
+from utils.lazy_blueprints import LazyBlueprints
+from utils.startup_profile import StartupProfile
+
+alpha_bp = Blueprint('alpha', __name__, url_prefix='/api/alpha')
+beta_bp = Blueprint('beta', __name__, url_prefix='/api/beta')
+batch_bp = Blueprint('batch', __name__, url_prefix='/api/batch')
+
+
+@alpha_bp.route('/')
+def alpha():
+    return jsonify({'blueprint': 'alpha'})
+
+
+@beta_bp.route('/')
+def beta():
+    return jsonify({'blueprint': 'beta'})
+
+
+@batch_bp.route('/', methods=['POST'])
+def batch():
+    return jsonify({'blueprint': 'batch'})
+
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.route('/health')
+    def health():
+        return jsonify({'status': 'healthy'})
+
+    specs = [
+        ('/api/alpha', __name__, 'alpha_bp'),
+        ('/api/beta', __name__, 'beta_bp'),
+        ('/api/batch', __name__, 'batch_bp'),
+    ]
+    built = []
+
+    def build_app():
+        built.append(Flask(__name__))
+        return built[-1]
+
+    lazy = LazyBlueprints(app, specs, build_app, load_all_prefixes=('/api/batch',))
+    return app, lazy, built
+
+
+def test_blueprints_load_on_first_request():
+    print("🔄 Testing blueprints load on the first request under their prefix...")
+    app, lazy, built = make_app()
+    client = app.test_client()
+    assert client.get('/health').status_code == 200
+    assert built == [] and len(lazy.pending) == 3
+
+    assert client.get('/api/alpha/').get_json() == {'blueprint': 'alpha'}
+    assert list(lazy.apps) == ['/api/alpha']
+    assert set(lazy.apps['/api/alpha'].blueprints) == {'alpha'}
+    assert sorted(lazy.pending) == [__name__, __name__]
+    # The running app itself never gains routes
+    assert app.blueprints == {}
+
+    # Later requests reuse the app; unknown paths load nothing
+    assert client.get('/api/alpha/').status_code == 200
+    assert client.get('/api/alphabet/').status_code == 404
+    assert len(built) == 1
+    print("✅ Blueprints loaded on demand")
+
+
+def test_batch_prefix_loads_every_blueprint():
+    print("🔄 Testing a batch request loads every blueprint...")
+    app, lazy, built = make_app()
+    client = app.test_client()
+    assert client.post('/api/batch/').get_json() == {'blueprint': 'batch'}
+    assert set(lazy.apps[LazyBlueprints.ALL].blueprints) == {'alpha', 'beta', 'batch'}
+    assert lazy.pending == []
+    assert client.get('/api/beta/').status_code == 200
+    print("✅ Batch loaded every blueprint")
+
+
+def test_concurrent_first_requests_build_one_app():
+    print("🔄 Testing concurrent first requests share one build...")
+    app, lazy, built = make_app()
+    results = []
+
+    def request():
+        results.append(app.test_client().get('/api/beta/').status_code)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [200] * 8
+    assert len(built) == 1
+    print("✅ One app built for concurrent first requests")
+
+
+def test_startup_profile_times_phases_and_imports():
+    print("🔄 Testing the startup profile...")
+    profile = StartupProfile()
+    with profile.phase('disabled'):
+        pass
+    assert profile.report()['phases'] == []
+
+    sys.modules.pop('colorsys', None)
+    profile.install()
+    try:
+        with profile.phase('outer'):
+            with profile.phase('inner'):
+                import colorsys  # noqa: F401
+    finally:
+        profile.uninstall()
+
+    report = profile.report()
+    phases = {row['name']: row for row in report['phases']}
+    assert list(phases) == ['inner', 'outer']
+    assert phases['outer']['total_ms'] >= phases['inner']['total_ms']
+    assert phases['outer']['self_ms'] <= phases['outer']['total_ms']
+    assert 'colorsys' in [row['name'] for row in report['imports']]
+    print("✅ Startup profile reported nested phases")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Test the in-memory leaderboard index
+"""
+
+from contextlib import contextmanager
+import random
+
+from flask import Flask
+
+from services.leaderboard_index import IndexableSkipList, LeaderboardIndex
+
+
+class FakeService:
+    """Serves leaderboard records the way PocketBaseService does"""
+    def __init__(self, records):
+        self.records = records
+
+    def iter_records(self, collection, per_page=200, filter_query="", sort="", expand=None):
+        return iter(self.records)
+
+    def list_records(self, collection, page=1, per_page=30, filter_query="", sort="", expand=None):
+        user_id = filter_query.split("'")[1]
+        return {'items': [r for r in self.records if r['user'] == user_id][:per_page]}
+
+
+class AuthenticatedService(FakeService):
+    """Leaderboard rules that require an authenticated user"""
+    def __init__(self, records):
+        super().__init__(records)
+        self.token = None
+        self.used_tokens = []
+
+    def get_auth_token(self):
+        return self.token
+
+    @contextmanager
+    def acting_as(self, token):
+        previous, self.token = self.token, token
+        try:
+            yield
+        finally:
+            self.token = previous
+
+    def iter_records(self, collection, per_page=200, filter_query="", sort="", expand=None):
+        if not self.token:
+            raise Exception("Failed to list records: 403")
+        self.used_tokens.append(self.token)
+        return super().iter_records(collection, per_page, filter_query, sort, expand)
+
+
+def test_skip_list_matches_sorted_list():
+    print("🔄 Testing skip list against a sorted list...")
+    rng = random.Random(7)
+    skip_list = IndexableSkipList(seed=7)
+    reference = []
+    for _ in range(2000):
+        key = rng.randint(0, 500)
+        if key in reference and rng.random() < 0.5:
+            skip_list.remove(key)
+            reference.remove(key)
+        elif key not in reference:
+            skip_list.insert(key)
+            reference.append(key)
+            reference.sort()
+
+    assert len(skip_list) == len(reference)
+    assert list(skip_list.slice(0, len(reference))) == reference
+    for index, key in enumerate(reference):
+        assert skip_list.rank(key) == index
+    assert list(skip_list.slice(10, 20)) == reference[10:20]
+
+
+def test_top_rank_and_around():
+    print("🔄 Testing top-N, rank and neighbours...")
+    records = [{'id': f"lb{i}", 'user': f"u{i}", 'total_day': i * 10} for i in range(50)]
+    service = FakeService(records)
+    index = LeaderboardIndex(service)
+    index.ensure_fresh()
+
+    top = index.top(3)
+    assert [entry['user'] for entry in top] == ['u49', 'u48', 'u47']
+    assert [entry['rank'] for entry in top] == [1, 2, 3]
+
+    assert index.rank_of('u0')['rank'] == 50
+    assert index.rank_of('nobody') is None
+
+    around = index.around('u25', radius=2)
+    assert [entry['user'] for entry in around] == ['u27', 'u26', 'u25', 'u24', 'u23']
+    assert around[0]['rank'] == 23
+
+    # A session stop moves u0 to the top
+    records[0]['total_day'] = 10_000
+    index.refresh_user('u0')
+    assert index.rank_of('u0')['rank'] == 1
+    assert index.rank_of('u49')['rank'] == 2
+
+    stats = index.stats()
+    assert stats['size'] == 50 and stats['loaded']
+
+
+def test_background_rebuild_uses_last_caller_token():
+    print("🔄 Testing rebuilds outside a request are authenticated...")
+    service = AuthenticatedService([{'id': 'lb1', 'user': 'u1', 'total_day': 5}])
+    index = LeaderboardIndex(service)
+
+    # A request reads the leaderboard with its own token
+    with Flask(__name__).app_context():
+        service.token = 'request-token'
+        index.ensure_fresh()
+        service.token = None
+
+    # The event stream producer thread has no request; its rebuild acts as that user
+    index.loaded_at = None
+    index.ensure_fresh()
+    assert service.used_tokens == ['request-token', 'request-token']
+    assert index.rank_of('u1')['rank'] == 1
+
+
+def test_entries_keep_only_public_profiles():
+    print("🔄 Testing a caller's own email is not served to others...")
+    records = [
+        {'id': 'lb1', 'user': 'u1', 'total_day': 5,
+         'expand': {'user': {'id': 'u1', 'username': 'first', 'email': 'u1@example.com', 'email_visibility': False}}},
+        {'id': 'lb2', 'user': 'u2', 'total_day': 9,
+         'expand': {'user': {'id': 'u2', 'username': 'second', 'email': 'u2@example.com', 'email_visibility': True}}},
+    ]
+    index = LeaderboardIndex(FakeService(records))
+    index.ensure_fresh()
+    assert 'email' not in index.rank_of('u1')['expand']['user']
+    # A user who made their email visible keeps it
+    assert index.rank_of('u2')['expand']['user']['email'] == 'u2@example.com'
+
+    # u1 stops a session: the refresh is read with u1's token, which shows u1 their own email
+    records[0]['total_day'] = 50
+    assert 'email' not in index.refresh_user('u1')['expand']['user']
+    top = index.top(2)
+    assert top[0]['user'] == 'u1' and 'email' not in top[0]['expand']['user']
+    assert records[0]['expand']['user']['email'] == 'u1@example.com'
+
+
+if __name__ == "__main__":
+    test_skip_list_matches_sorted_list()
+    test_top_rank_and_around()
+    test_background_rebuild_uses_last_caller_token()
+    test_entries_keep_only_public_profiles()
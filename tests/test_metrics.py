@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Test the Prometheus metrics middleware and PocketBase call tracking
+"""
+
+import time
+
+from flask import Flask, jsonify
+
+from services.metrics import Histogram, MetricsRegistry
+
+
+def make_app(registry):
+    app = Flask(__name__)
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    registry.init_app(app)
+
+    @app.route('/items/<item_id>')
+    def get_item(item_id):
+        if item_id == 'broken':
+            raise RuntimeError('boom')
+        return jsonify({'id': item_id}), 200
+
+    return app.test_client()
+
+
+def test_histogram_buckets():
+    print("🔄 Testing cumulative histogram buckets...")
+    histogram = Histogram((0.01, 0.1))
+    for value in (0.005, 0.01, 0.05, 2):
+        histogram.observe(value)
+    assert histogram.cumulative() == [('0.01', 2), ('0.1', 3), ('+Inf', 4)]
+    assert histogram.count == 4
+
+
+def test_route_metrics():
+    print("🔄 Testing per-route latency, status and error metrics...")
+    registry = MetricsRegistry()
+    client = make_app(registry)
+    client.get('/items/a')
+    client.get('/items/b')
+    client.get('/items/broken')
+    client.get('/missing')
+
+    text = registry.render()
+    assert 'studyleague_http_request_duration_seconds_count{route="/items/<item_id>",method="GET"} 3' in text
+    assert 'studyleague_http_responses_total{route="/items/<item_id>",method="GET",status="200"} 2' in text
+    assert 'studyleague_http_errors_total{route="/items/<item_id>",method="GET"} 1' in text
+    assert 'studyleague_http_responses_total{route="unmatched",method="GET",status="404"} 1' in text
+    assert 'studyleague_http_requests_in_flight{route="/items/<item_id>"} 0' in text
+
+
+def test_track_upstream():
+    print("🔄 Testing PocketBaseService method tracking...")
+    registry = MetricsRegistry()
+
+    class Service:
+        @registry.track_upstream()
+        def get_record(self, collection, record_id):
+            if record_id == 'missing':
+                raise Exception('Failed to get record')
+            return {'id': record_id}
+
+        @registry.track_upstream('users')
+        def verify_token(self, token):
+            return {'valid': True}
+
+    service = Service()
+    service.get_record('study_rooms', 'a')
+    try:
+        service.get_record('study_rooms', 'missing')
+    except Exception:
+        pass
+    service.verify_token('token')
+
+    text = registry.render()
+    assert 'studyleague_pocketbase_call_duration_seconds_count{method="get_record",collection="study_rooms"} 2' in text
+    assert 'studyleague_pocketbase_errors_total{method="get_record",collection="study_rooms"} 1' in text
+    assert 'studyleague_pocketbase_call_duration_seconds_count{method="verify_token",collection="users"} 1' in text
+    assert 'studyleague_pocketbase_calls_in_flight 0' in text
+
+
+def test_phases_are_timed_apart_from_upstream():
+    print("🔄 Testing validation and serialization phases...")
+    registry = MetricsRegistry()
+
+    @registry.track_phase('serialize')
+    def serialize(record, depth=0):
+        time.sleep(0.02)
+        # Nested calls (expanded relations) are part of the outer observation
+        return dict(record, expand=serialize({}, depth + 1) if depth == 0 else {})
+
+    class Service:
+        @registry.track_upstream()
+        def get_record(self, collection, record_id):
+            time.sleep(0.01)
+            return serialize({'id': record_id})
+
+    app = Flask(__name__)
+    registry.init_app(app)
+
+    @app.route('/items/<item_id>')
+    def get_item(item_id):
+        return Service().get_record('items', item_id)
+
+    @app.route('/validated')
+    @registry.track_phase('validate')
+    def validated():
+        return Service().get_record('items', 'b')
+
+    client = app.test_client()
+    client.get('/items/a')
+    text = registry.render()
+    assert 'studyleague_phase_duration_seconds_count{phase="serialize",route="/items/<item_id>"} 1' in text
+    # Serialization is reported on its own and no longer counted as PocketBase time
+    assert registry._phases[('serialize', '/items/<item_id>')].sum >= 0.04
+    assert registry._upstream[('get_record', 'items')].sum < 0.03
+
+    # Outside a request each call is observed under `background`
+    Service().get_record('items', 'c')
+    assert registry._phases[('serialize', 'background')].count == 1
+
+    # A phase running inside another phase is attributed to the outer one only
+    client.get('/validated')
+    assert registry._phases[('validate', '/validated')].count == 1
+    assert ('serialize', '/validated') not in registry._phases
+
+
+def test_overhead():
+    print("🔄 Testing recording overhead stays small...")
+    registry = MetricsRegistry()
+    started = time.perf_counter()
+    for index in range(20000):
+        registry.observe_request(f'/route/{index % 20}', 'GET', 200, 0.01)
+    per_call_us = (time.perf_counter() - started) / 20000 * 1e6
+    print(f"✅ {per_call_us:.2f} us per observation")
+    assert per_call_us < 50
+
+
+if __name__ == "__main__":
+    test_histogram_buckets()
+    test_route_metrics()
+    test_track_upstream()
+    test_phases_are_timed_apart_from_upstream()
+    test_overhead()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test keyset (cursor) pagination
+"""
+
+from flask import Flask
+
+from benchmarks.pocketbase_stub import PocketBaseStub
+from controllers.BaseController import BaseController
+from services.pocketbase_service import PocketBaseService
+from utils.pagination import CursorError, decode_cursor, encode_cursor, keyset_page
+
+
+def test_cursor_round_trip():
+    print("🔄 Testing cursor encoding and validation...")
+    token = encode_cursor('created', '2025-10-03 08:00:00.000Z', 'discus000000030')
+    assert decode_cursor(token, 'created') == ('2025-10-03 08:00:00.000Z', 'discus000000030')
+
+    for bad_token, sort_field in ((token, 'startedAt'), ('not-a-cursor', 'created'),
+                                  (encode_cursor('created', "' || id != '", 'x'), 'created')):
+        try:
+            decode_cursor(bad_token, sort_field)
+            assert False, f"{bad_token} should be rejected"
+        except CursorError:
+            pass
+
+
+def test_walk_every_page():
+    print("🔄 Testing pages cover every record once, newest first...")
+    with PocketBaseStub(records_per_collection=95) as stub:
+        service = PocketBaseService(stub.url)
+        controller = BaseController(service, 'discussions')
+        app = Flask(__name__)
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            stub.requests = 0
+            query = '?limit=20' + (f'&cursor={cursor}' if cursor else '')
+            with app.test_request_context(f'/discussions/{query}'):
+                payload, status = keyset_page(controller, 'created')
+            assert status == 200 and 'total_items' not in payload
+            # One upstream query per page, however deep
+            assert stub.requests == 1
+            seen.extend(payload['items'])
+            pages += 1
+            cursor = payload['next_cursor']
+            if not cursor:
+                break
+
+        assert pages == 5
+        assert len({item['id'] for item in seen}) == 95
+        keys = [(item['created'], item['id']) for item in seen]
+        assert keys == sorted(keys, reverse=True)
+
+        with app.test_request_context("/discussions/?limit=5&count=true"):
+            payload, _ = keyset_page(controller, 'created', "author = 'users0000000001'")
+        assert payload['total_items'] == 1 and len(payload['items']) == 1
+        assert payload['next_cursor'] is None
+        print(f"✅ {pages} pages, {len(seen)} records")
+
+
+def test_rejects_bad_limits():
+    print("🔄 Testing limit bounds...")
+    app = Flask(__name__)
+    for query in ('?limit=0', '?limit=1000'):
+        with app.test_request_context(f'/discussions/{query}'):
+            payload, status = keyset_page(None, 'created')
+        assert status == 400, query
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip()
+    test_walk_every_page()
+    test_rejects_bad_limits()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test the per-request PocketBase client pool
+"""
+
+from flask import Flask
+
+from services.pocketbase_pool import PocketBaseClientPool, PoolTimeoutError
+from services.pocketbase_service import PocketBaseService
+
+
+def test_pool_is_bounded():
+    print("🔄 Testing pool bound and wait timeout...")
+    pool = PocketBaseClientPool("http://127.0.0.1:8090", size=2, timeout=0.05)
+
+    first = pool.checkout()
+    second = pool.checkout()
+    assert first is not second
+
+    try:
+        pool.checkout()
+        assert False, "checkout should time out when the pool is exhausted"
+    except PoolTimeoutError:
+        pass
+
+    pool.checkin(first)
+    assert pool.checkout() is first
+
+    stats = pool.stats()
+    assert stats['created'] == 2
+    assert stats['in_use'] == 2
+    assert stats['timeouts'] == 1
+    print(f"✅ Stats: {stats}")
+
+
+def test_checkin_clears_auth():
+    print("🔄 Testing auth state is wiped on checkin...")
+    pool = PocketBaseClientPool("http://127.0.0.1:8090", size=1)
+    client = pool.checkout()
+    client.auth_store.save("some-token", None)
+    pool.checkin(client)
+    assert pool.checkout().auth_store.token == ""
+
+
+def test_client_per_app_context():
+    print("🔄 Testing each request gets its own client...")
+    service = PocketBaseService("http://127.0.0.1:8090",
+                                pool=PocketBaseClientPool("http://127.0.0.1:8090", size=2))
+    app = Flask(__name__)
+    service.init_app(app)
+
+    with app.app_context():
+        outer = service.pb
+        assert service.pb is outer
+        with app.app_context():
+            assert service.pb is not outer
+        assert service.pool.stats()['in_use'] == 1
+
+    assert service.pool.stats()['in_use'] == 0
+
+
+if __name__ == "__main__":
+    test_pool_is_bounded()
+    test_checkin_clears_auth()
+    test_client_per_app_context()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test the ETag response cache and its write invalidation
+"""
+
+from functools import wraps
+
+from flask import Blueprint, Flask, Response, g, jsonify, request
+
+from benchmarks.pocketbase_stub import PocketBaseStub, make_token
+from services.pocketbase_service import pocketbase_service
+from utils.response_cache import ResponseCache, response_cache
+
+
+def fake_auth(f):
+    """Stands in for require_auth: the authenticated user is whoever X-User names"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.auth_user_id = request.headers.get('X-User', '')
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def make_app(max_body_bytes=1024):
+    cache = ResponseCache(max_entries=10, ttl=60, max_body_bytes=max_body_bytes)
+    calls = []
+    items_bp = Blueprint('items', __name__, url_prefix='/items')
+    cache.invalidate_on_write(items_bp)
+
+    @items_bp.route('/', methods=['GET'])
+    @fake_auth
+    @cache.cached
+    def list_items():
+        calls.append(1)
+        return jsonify([{'id': 'a', 'version': len(calls), 'user': request.headers.get('X-User')}]), 200
+
+    @items_bp.route('/catalog', methods=['GET'])
+    @fake_auth
+    @cache.cached(shared=True)
+    def catalog():
+        calls.append(1)
+        return jsonify([{'id': 'c'}]), 200
+
+    @items_bp.route('/stream', methods=['GET'])
+    @cache.cached
+    def stream():
+        calls.append(1)
+        return Response((chunk for chunk in ['[', '1', ']']), mimetype='application/json'), 200
+
+    @items_bp.route('/', methods=['POST'])
+    def create_item():
+        return jsonify({'id': 'b'}), 201
+
+    @items_bp.route('/fail', methods=['POST'])
+    def fail():
+        return jsonify({'error': 'nope'}), 500
+
+    app = Flask(__name__)
+    app.register_blueprint(items_bp)
+    return app.test_client(), cache, calls
+
+
+def test_etag_and_304():
+    print("🔄 Testing strong ETags and conditional GET...")
+    client, cache, calls = make_app()
+
+    first = client.get('/items/')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag.startswith('"')
+
+    assert client.get('/items/', headers={'If-None-Match': etag}).status_code == 304
+    second = client.get('/items/')
+    assert second.get_json() == first.get_json()
+    assert len(calls) == 1
+
+    stats = cache.stats()['routes']['items.list_items']
+    assert (stats['misses'], stats['hits'], stats['not_modified']) == (1, 1, 1)
+    print(f"✅ Stats: {stats}")
+
+
+def test_writes_invalidate_blueprint():
+    print("🔄 Testing writes drop cached responses...")
+    client, cache, calls = make_app()
+    etag = client.get('/items/').headers['ETag']
+
+    # Failed writes keep the cache
+    client.post('/items/fail')
+    assert client.get('/items/', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post('/items/')
+    refreshed = client.get('/items/', headers={'If-None-Match': etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers['ETag'] != etag
+    assert len(calls) == 2
+
+
+def test_entries_are_per_user():
+    print("🔄 Testing users never see each other's cached responses...")
+    client, cache, calls = make_app()
+    assert client.get('/items/', headers={'X-User': 'u1'}).get_json()[0]['user'] == 'u1'
+    assert client.get('/items/', headers={'X-User': 'u2'}).get_json()[0]['user'] == 'u2'
+    assert client.get('/items/', headers={'X-User': 'u1'}).get_json()[0]['user'] == 'u1'
+    assert len(calls) == 2
+
+    # Shared views are cached once for everyone
+    client.get('/items/catalog', headers={'X-User': 'u1'})
+    client.get('/items/catalog', headers={'X-User': 'u2'})
+    assert len(calls) == 3
+
+
+def test_short_streams_are_cached():
+    print("🔄 Testing streamed responses within max_body_bytes are cached...")
+    client, cache, calls = make_app()
+    first = client.get('/items/stream')
+    assert first.get_json() == [1] and first.headers['ETag']
+    assert client.get('/items/stream').get_json() == [1]
+    assert client.get('/items/stream', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    assert len(calls) == 1 and cache.stats()['entries'] == 1
+
+
+def test_long_streams_are_not_cached():
+    print("🔄 Testing longer streamed responses bypass the cache...")
+    client, cache, calls = make_app(max_body_bytes=2)
+    # What was read before the limit is still sent, followed by the rest
+    assert client.get('/items/stream').get_json() == [1]
+    assert client.get('/items/stream').get_json() == [1]
+    assert len(calls) == 2 and cache.stats()['entries'] == 0
+    assert cache.stats()['routes']['items.stream']['bypassed'] == 2
+
+
+def test_public_rooms_and_discussions_are_cached():
+    print("🔄 Testing the streamed room and discussion listings are cached...")
+    from app import create_base_app, init_api_app
+    from routes.discussions import discussions_bp
+    from routes.rooms import rooms_bp
+
+    with PocketBaseStub(records_per_collection=40) as stub, stub.serving(pocketbase_service):
+        app = init_api_app(create_base_app('default'))
+        app.register_blueprint(rooms_bp)
+        app.register_blueprint(discussions_bp)
+        client = app.test_client()
+        headers = {'Authorization': 'Bearer ' + make_token('users0000000001')}
+        response_cache.invalidate('rooms')
+        response_cache.invalidate('discussions')
+
+        for path, endpoint in (('/api/rooms/?public=true', 'rooms.get_rooms'),
+                               ('/api/discussions/', 'discussions.get_discussions')):
+            first = client.get(path, headers=headers)
+            assert first.status_code == 200 and first.get_json() and first.headers['ETag']
+            stub.requests = 0
+            second = client.get(path, headers=headers)
+            assert second.get_json() == first.get_json() and stub.requests == 0
+            revalidated = client.get(path, headers=dict(headers, **{'If-None-Match': second.headers['ETag']}))
+            assert revalidated.status_code == 304
+            counters = response_cache.stats()['routes'][endpoint]
+            assert counters['hits'] >= 1 and counters['not_modified'] >= 1
+
+
+def test_miss_answers_matching_etag_with_304():
+    print("🔄 Testing a cache miss still honours If-None-Match...")
+    client, cache, calls = make_app()
+    etag = client.get('/items/catalog').headers['ETag']
+    # Expired or evicted entry, unchanged body
+    cache._entries.clear()
+    assert client.get('/items/catalog', headers={'If-None-Match': etag}).status_code == 304
+    assert len(calls) == 2
+
+
+if __name__ == "__main__":
+    test_etag_and_304()
+    test_writes_invalidate_blueprint()
+    test_entries_are_per_user()
+    test_short_streams_are_cached()
+    test_long_streams_are_not_cached()
+    test_public_rooms_and_discussions_are_cached()
+    test_miss_answers_matching_etag_with_304()
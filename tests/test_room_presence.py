@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test in-memory room presence and live occupancy on cached room listings
+"""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from flask import Blueprint, Flask, jsonify
+
+from services.room_presence import RoomPresence
+from utils.response_cache import ResponseCache
+
+
+class FakeCollection:
+    def __init__(self, service):
+        self.service = service
+
+    def update(self, record_id, data):
+        # Applies PocketBase's participants+ / participants- modifiers
+        self.service.writes.append((record_id, data))
+        change = data.get('participants+', 0) - data.get('participants-', 0)
+        self.service.stored[record_id] = self.service.stored.get(record_id, 0) + change
+        return SimpleNamespace(id=record_id, participants=self.service.stored[record_id])
+
+
+class FakeClient:
+    def __init__(self, service):
+        self.service = service
+
+    def collection(self, name):
+        return FakeCollection(self.service)
+
+
+class FakeService:
+    """Stands in for PocketBaseService.authenticated_client, shared by every worker"""
+    def __init__(self):
+        self.writes = []
+        self.stored = {}
+
+    @contextmanager
+    def authenticated_client(self, token):
+        yield FakeClient(self)
+
+
+def make_presence(ttl=60.0, service=None):
+    service = service or FakeService()
+    presence = RoomPresence(service, ttl=ttl, flush_interval=0, idle_timeout=0)
+    presence.track({'id': 'r1', 'participants': service.stored.get('r1', 0), 'max_participants': 2})
+    return service, presence
+
+
+def test_join_leave_and_capacity():
+    print("🔄 Testing join, heartbeat, leave and room capacity...")
+    service, presence = make_presence()
+
+    assert presence.join('r1', 'u1', 'tok') == 1
+    assert presence.join('r1', 'u1', 'tok') == 1
+    assert presence.join('r1', 'u2', 'tok') == 2
+    assert presence.join('r1', 'u3', 'tok') is None
+    assert presence.join('unknown', 'u1', 'tok') is None
+    assert presence.heartbeat('r1', 'u2', 'tok') == 2
+    assert presence.leave('r1', 'u2', 'tok') == 1
+    assert presence.leave('r1', 'u2', 'tok') is None
+    assert presence.heartbeat('r1', 'u2', 'tok') is None
+    # Each new seat was written as it was taken; the leave waits for the flush
+    assert service.writes == [('r1', {'participants+': 1})] * 2
+    assert service.stored == {'r1': 2}
+
+
+def test_silent_participants_expire():
+    print("🔄 Testing TTL expiry...")
+    service, presence = make_presence(ttl=0.05)
+    presence.join('r1', 'u1', 'tok')
+    presence._rooms['r1']['members']['u1'] -= 1
+    assert presence.count('r1') == 0
+    assert presence.heartbeat('r1', 'u1', 'tok') is None
+    # The freed seat can be taken again
+    assert presence.join('r1', 'u2', 'tok') == 1
+
+
+def test_flush_writes_changes_as_increments():
+    print("🔄 Testing batched persistence of counts...")
+    service, presence = make_presence(ttl=0.05)
+    service.stored['r2'] = 4
+    presence.track({'id': 'r2', 'participants': 4, 'max_participants': 10})
+    for user_id in ('u1', 'u2'):
+        presence.join('r1', user_id, 'tok')
+    presence.join('r2', 'u3', 'tok')
+    assert service.stored == {'r1': 2, 'r2': 5}
+    service.writes.clear()
+    assert presence.flush() == 0 and service.writes == []
+
+    # A leave and an expiry are written together as one decrement
+    presence.leave('r1', 'u1', 'tok')
+    presence._rooms['r1']['members']['u2'] -= 1
+    assert presence.flush() == 1
+    assert service.writes == [('r1', {'participants-': 2})] and service.stored['r1'] == 0
+
+    # Empty rooms are forgotten once this worker's participants are written off
+    presence.leave('r2', 'u3', 'tok')
+    assert presence.flush() == 1
+    assert not presence.is_tracked('r2') and not presence.is_tracked('r1')
+    assert service.stored['r2'] == 4
+    assert presence.stats() == {'rooms': 0, 'participants': 0, 'dirty': 0}
+
+
+def test_workers_share_the_stored_count():
+    print("🔄 Testing capacity and counts across workers...")
+    service, first = make_presence()
+    _, second = make_presence(service=service)
+
+    assert first.join('r1', 'u1', 'tok') == 1
+    assert second.join('r1', 'u2', 'tok') == 2
+    # The room is full in PocketBase, so the first worker refuses a third participant
+    assert first.join('r1', 'u3', 'tok') is None
+    assert service.stored == {'r1': 2}
+
+    # One worker's leave does not overwrite the other's participant
+    assert second.leave('r1', 'u2', 'tok') == 1
+    second.flush()
+    first.flush()
+    assert service.stored == {'r1': 1}
+    assert first.join('r1', 'u3', 'tok') == 2
+
+
+def test_requests_drive_the_flush():
+    print("🔄 Testing flushes without the background thread...")
+    service = FakeService()
+    presence = RoomPresence(service, flush_interval=0.05, idle_timeout=0)
+    presence._thread = object()  # as on a serverless host where the thread never runs
+    presence.track({'id': 'r1', 'participants': 0, 'max_participants': 5})
+    presence.join('r1', 'u1', 'tok')
+    presence.leave('r1', 'u1', 'tok')
+    assert presence.flush_if_due() == 0
+    presence._last_flush -= 1
+    assert presence.flush_if_due() == 1 and service.stored == {'r1': 0}
+
+
+def test_cached_listing_reports_live_occupancy():
+    print("🔄 Testing cached room listings carry live counts...")
+    service, presence = make_presence()
+    cache = ResponseCache(max_entries=10, ttl=60)
+    calls = []
+    rooms_bp = Blueprint('rooms', __name__, url_prefix='/rooms')
+    cache.invalidate_on_write(rooms_bp, exclude=('rooms.join',))
+
+    @rooms_bp.route('/', methods=['GET'])
+    @cache.cached(transform=presence.overlay)
+    def list_rooms():
+        calls.append(1)
+        return jsonify([{'id': 'r1', 'participants': 0}, {'id': 'r9', 'participants': 3}]), 200
+
+    @rooms_bp.route('/<room_id>/join', methods=['POST'])
+    def join(room_id):
+        return jsonify({'participants': presence.join(room_id, 'u1', 'tok')}), 200
+
+    app = Flask(__name__)
+    app.register_blueprint(rooms_bp)
+    client = app.test_client()
+
+    first = client.get('/rooms/')
+    assert [room['participants'] for room in first.get_json()] == [0, 3]
+    assert client.post('/rooms/r1/join').status_code == 200
+
+    second = client.get('/rooms/')
+    assert [room['participants'] for room in second.get_json()] == [1, 3]
+    assert second.headers['ETag'] != first.headers['ETag']
+    assert len(calls) == 1
+    assert client.get('/rooms/', headers={'If-None-Match': second.headers['ETag']}).status_code == 304
+
+
+if __name__ == "__main__":
+    test_join_leave_and_capacity()
+    test_silent_participants_expire()
+    test_flush_writes_changes_as_increments()
+    test_workers_share_the_stored_count()
+    test_requests_drive_the_flush()
+    test_cached_listing_reports_live_occupancy()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test single-flight coalescing of PocketBase reads and the circuit breaker
+"""
+
+import threading
+import time
+
+from flask import Flask
+from pocketbase.errors import ClientResponseError
+
+from benchmarks.pocketbase_stub import PocketBaseStub, make_token
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.pocketbase_pool import PocketBaseClientPool
+from services.pocketbase_service import PocketBaseService
+from services.single_flight import SingleFlight
+from utils.errors import error_response
+
+
+def run_concurrently(count, fn):
+    results, errors = [None] * count, []
+    barrier = threading.Barrier(count)
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = fn()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    print("🔄 Testing identical concurrent calls run once...")
+    flight = SingleFlight()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'items': [{'id': 'a'}]}
+
+    results, errors = run_concurrently(8, lambda: flight.do(('list_records', 'rooms'), fetch))
+    assert not errors and len(calls) == 1
+    assert all(result == {'items': [{'id': 'a'}]} for result in results)
+    # Every caller gets its own copy
+    results[0]['items'][0]['id'] = 'changed'
+    assert results[1]['items'][0]['id'] == 'a'
+    assert flight.stats() == {'calls': 8, 'coalesced': 7, 'in_flight': 0}
+
+
+def test_errors_reach_every_waiter():
+    print("🔄 Testing a failed call fails all of its waiters...")
+    flight = SingleFlight()
+
+    def fetch():
+        time.sleep(0.05)
+        raise Exception("upstream down")
+
+    results, errors = run_concurrently(4, lambda: flight.do('key', fetch))
+    assert len(errors) == 4
+    # Nothing is cached once the call finished
+    assert flight.do('key', lambda: 'fresh') == 'fresh'
+
+
+def test_service_coalesces_identical_reads():
+    print("🔄 Testing PocketBaseService reads against the stub...")
+    with PocketBaseStub(latency=0.1, records_per_collection=20) as stub:
+        service = PocketBaseService(stub.url, pool=PocketBaseClientPool(stub.url, size=2))
+        stub.requests = 0
+        results, errors = run_concurrently(10, lambda: service.list_records('achievements', 1, 5))
+        assert not errors and stub.requests == 1
+        assert all(len(result['items']) == 5 for result in results)
+
+        stub.requests = 0
+        run_concurrently(4, lambda: service.get_record('achievements', results[0]['items'][0]['id']))
+        assert stub.requests == 1
+
+        # Expanded reads depend on the caller, so two users do not share one
+        def read_as(token):
+            with service.acting_as(token):
+                return service.list_records('achievements', 1, 5, expand='user')
+
+        stub.requests = 0
+        tokens = [make_token('users0000000000'), make_token('users0000000001')]
+        results, errors = run_concurrently(2, lambda: read_as(tokens.pop()))
+        assert not errors and stub.requests == 2
+
+
+def test_breaker_opens_and_recovers():
+    print("🔄 Testing the circuit breaker...")
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.1)
+    attempts = []
+
+    def down():
+        attempts.append(1)
+        raise ClientResponseError("General request error", status=0)
+
+    def missing():
+        raise ClientResponseError("Not found", status=404)
+
+    for fn in (missing, missing, missing):
+        try:
+            breaker.call(fn)
+        except ClientResponseError:
+            pass
+    assert breaker.state == 'closed'
+
+    for _ in range(2):
+        try:
+            breaker.call(down)
+        except ClientResponseError:
+            pass
+    assert breaker.state == 'open'
+    try:
+        breaker.call(down)
+        assert False, "an open circuit must fail fast"
+    except CircuitOpenError:
+        pass
+    assert len(attempts) == 2
+
+    time.sleep(0.1)
+    assert breaker.call(lambda: 'up') == 'up'
+    assert breaker.state == 'closed'
+    assert breaker.stats()['rejected'] == 1 and breaker.stats()['opened'] == 1
+
+
+def test_service_fails_fast_when_pocketbase_is_down():
+    print("🔄 Testing PocketBaseService stops calling an unreachable PocketBase...")
+    with PocketBaseStub() as stub:
+        url = stub.url
+    service = PocketBaseService(url, pool=PocketBaseClientPool(url, size=1),
+                                breaker=CircuitBreaker(failure_threshold=3, reset_timeout=60))
+    failures = []
+    for _ in range(5):
+        try:
+            service.get_record('achievements', 'missing')
+        except CircuitOpenError:
+            failures.append('fast')
+        except Exception:
+            failures.append('upstream')
+    assert failures == ['upstream'] * 3 + ['fast'] * 2
+
+
+def test_routes_answer_503_while_the_circuit_is_open():
+    print("🔄 Testing an open circuit caught inside a route is a 503...")
+    app = Flask(__name__)
+
+    @app.route('/room')
+    def room():
+        try:
+            raise CircuitOpenError("PocketBase is unavailable, retry in 30s")
+        except Exception as e:
+            return error_response(e)
+
+    @app.route('/broken')
+    def broken():
+        try:
+            raise ValueError("boom")
+        except Exception as e:
+            return error_response(e)
+
+    client = app.test_client()
+    assert client.get('/room').status_code == 503
+    assert client.get('/broken').status_code == 500
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_execution()
+    test_errors_reach_every_waiter()
+    test_service_coalesces_identical_reads()
+    test_breaker_opens_and_recovers()
+    test_service_fails_fast_when_pocketbase_is_down()
+    test_routes_answer_503_while_the_circuit_is_open()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the pre-aggregated study statistics rollups
+"""
+
+from datetime import date, timedelta
+import re
+
+from services.statistics_rollups import StudyStatisticsRollups, session_day, window_start
+
+
+class FakeService:
+    """Serves study sessions the way PocketBaseService.iter_records does"""
+    def __init__(self, sessions):
+        self.sessions = sessions
+        self.filters = []
+
+    def iter_records(self, collection, per_page=200, filter_query="", sort="", expand=None):
+        self.filters.append(filter_query)
+        user = re.search(r"user = '([^']*)'", filter_query)
+        since = re.search(r"startedAt >= '([^ ]*)", filter_query).group(1)
+        return iter([
+            s for s in self.sessions
+            if (user is None or s['user'] == user.group(1)) and s['started_at'][:10] >= since
+        ])
+
+
+def session(session_id, user, day, duration):
+    return {'id': session_id, 'user': user, 'started_at': f"{day} 08:00:00.000Z", 'active_duration': duration}
+
+
+def test_session_day_and_window():
+    print("🔄 Testing session day and rollup window...")
+    assert session_day({'started_at': '2025-10-15 05:33:54.959Z'}) == date(2025, 10, 15)
+    assert session_day({'started_at': '', 'created': '2025-10-14 01:00:00.000Z'}) == date(2025, 10, 14)
+    assert session_day({}) is None
+    # Wednesday 1 Oct 2025: the week started in September
+    assert window_start(date(2025, 10, 1)) == date(2025, 9, 29)
+    assert window_start(date(2025, 10, 20)) == date(2025, 10, 1)
+
+
+def test_incremental_and_idempotent():
+    print("🔄 Testing incremental updates...")
+    today = StudyStatisticsRollups._today()
+    service = FakeService([session('s1', 'u1', today, 30)])
+    rollups = StudyStatisticsRollups(service)
+
+    summary = rollups.summary('u1')
+    assert (summary['today'], summary['this_week'], summary['this_month']) == (30, 30, 30)
+
+    # Ending a new session adds to every period; ending it again replaces its contribution
+    rollups.record_session(session('s2', 'u1', today, 15))
+    rollups.record_session(session('s2', 'u1', today, 20))
+    summary = rollups.summary('u1')
+    assert (summary['today'], summary['this_week'], summary['this_month']) == (50, 50, 50)
+    # Hydration happened once
+    assert len(service.filters) == 1
+
+
+def test_rebuild():
+    print("🔄 Testing bulk rebuild...")
+    today = StudyStatisticsRollups._today()
+    service = FakeService([session('s1', 'u1', today, 10), session('s2', 'u2', today, 40)])
+    rollups = StudyStatisticsRollups(service)
+    rollups.record_session(session('s9', 'u1', today, 999))  # drifted
+
+    assert rollups.rebuild() == 2
+    assert rollups.summary('u1')['today'] == 10
+    assert rollups.summary('u2')['this_month'] == 40
+    assert len(service.filters) == 1
+
+
+def test_window_ttl_and_eviction():
+    print("🔄 Testing the rollup window, refresh and eviction...")
+    today = StudyStatisticsRollups._today()
+    old = (window_start(today) - timedelta(days=40)).isoformat()
+    service = FakeService([session('s1', 'u1', today, 10), session('s0', 'u1', old, 500)])
+    rollups = StudyStatisticsRollups(service, ttl=60, max_users=2)
+
+    # Only the current window is read, and hydration filters on the field it buckets by
+    assert rollups.summary('u1')['this_month'] == 10
+    assert 'startedAt >=' in service.filters[0] and 'created >=' in service.filters[0]
+    assert all(day >= window_start(today) for day in rollups._users['u1']['daily'])
+
+    # Sessions ended on another worker are picked up once the ttl has passed
+    service.sessions.append(session('s2', 'u1', today, 5))
+    assert rollups.summary('u1')['today'] == 10
+    rollups._hydrated['u1'] -= 61
+    assert rollups.summary('u1')['today'] == 15
+
+    # Sessions of users not in memory are left to their next load
+    rollups.record_session(session('s3', 'u9', today, 7))
+    assert 'u9' not in rollups._users
+
+    # The least recently read user is forgotten beyond max_users
+    rollups.summary('u2')
+    rollups.summary('u3')
+    assert 'u1' not in rollups._users and set(rollups._hydrated) == {'u2', 'u3'}
+    assert all(entry[0] != 'u1' for entry in rollups._contributions.values())
+
+
+if __name__ == "__main__":
+    test_session_day_and_window()
+    test_incremental_and_idempotent()
+    test_rebuild()
+    test_window_ttl_and_eviction()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test the all-pages record iterator and streaming JSON array responses
+"""
+
+import json
+
+from flask import Flask
+
+from benchmarks.pocketbase_stub import PocketBaseStub
+from services.pocketbase_pool import PocketBaseClientPool
+from services.pocketbase_service import PocketBaseService
+from utils.streaming import stream_json_array
+
+
+def test_iter_records_walks_every_page():
+    print("🔄 Testing iter_records returns more than one page...")
+    with PocketBaseStub(records_per_collection=450) as stub:
+        service = PocketBaseService(stub.url)
+        records = list(service.iter_records('discussions', per_page=200, sort='-created', expand='author'))
+        assert len(records) == 450
+        assert len({record['id'] for record in records}) == 450
+        assert records[0]['expand']['author']['collection_name'] == 'users'
+        # 3 pages: 200 + 200 + 50
+        assert stub.requests == 3
+
+
+def test_stream_json_array():
+    print("🔄 Testing streamed JSON array matches the full list...")
+    with PocketBaseStub(records_per_collection=250) as stub:
+        service = PocketBaseService(stub.url, pool=PocketBaseClientPool(stub.url, size=1))
+        app = Flask(__name__)
+        service.init_app(app)
+
+        @app.route('/rooms')
+        def rooms():
+            return stream_json_array(service.iter_records('study_rooms', per_page=100))
+
+        @app.route('/empty')
+        def empty():
+            return stream_json_array(iter([]))
+
+        client = app.test_client()
+        response = client.get('/rooms')
+        body = json.loads(response.get_data(as_text=True))
+        assert response.status_code == 200
+        assert len(body) == 250
+
+        assert json.loads(client.get('/empty').get_data(as_text=True)) == []
+        # The pooled client is returned once the stream has been consumed
+        assert service.pool.stats()['in_use'] == 0
+
+
+if __name__ == "__main__":
+    test_iter_records_walks_every_page()
+    test_stream_json_array()
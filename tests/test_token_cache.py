@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test the verified-token cache used by require_auth
+"""
+
+import base64
+import json
+import time
+
+from services.token_cache import TokenCache, decode_token_exp
+
+
+def make_token(exp):
+    """Build an unsigned JWT-shaped token with the given exp claim"""
+    def encode(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip('=')
+    return f"{encode({'alg': 'HS256'})}.{encode({'id': 'user123', 'exp': exp})}.signature"
+
+
+class MockRecord:
+    def __init__(self, record_id):
+        self.id = record_id
+
+
+def test_decode_token_exp():
+    print("🔄 Testing local exp decoding...")
+    exp = int(time.time()) + 3600
+    assert decode_token_exp(make_token(exp)) == exp
+    assert decode_token_exp("not-a-jwt") is None
+    assert decode_token_exp("a.b.c") is None
+
+
+def test_hit_miss_and_invalidate():
+    print("🔄 Testing cache hits, misses and logout eviction...")
+    cache = TokenCache(max_size=10, ttl=60)
+    token = make_token(int(time.time()) + 3600)
+
+    assert cache.get(token) is None
+    cache.put(token, MockRecord('user123'))
+    assert cache.get(token).id == 'user123'
+
+    cache.invalidate(token)
+    assert cache.get(token) is None
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    print(f"✅ Stats: {stats}")
+
+
+def test_ttl_capped_by_exp():
+    print("🔄 Testing TTL capped at the token expiry...")
+    cache = TokenCache(max_size=10, ttl=3600)
+
+    expired = make_token(int(time.time()) - 10)
+    cache.put(expired, MockRecord('user123'))
+    assert cache.get(expired) is None
+
+    short_lived = make_token(time.time() + 0.05)
+    cache.put(short_lived, MockRecord('user123'))
+    assert cache.get(short_lived) is not None
+    time.sleep(0.1)
+    assert cache.get(short_lived) is None
+
+
+def test_lru_eviction():
+    print("🔄 Testing LRU bound...")
+    cache = TokenCache(max_size=2, ttl=60)
+    exp = int(time.time()) + 3600
+    tokens = [make_token(exp + i) for i in range(3)]
+
+    cache.put(tokens[0], MockRecord('a'))
+    cache.put(tokens[1], MockRecord('b'))
+    cache.get(tokens[0])  # touch, so tokens[1] becomes least recently used
+    cache.put(tokens[2], MockRecord('c'))
+
+    assert cache.get(tokens[0]) is not None
+    assert cache.get(tokens[1]) is None
+    assert cache.get(tokens[2]) is not None
+    assert cache.stats()['size'] == 2
+
+
+if __name__ == "__main__":
+    test_decode_token_exp()
+    test_hit_miss_and_invalidate()
+    test_ttl_capped_by_exp()
+    test_lru_eviction()
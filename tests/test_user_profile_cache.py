@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test the shared user-profile cache and controller relation resolution
+"""
+
+from benchmarks.pocketbase_stub import PocketBaseStub, record_id
+from controllers import DiscussionController, UserController
+from services.pocketbase_service import PocketBaseService
+from services.user_profile_cache import UserProfileCache
+
+
+def test_batched_fetch_and_hits():
+    print("🔄 Testing missing profiles are fetched in one query...")
+    with PocketBaseStub() as stub:
+        service = PocketBaseService(stub.url)
+        cache = UserProfileCache(max_size=100, ttl=60)
+        ids = [record_id('users', index) for index in range(40)]
+
+        stub.requests = 0
+        profiles = cache.get_many(service, ids + ids[:5] + ['', 'missing00000000'])
+        assert stub.requests == 1
+        assert sorted(profiles) == sorted(ids)
+        # Emails stay private unless the user made them visible
+        assert 'email' not in profiles[ids[0]]
+
+        stub.requests = 0
+        assert len(cache.get_many(service, ids[:10])) == 10
+        assert stub.requests == 0
+
+        # Ids that could break out of the filter are never sent upstream
+        assert cache.get_many(service, ["x' || id != '"]) == {}
+        assert stub.requests == 0
+        print(f"✅ {cache.stats()}")
+
+
+def test_controllers_resolve_user_relations():
+    print("🔄 Testing author expands come from the cache...")
+    with PocketBaseStub() as stub:
+        service = PocketBaseService(stub.url)
+        cache = UserProfileCache(max_size=500, ttl=60)
+        discussions = DiscussionController(service)
+        discussions.profiles = cache
+
+        first = discussions.get_all_discussions()
+        assert all(item['expand']['author']['id'] == item['author'] for item in first)
+
+        # 200 discussions by 200 authors: two list pages (the second empty) plus the
+        # 170 authors not seen yet, fetched 100 ids per query
+        stub.requests = 0
+        streamed = list(discussions.iter_all_discussions())
+        assert stub.requests == 4
+        assert len(streamed) == 200
+        assert all(item['expand']['author']['id'] == item['author'] for item in streamed)
+
+        stub.requests = 0
+        list(discussions.iter_all_discussions())
+        assert stub.requests == 2
+
+
+def test_update_invalidates_profile():
+    print("🔄 Testing profile updates drop the cached entry...")
+    with PocketBaseStub() as stub:
+        service = PocketBaseService(stub.url)
+        users = UserController(service)
+        users.profiles = UserProfileCache(max_size=10, ttl=60)
+        user_id = record_id('users', 3)
+
+        assert users.get_user_profile(user_id, viewer_id=record_id('users', 1))['first_name'] == 'Study'
+        users.update(user_id, {'first_name': 'Renamed'})
+        assert users.get_user_profile(user_id, viewer_id=record_id('users', 1))['first_name'] == 'Renamed'
+
+
+if __name__ == "__main__":
+    test_batched_fetch_and_hits()
+    test_controllers_resolve_user_relations()
+    test_update_invalidates_profile()
@@ -3,8 +3,11 @@ Shared authentication utilities for routes
 """
 
 from functools import wraps
-from flask import request, jsonify
+from flask import g, request, jsonify
 from services.pocketbase_service import pocketbase_service
+from services.pocketbase_pool import PoolTimeoutError
+from services.circuit_breaker import CircuitOpenError
+from utils.errors import error_response
 import inspect
 
 
@@ -30,17 +33,22 @@ def require_auth(f):
             
             if not user_id:
                 return jsonify({'error': 'Unable to retrieve user information'}), 401
+            # For per-user state further down the request (e.g. the response cache key)
+            g.auth_user_id = user_id
             
             # Check if the function expects a user_id parameter
             sig = inspect.signature(f)
             params = list(sig.parameters.keys())
             
             # If function expects user_id as first parameter, inject it
-            if params and params[0] == 'user_id':
+            # (unless the URL already supplies one, e.g. /users/user/<user_id>)
+            if params and params[0] == 'user_id' and 'user_id' not in kwargs:
                 return f(user_id, *args, **kwargs)
             else:
                 # Otherwise, just call the function normally (user can get ID via get_current_user if needed)
                 return f(*args, **kwargs)
+        except (PoolTimeoutError, CircuitOpenError) as e:
+            return error_response(e)
         except Exception as e:
             return jsonify({'error': f'Authentication failed: {str(e)}'}), 401
         finally:
@@ -50,6 +58,11 @@ def require_auth(f):
     
     return decorated_function
 
+def is_admin():
+    """Whether the authenticated user of the current request has the admin role"""
+    user = pocketbase_service.get_current_user()
+    return bool(user) and user.get('role') == 'admin'
+
 def get_auth_token_from_header():
     """Helper function to extract and set auth token from Authorization header"""
     auth_header = request.headers.get('Authorization')
@@ -0,0 +1,194 @@
+"""
+Response compression negotiated by Accept-Encoding
+gzip always, brotli when the brotli package is installed; buffered bodies below a size
+threshold are sent as-is and streamed bodies are compressed chunk by chunk as they are sent
+"""
+
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+from flask import Flask, Response, request
+from config import Config
+import threading
+import time
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# text/event-stream is left out on purpose: Server-Sent Events must reach the client frame by frame
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+))
+
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        # wbits=31: deflate with a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ResponseCompression:
+    """Compresses JSON and text responses and records ratio and CPU time per route"""
+
+    def __init__(self, enabled: bool = True, min_size: int = 1024, level: int = 6, brotli_quality: int = 4):
+        self.enabled = enabled
+        self.min_size = min_size
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def encodings(self) -> Tuple[str, ...]:
+        """Supported encodings, preferred first"""
+        return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def _encoder(self, encoding: str):
+        if encoding == 'br':
+            return _BrotliEncoder(self.brotli_quality)
+        return _GzipEncoder(self.level)
+
+    def negotiate(self, accept_encodings) -> Optional[str]:
+        """The client's highest-quality supported encoding (ties go to the preferred one), or None"""
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accept_encodings.quality(encoding)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def _record(self, route: str, encoding: str, size: int, compressed: int, cpu_seconds: float) -> None:
+        with self._lock:
+            counters = self._stats.get(route)
+            if counters is None:
+                counters = self._stats[route] = {'responses': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_seconds': 0.0, 'encodings': {}}
+            counters['responses'] += 1
+            counters['bytes_in'] += size
+            counters['bytes_out'] += compressed
+            counters['cpu_seconds'] += cpu_seconds
+            counters['encodings'][encoding] = counters['encodings'].get(encoding, 0) + 1
+
+    def _compressible(self, response: Response) -> bool:
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return False
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return False
+        if response.direct_passthrough or 'Content-Encoding' in response.headers:
+            return False
+        return 'no-transform' not in response.headers.get('Cache-Control', '')
+
+    def _stream(self, chunks: Iterable[Any], encoder, route: str, encoding: str) -> Iterator[bytes]:
+        """Compress a streamed body as it is sent; only the encoder's window is held in memory"""
+        size = compressed = 0
+        cpu_seconds = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                started = time.thread_time()
+                data = encoder.compress(chunk)
+                cpu_seconds += time.thread_time() - started
+                size += len(chunk)
+                if data:
+                    compressed += len(data)
+                    yield data
+            started = time.thread_time()
+            data = encoder.finish()
+            cpu_seconds += time.thread_time() - started
+            compressed += len(data)
+            yield data
+            self._record(route, encoding, size, compressed, cpu_seconds)
+        finally:
+            # The wrapped iterable may hold a request context or an upstream cursor
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+
+    def _after_request(self, response: Response) -> Response:
+        if not self._compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = self.negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+        if response.is_streamed:
+            length = response.content_length
+            if length is not None and length < self.min_size:
+                return response
+            response.response = self._stream(response.response, self._encoder(encoding), route, encoding)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            started = time.thread_time()
+            encoder = self._encoder(encoding)
+            data = encoder.compress(body) + encoder.finish()
+            self._record(route, encoding, len(body), len(data), time.thread_time() - started)
+            response.set_data(data)
+
+        response.headers['Content-Encoding'] = encoding
+        # The compressed bytes differ, so a strong validator would be wrong; If-None-Match compares weakly
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def init_app(self, app: Flask) -> None:
+        """Compress every eligible response of the app"""
+        if not self.enabled:
+            return
+        app.after_request(self._after_request)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-route compression ratio (bytes in / bytes out) and CPU time per compressed response"""
+        with self._lock:
+            routes = {}
+            for route, counters in self._stats.items():
+                routes[route] = dict(
+                    counters,
+                    encodings=dict(counters['encodings']),
+                    ratio=counters['bytes_in'] / counters['bytes_out'] if counters['bytes_out'] else 0.0,
+                    cpu_ms_per_response=counters['cpu_seconds'] * 1000 / counters['responses']
+                )
+            return {
+                'enabled': self.enabled,
+                'encodings': list(self.encodings),
+                'min_size': self.min_size,
+                'level': self.level,
+                'brotli_quality': self.brotli_quality,
+                'routes': routes
+            }
+
+
+# Global instance
+response_compression = ResponseCompression(
+    Config.COMPRESSION_ENABLED,
+    Config.COMPRESSION_MIN_SIZE,
+    Config.COMPRESSION_LEVEL,
+    Config.COMPRESSION_BROTLI_QUALITY
+)
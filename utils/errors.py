@@ -0,0 +1,21 @@
+"""
+Error responses for exceptions caught in routes
+"""
+
+from flask import jsonify
+
+from services.circuit_breaker import CircuitOpenError
+from services.pocketbase_pool import PoolTimeoutError
+
+
+def error_response(error: Exception):
+    """
+    JSON error for an exception a route could not handle
+    PocketBase being unavailable (open circuit) or saturated (no pooled client) is a 503 the
+    client can retry, not a 500
+    """
+    if isinstance(error, PoolTimeoutError):
+        return jsonify({'error': f'Service busy, please retry: {str(error)}'}), 503
+    if isinstance(error, CircuitOpenError):
+        return jsonify({'error': str(error)}), 503
+    return jsonify({'error': str(error)}), 500
@@ -0,0 +1,82 @@
+"""
+Flask JSON provider backed by orjson when it is installed
+Output decodes to what Flask's default provider produces: dates as HTTP dates, sorted keys,
+indented in debug mode (non-ASCII text is written as UTF-8 rather than escaped)
+"""
+
+from typing import Any, Optional, Union
+from flask import Flask, Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Arguments the orjson path can honour; any other json.dumps argument uses the standard encoder
+_ORJSON_DUMPS_ARGS = frozenset(('indent', 'separators', 'default', 'sort_keys', 'ensure_ascii'))
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    DefaultJSONProvider with orjson encoding and decoding
+    Values orjson rejects (integers beyond 64 bits, unknown types) fall back to the standard
+    encoder, as does everything when orjson is not installed
+    """
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        # Records normally arrive serialized; one returned as-is is serialized the same way
+        # (imported here, as the PocketBase SDK is only loaded with the first route that needs it)
+        from services.pocketbase_service import Record, serialize_record
+        if isinstance(o, Record):
+            return serialize_record(o)
+        return DefaultJSONProvider.default(o)
+
+    @property
+    def encoder(self) -> str:
+        return 'orjson' if orjson is not None else 'json'
+
+    def _options(self, indent: Optional[int], sort_keys: bool) -> int:
+        # Dates go through default() so they keep Flask's HTTP date format instead of ISO 8601
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _dumpb(self, obj: Any, **kwargs: Any) -> bytes:
+        """Encoded JSON as bytes, which is what responses need anyway"""
+        indent = kwargs.get('indent')
+        if orjson is not None and indent in (None, 2) and _ORJSON_DUMPS_ARGS.issuperset(kwargs):
+            try:
+                return orjson.dumps(
+                    obj,
+                    default=kwargs.get('default', self.default),
+                    option=self._options(indent, kwargs.get('sort_keys', self.sort_keys))
+                )
+            except orjson.JSONEncodeError:
+                pass
+        return super().dumps(obj, **kwargs).encode()
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self._dumpb(obj, **kwargs).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            body = self._dumpb(obj, indent=2)
+        else:
+            body = self._dumpb(obj, separators=(',', ':'))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_json_provider(app: Flask) -> None:
+    """Use FastJSONProvider for jsonify, request.get_json and current_app.json"""
+    app.json = FastJSONProvider(app)
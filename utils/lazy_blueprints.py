@@ -0,0 +1,94 @@
+"""
+Lazy blueprint loading
+Each blueprint's module is imported when the first request under its URL prefix arrives,
+so a cold start only pays for the routes it actually serves
+"""
+
+from importlib import import_module
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from flask import Flask
+import threading
+
+from utils.startup_profile import startup_profile
+
+# (URL prefix, module, blueprint attribute)
+BlueprintSpec = Tuple[str, str, str]
+
+
+def load_blueprint(app: Flask, spec: BlueprintSpec) -> None:
+    """Import a blueprint's module and register it (timed under the startup profile)"""
+    prefix, module_name, attribute = spec
+    with startup_profile.phase(f'blueprint {module_name}'):
+        app.register_blueprint(getattr(import_module(module_name), attribute))
+
+
+class LazyBlueprints:
+    """
+    WSGI middleware serving each blueprint from an app of its own, built on first use
+    Flask apps must not gain routes once they serve requests, so instead of registering into
+    the running app, the first request under a prefix builds a fresh app from `build_app`
+    (same configuration and hooks) holding just that blueprint. Apps are never changed after
+    they are built, so requests take no lock; only the first request per prefix waits
+    """
+
+    # Key of the app holding every blueprint, for the load-all prefixes
+    ALL = '*'
+
+    def __init__(self, app: Flask, specs: Iterable[BlueprintSpec], build_app: Callable[[], Flask],
+                 load_all_prefixes: Iterable[str] = ()):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+        self.build_app = build_app
+        # Longest prefix first so /api/users/... never matches a shorter prefix
+        self._specs: List[BlueprintSpec] = sorted(specs, key=lambda spec: len(spec[0]), reverse=True)
+        # Prefixes whose requests may reach any blueprint (e.g. /api/batch)
+        self._load_all_prefixes = tuple(load_all_prefixes)
+        # Prefix (or ALL) -> the app serving it
+        self._apps: Dict[str, Flask] = {}
+        self._lock = threading.Lock()
+        app.wsgi_app = self
+
+    def _spec_for(self, path: str) -> Optional[BlueprintSpec]:
+        for spec in self._specs:
+            if path == spec[0] or path.startswith(spec[0] + '/'):
+                return spec
+        return None
+
+    def _app_for(self, key: str, specs: List[BlueprintSpec]) -> Flask:
+        app = self._apps.get(key)
+        if app is not None:
+            return app
+        with self._lock:
+            app = self._apps.get(key)
+            if app is None:
+                app = self.build_app()
+                for spec in specs:
+                    load_blueprint(app, spec)
+                # Published only once every blueprint is registered
+                self._apps[key] = app
+        return app
+
+    def load_all(self) -> Flask:
+        """Build the app holding every blueprint now (it serves the load-all prefixes)"""
+        return self._app_for(self.ALL, self._specs)
+
+    @property
+    def apps(self) -> Dict[str, Flask]:
+        """Apps built so far, by prefix (ALL for the one holding every blueprint)"""
+        return dict(self._apps)
+
+    @property
+    def pending(self) -> List[str]:
+        """Modules of the blueprints not loaded into any app yet"""
+        if self.ALL in self._apps:
+            return []
+        return [spec[1] for spec in self._specs if spec[0] not in self._apps]
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if self._load_all_prefixes and path.startswith(self._load_all_prefixes):
+            return self.load_all()(environ, start_response)
+        spec = self._spec_for(path)
+        if spec is not None:
+            return self._app_for(spec[0], [spec])(environ, start_response)
+        return self.wsgi_app(environ, start_response)
@@ -0,0 +1,77 @@
+"""
+Keyset (cursor) pagination for list routes
+A cursor is an opaque token holding the sort value and id of the last record returned,
+so every page is one indexed range query no matter how deep it is
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from flask import request
+
+from services.field_selection import FieldSelection
+import base64
+import json
+import re
+
+DEFAULT_LIMIT = 30
+MAX_LIMIT = 200
+
+# Cursor values end up inside a PocketBase filter, so only ids and timestamps are accepted
+_ID = re.compile(r'^[A-Za-z0-9_]{1,64}$')
+_SORT_VALUE = re.compile(r'^[0-9TZ:. \-]{0,40}$')
+
+
+class CursorError(ValueError):
+    """Raised for malformed, tampered or mismatched cursors"""
+
+
+def encode_cursor(sort_field: str, value: Any, record_id: str) -> str:
+    """Opaque token for the position after (`value`, `record_id`)"""
+    payload = json.dumps({'s': sort_field, 'v': value, 'id': record_id}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, sort_field: str) -> Tuple[str, str]:
+    """(sort value, id) stored in a cursor made for `sort_field`"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        value, record_id = payload['v'], payload['id']
+    except (ValueError, TypeError, KeyError):
+        raise CursorError('Invalid cursor')
+    if payload.get('s') != sort_field:
+        raise CursorError('Cursor does not match the requested sort')
+    if not isinstance(value, str) or not isinstance(record_id, str) \
+            or not _SORT_VALUE.match(value) or not _ID.match(record_id):
+        raise CursorError('Invalid cursor')
+    return value, record_id
+
+
+def wants_keyset_page() -> bool:
+    """Cursor pagination is opt-in: a `cursor` or `limit` query parameter selects it"""
+    return 'cursor' in request.args or 'limit' in request.args
+
+
+def keyset_page(controller, sort_field: str, filter_query: str = "",
+                expand: Optional[str] = None, fields: Optional[FieldSelection] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    One page for the current request's `cursor`/`limit`, newest first
+    Returns (payload, status); the total is only counted when `count=true` is passed
+    """
+    limit = request.args.get('limit', DEFAULT_LIMIT, type=int)
+    if not 1 <= limit <= MAX_LIMIT:
+        return {'error': f'limit must be between 1 and {MAX_LIMIT}'}, 400
+
+    after = None
+    if request.args.get('cursor'):
+        try:
+            after = decode_cursor(request.args['cursor'], sort_field)
+        except CursorError as e:
+            return {'error': str(e)}, 400
+
+    page = controller.get_page_after(sort_field, limit, after, filter_query, expand, fields)
+    payload = {
+        'items': page['items'],
+        'next_cursor': encode_cursor(sort_field, *page['last']) if page['last'] else None
+    }
+    if request.args.get('count', 'false').lower() == 'true':
+        payload['total_items'] = controller.count(filter_query)
+    return payload, 200
@@ -0,0 +1,20 @@
+"""
+`expand` and `fields` query parameters for GET routes
+`expand` replaces the route's default relations (an empty value expands nothing); `fields`
+limits each record, and its expanded relations, to the listed keys
+"""
+
+from typing import Optional
+from flask import request
+
+from services.field_selection import FieldSelection
+
+
+def requested_expand(default: Optional[str] = None) -> Optional[str]:
+    """The request's `expand` parameter, or the route's default relations when it is absent"""
+    return request.args.get('expand', default)
+
+
+def requested_fields() -> Optional[FieldSelection]:
+    """The request's `fields` selection, or None for whole records"""
+    return FieldSelection.parse(request.args.get('fields'))
@@ -0,0 +1,182 @@
+"""
+Response cache with strong ETags for read-heavy GET routes
+Bodies are cached per blueprint and per user (PocketBase answers each caller under their own
+API rules) and dropped whenever a write route of that blueprint succeeds. Streamed responses
+are buffered up to max_body_bytes and cached if they end within it; longer ones are passed
+through as a stream, so memory stays bounded
+"""
+
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from flask import Blueprint, Response, current_app, g, request
+from config import Config
+from services.metrics import metrics
+import hashlib
+import threading
+import time
+
+
+class ResponseCache:
+    """Bounded LRU of serialized GET responses, grouped by blueprint"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 60, max_body_bytes: int = 1024 * 1024):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_body_bytes = max_body_bytes
+        # (blueprint, user id or '' when shared, full path) -> entry
+        self._entries: 'OrderedDict[Tuple[str, str, str], Dict[str, Any]]' = OrderedDict()
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _count(self, endpoint: str, outcome: str) -> None:
+        with self._lock:
+            counters = self._stats.setdefault(endpoint, {'hits': 0, 'misses': 0, 'not_modified': 0, 'bypassed': 0})
+            counters[outcome] += 1
+
+    def _get(self, key: Tuple[str, str, str]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry['expires_at'] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _buffer(self, response: Response) -> Optional[Response]:
+        """
+        Read a streamed response into memory if it ends within max_body_bytes, or None when it
+        is longer; `response` then streams what was read followed by the rest
+        """
+        source, chunks = response.response, response.iter_encoded()
+        buffered: List[bytes] = []
+        size = 0
+        for chunk in chunks:
+            buffered.append(chunk)
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                def replay() -> Iterator[bytes]:
+                    try:
+                        yield from buffered
+                        yield from chunks
+                    finally:
+                        if hasattr(source, 'close'):
+                            source.close()
+                response.response = replay()
+                return None
+        response.close()
+        return Response(b''.join(buffered), status=response.status_code, mimetype=response.mimetype)
+
+    def _put(self, key: Tuple[str, str, str], response: Response, decode: bool = False) -> Dict[str, Any]:
+        body = response.get_data()
+        entry = {
+            'body': body,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'mimetype': response.mimetype,
+            'expires_at': time.time() + self.ttl
+        }
+        if decode:
+            entry['payload'] = current_app.json.loads(body)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, group: str) -> None:
+        """Drop every cached response of a blueprint"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == group]:
+                del self._entries[key]
+
+    def cached(self, f: Optional[Callable] = None, *, transform: Optional[Callable[[Any], Any]] = None,
+               shared: bool = False):
+        """
+        Decorator for GET views (below require_auth): serve from cache, answering If-None-Match with 304
+        With `transform` the decoded JSON body is cached and passed through it on every
+        response, for views that overlay live in-memory state on cached upstream data.
+        Entries are kept per authenticated user unless `shared`, for views whose output
+        is the same for every caller
+        """
+        if f is None:
+            return lambda f: self.cached(f, transform=transform, shared=shared)
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            group = request.blueprint or ''
+            # Set by require_auth
+            user = '' if shared else g.get('auth_user_id', '')
+            key = (group, user, request.full_path)
+            entry = self._get(key)
+            if entry is None:
+                response = f(*args, **kwargs)
+                status = response[1] if isinstance(response, tuple) else getattr(response, 'status_code', 200)
+                if status != 200:
+                    return response
+                body = response[0] if isinstance(response, tuple) else response
+                if body.is_streamed:
+                    buffered = self._buffer(body)
+                    if buffered is None:
+                        # Too long to hold in memory: streamed through, uncached
+                        self._count(request.endpoint, 'bypassed')
+                        return response
+                    body = buffered
+                entry = self._put(key, body, decode=transform is not None)
+                outcome = 'misses'
+            else:
+                outcome = 'hits'
+
+            body, etag = entry['body'], entry['etag']
+            if transform is not None:
+                body = current_app.json.dumps(transform(entry['payload'])).encode()
+                etag = hashlib.sha1(body).hexdigest()
+
+            # Weak comparison, as If-None-Match requires: compressed responses carry W/ ETags
+            if request.if_none_match.contains_weak(etag):
+                self._count(request.endpoint, 'not_modified' if outcome == 'hits' else outcome)
+                response = Response(status=304)
+                response.set_etag(etag)
+                return response
+            self._count(request.endpoint, outcome)
+
+            response = Response(body, status=200, mimetype=entry['mimetype'])
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        return decorated_function
+
+    def invalidate_on_write(self, blueprint: Blueprint, exclude: Iterable[str] = ()) -> None:
+        """
+        Invalidate a blueprint's cached responses after any successful POST/PUT/PATCH/DELETE in it
+        Endpoints in `exclude` are writes that leave the cached data untouched
+        """
+        exclude = frozenset(exclude)
+
+        def invalidate(response: Response) -> Response:
+            if request.method in ('POST', 'PUT', 'PATCH', 'DELETE') and 200 <= response.status_code < 300 \
+                    and request.endpoint not in exclude:
+                self.invalidate(blueprint.name)
+            return response
+        blueprint.after_request(invalidate)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-route hit ratio (304s count as hits; streams too long to cache are left out) and cache size"""
+        with self._lock:
+            routes = {}
+            for endpoint, counters in self._stats.items():
+                total = counters['hits'] + counters['misses'] + counters['not_modified']
+                routes[endpoint] = dict(counters, hit_ratio=(counters['hits'] + counters['not_modified']) / total if total else 0.0)
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'routes': routes}
+
+
+# Global instance
+response_cache = ResponseCache(Config.RESPONSE_CACHE_MAX_ENTRIES, Config.RESPONSE_CACHE_TTL,
+                               Config.RESPONSE_CACHE_MAX_BODY_BYTES)
+
+metrics.register_gauge('studyleague_response_cache_entries', 'Cached GET responses',
+                       lambda: response_cache.stats()['entries'])
+
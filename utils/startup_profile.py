@@ -0,0 +1,135 @@
+"""
+Startup profile: import and init time per module
+Set STARTUP_PROFILE=true in the environment (it is read before .env is loaded) to time every
+module import and each create_app() step; the report is logged once the app is built and
+served at /health/startup
+"""
+
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+import os
+import sys
+import time
+
+
+class _TimingLoader:
+    """Wraps a module loader to time exec_module()"""
+
+    def __init__(self, loader, profile: 'StartupProfile'):
+        self._loader = loader
+        self._profile = profile
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        with self._profile._timed(module.__name__, self._profile._imports):
+            self._loader.exec_module(module)
+
+
+class _TimingFinder:
+    """Meta path finder that delegates to the real finders and wraps their loaders"""
+
+    def __init__(self, profile: 'StartupProfile'):
+        self._profile = profile
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimingLoader(spec.loader, self._profile)
+                return spec
+        return None
+
+
+class StartupProfile:
+    """Self and cumulative milliseconds per imported module and per named init phase"""
+
+    def __init__(self):
+        self.enabled = False
+        self.started_at = time.perf_counter()
+        self._imports: Dict[str, List[float]] = {}
+        self._phases: Dict[str, List[float]] = {}
+        # [name, started, time spent in nested imports/phases]
+        self._stack: List[list] = []
+        self._finder: Optional[_TimingFinder] = None
+
+    def install(self) -> None:
+        """Start timing imports (idempotent)"""
+        if self._finder is None:
+            self.enabled = True
+            self.started_at = time.perf_counter()
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def install_if_enabled(self) -> None:
+        if os.getenv('STARTUP_PROFILE', 'false').lower() == 'true':
+            self.install()
+
+    def uninstall(self) -> None:
+        if self._finder is not None and self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        self._finder = None
+
+    @contextmanager
+    def _timed(self, name: str, table: Dict[str, List[float]]) -> Iterator[None]:
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            total = time.perf_counter() - frame[1]
+            if self._stack:
+                self._stack[-1][2] += total
+            entry = table.setdefault(name, [0.0, 0.0])
+            entry[0] += (total - frame[2]) * 1000
+            entry[1] += total * 1000
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time one init step (imports made inside it are attributed to it as well)"""
+        if not self.enabled:
+            yield
+            return
+        with self._timed(name, self._phases):
+            yield
+
+    def report(self, limit: int = 30) -> Dict[str, Any]:
+        """Slowest modules by cumulative import time, and every phase in the order it ran"""
+        def rows(table: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+            return [
+                {'name': name, 'self_ms': round(self_ms, 2), 'total_ms': round(total_ms, 2)}
+                for name, (self_ms, total_ms) in table.items()
+            ]
+
+        imports = sorted(rows(self._imports), key=lambda row: row['total_ms'], reverse=True)
+        return {
+            'enabled': self.enabled,
+            'modules_imported': len(self._imports),
+            'import_ms': round(sum(self_ms for self_ms, _ in self._imports.values()), 2),
+            'since_install_ms': round((time.perf_counter() - self.started_at) * 1000, 2),
+            'phases': rows(self._phases),
+            'imports': imports[:limit]
+        }
+
+    def log(self, logger, limit: int = 15) -> None:
+        report = self.report(limit)
+        logger.warning(
+            "Startup profile: %s modules imported in %.1f ms, %.1f ms since the profile started",
+            report['modules_imported'], report['import_ms'], report['since_install_ms']
+        )
+        for row in report['phases']:
+            logger.warning("  phase  %-32s self %8.2f ms  total %8.2f ms", row['name'], row['self_ms'], row['total_ms'])
+        for row in report['imports']:
+            logger.warning("  import %-32s self %8.2f ms  total %8.2f ms", row['name'], row['self_ms'], row['total_ms'])
+
+
+# Global instance
+startup_profile = StartupProfile()
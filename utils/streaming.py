@@ -0,0 +1,137 @@
+"""
+Streaming response helpers for routes
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from flask import Response, current_app, stream_with_context
+from marshmallow import Schema
+from pocketbase.utils import camel_to_snake
+import csv
+import io
+import json
+
+from services.field_selection import FieldSelection
+
+# Keys every serialized record has, whatever its schema
+RECORD_COLUMNS = ('id', 'created', 'updated', 'collection_id', 'collection_name')
+
+
+def stream_json_array(items: Iterable[Any], status: int = 200) -> Response:
+    """
+    Stream an iterable as a JSON array without building the whole list in memory
+    The first item is pulled before the response starts, so upstream errors on the
+    first page still surface as a normal error response from the route
+    """
+    iterator = iter(items)
+    try:
+        first = next(iterator)
+    except StopIteration:
+        return Response('[]', status=status, mimetype='application/json')
+
+    def generate() -> Iterator[str]:
+        dumps = current_app.json.dumps
+        yield '[' + dumps(first)
+        for item in iterator:
+            yield ',' + dumps(item)
+        yield ']'
+
+    return Response(stream_with_context(generate()), status=status, mimetype='application/json')
+
+
+def _attachment(response: Response, filename: Optional[str]) -> Response:
+    if filename:
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_ndjson(items: Iterable[Any], filename: Optional[str] = None, status: int = 200) -> Response:
+    """
+    Stream an iterable as newline-delimited JSON, one item per line
+    As with stream_json_array, the first item is pulled before the response starts
+    """
+    iterator = iter(items)
+    try:
+        first = next(iterator)
+    except StopIteration:
+        return _attachment(Response('', status=status, mimetype='application/x-ndjson'), filename)
+
+    def generate() -> Iterator[str]:
+        dumps = current_app.json.dumps
+        yield dumps(first) + '\n'
+        for item in iterator:
+            yield dumps(item) + '\n'
+
+    return _attachment(Response(stream_with_context(generate()), status=status, mimetype='application/x-ndjson'), filename)
+
+
+def flatten_record(record: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Flat copy of a nested record with dotted keys (`expand.room.room_name`); lists become JSON"""
+    flat: Dict[str, Any] = {}
+    for key, value in record.items():
+        if isinstance(value, dict):
+            flat.update(flatten_record(value, f'{prefix}{key}.'))
+        elif isinstance(value, list):
+            flat[prefix + key] = json.dumps(value, default=str)
+        else:
+            flat[prefix + key] = value
+    return flat
+
+
+def _schema_columns(schema: Schema) -> List[str]:
+    columns = list(RECORD_COLUMNS)
+    for name, field in schema.fields.items():
+        key = camel_to_snake(name)
+        if not field.load_only and key not in columns:
+            columns.append(key)
+    return columns
+
+
+def csv_columns(schema: Schema, relations: Optional[Dict[str, Schema]] = None,
+                fields: Optional[FieldSelection] = None) -> List[str]:
+    """
+    CSV header for records of `schema`, plus `expand.<relation>.*` columns for each expanded relation
+    Known up front, so a relation missing from the first record (a session without a room) still
+    gets its columns; a `fields` selection keeps only the columns it selects
+    """
+    columns = _schema_columns(schema)
+    for relation, relation_schema in (relations or {}).items():
+        columns += [f'expand.{relation}.{column}' for column in _schema_columns(relation_schema)]
+    if fields is not None:
+        columns = [column for column in columns if fields.selects(column)]
+    return columns
+
+
+def stream_csv(records: Iterable[Dict[str, Any]], columns: Optional[List[str]] = None,
+               filename: Optional[str] = None, status: int = 200) -> Response:
+    """
+    Stream records as CSV, one row per record with nested keys flattened
+    Without `columns` the header is the first record's keys, and later records' extra keys are
+    dropped, so pass csv_columns() when records can differ in shape
+    """
+    iterator = iter(records)
+    try:
+        first = flatten_record(next(iterator))
+    except StopIteration:
+        # No records: just the header, when the columns are known
+        body = ','.join(columns) + '\r\n' if columns else ''
+        return _attachment(Response(body, status=status, mimetype='text/csv'), filename)
+    header = columns or list(first)
+
+    def generate() -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, header, restval='', extrasaction='ignore')
+
+        def flush() -> str:
+            row = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return row
+
+        writer.writeheader()
+        writer.writerow(first)
+        yield flush()
+        for record in iterator:
+            writer.writerow(flatten_record(record))
+            yield flush()
+
+    return _attachment(Response(stream_with_context(generate()), status=status, mimetype='text/csv'), filename)